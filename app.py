@@ -1,4 +1,4 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 from flask_cors import CORS
 from config import Config
 
@@ -9,11 +9,24 @@ from routes.user import bp as user_bp
 from routes.leaderboard import bp as leaderboard_bp
 from routes.streak import bp as streak_bp
 from utils.errors import register_error_handlers
+from utils.decorators import scheduler_required
+from utils.commands import register_commands
+from utils.token_cache import token_cache
+from services.ai_service import ai_service
+from services.firebase_service import firebase_service
+from utils.singleflight import singleflight
+from utils.outbound import outbound
+from utils.readiness import Readiness
+from utils.tracing import tracer, register_tracing
+from utils.json_provider import install_json_provider
+from utils.compression import register_compression
+from utils.request_memo import register_request_memo
 
 
 def create_app() -> Flask:
 	app = Flask(__name__)
 	app.config.from_object(Config)
+	install_json_provider(app, Config.JSON_PROVIDER)
 
 	CORS(
 		app,
@@ -32,10 +45,60 @@ def create_app() -> Flask:
 	# Error handlers
 	register_error_handlers(app)
 
+	# Maintenance CLI (flask --app app <command>)
+	register_commands(app)
+
+	# Server-Timing headers and /metrics; Firestore/Gemini calls are
+	# instrumented when their SDKs load on first use
+	register_tracing(app)
+
+	# Each document is read at most once per request
+	register_request_memo(app)
+
+	# Compress large JSON bodies per Accept-Encoding
+	if Config.COMPRESS_ENABLED:
+		register_compression(app)
+
+	# Open the submit journal now so entries a previous process left are replayed
+	if Config.SUBMIT_WRITE_BEHIND and not Config.DEMO_MODE:
+		firebase_service.submission_journal()
+
 	@app.get("/health")
 	def health() -> tuple[dict, int]:
 		return {"status": "ok"}, 200
 
+	# Cache, pool and breaker internals: for operators, not the public
+	@app.get("/stats")
+	@scheduler_required
+	def stats() -> tuple[dict, int]:
+		return {
+			"tokenCache": token_cache.stats(),
+			"userCache": firebase_service.user_cache.stats(),
+			"quizPool": ai_service.pool.stats(),
+			"generateAdmission": ai_service.admission.stats(),
+			"singleFlight": singleflight.stats(),
+			"outbound": outbound.stats(),
+			"submissionJournal": firebase_service.journal_stats(),
+		}, 200
+
+	# Readiness probe: pays the deferred SDK, client and cert costs up front
+	readiness = Readiness({
+		"firestore": firebase_service.warm_up,
+		"tokenCerts": firebase_service.warm_token_certs,
+		"model": ai_service.warm_up,
+	})
+
+	@app.get("/ready")
+	def ready() -> tuple[dict, int]:
+		ok, steps = readiness.check()
+		return {"ready": ok, "steps": steps}, 200 if ok else 503
+
+	# Per-route latency and upstream failures are for the scraper only
+	@app.get("/metrics")
+	@scheduler_required
+	def metrics() -> Response:
+		return Response(tracer.render() + outbound.render(), mimetype="text/plain; version=0.0.4")
+
 	return app
 
 
@@ -0,0 +1,130 @@
+import time
+
+from quart import Quart, Response, g, request
+from quart_cors import cors
+from config import Config
+
+from routes_async.auth import bp as auth_bp
+from routes_async.quiz import bp as quiz_bp
+from routes_async.user import bp as user_bp
+from routes_async.leaderboard import bp as leaderboard_bp
+from routes_async.streak import bp as streak_bp
+from utils.errors import register_error_handlers
+from utils.async_decorators import scheduler_required
+from utils.token_cache import token_cache
+from services.ai_service import ai_service
+from services.async_firebase_service import async_firebase_service
+from services.firebase_service import firebase_service
+from utils.singleflight import singleflight, async_singleflight
+from utils.outbound import outbound
+from utils.readiness import Readiness
+from utils.tracing import tracer
+from utils import request_memo
+from utils.json_provider import install_json_provider
+from utils.compression import register_compression_async
+
+
+def create_asgi_app() -> Quart:
+	"""Async serving mode: same API as ``app.create_app`` on one event loop.
+
+	Run with ``hypercorn asgi:app --bind 0.0.0.0:$PORT``.
+	"""
+	app = Quart(__name__)
+	app.config.from_object(Config)
+	install_json_provider(app, Config.JSON_PROVIDER)
+
+	app = cors(
+		app,
+		allow_origin=Config.CORS_RESOURCES[r"/api/*"]["origins"],
+		allow_credentials=Config.CORS_SUPPORTS_CREDENTIALS,
+		allow_headers=Config.CORS_ALLOW_HEADERS,
+	)
+
+	# Register blueprints
+	app.register_blueprint(auth_bp)
+	app.register_blueprint(quiz_bp)
+	app.register_blueprint(user_bp)
+	app.register_blueprint(leaderboard_bp)
+	app.register_blueprint(streak_bp)
+
+	# Error handlers
+	register_error_handlers(app)
+
+	# Server-Timing headers and /metrics; Firestore/Gemini calls are
+	# instrumented when their SDKs load on first use.
+	# Hooks must be async: Quart runs sync hooks in a copied context.
+	@app.before_request
+	async def start_trace() -> None:
+		g.trace_started = time.perf_counter()
+		tracer.start_request()
+
+	@app.after_request
+	async def finish_trace(response):
+		started = g.pop("trace_started", None)
+		if started is None:
+			return response
+		route = request.url_rule.rule if request.url_rule else "unmatched"
+		timing = tracer.finish_request(request.method, route, response.status_code, time.perf_counter() - started)
+		if Config.SERVER_TIMING_ENABLED:
+			response.headers["Server-Timing"] = timing
+		return response
+
+	# Each document is read at most once per request; the memo lives in the
+	# request task's context, which ends with it
+	@app.before_request
+	async def open_memo() -> None:
+		request_memo.start()
+
+	# Compress large JSON bodies per Accept-Encoding
+	if Config.COMPRESS_ENABLED:
+		register_compression_async(app)
+
+	# Open the submit journal now so entries a previous process left are replayed
+	if Config.SUBMIT_WRITE_BEHIND and not Config.DEMO_MODE:
+		firebase_service.submission_journal()
+
+	@app.after_serving
+	async def close_clients() -> None:
+		await async_firebase_service.aclose()
+
+	@app.get("/health")
+	async def health() -> tuple[dict, int]:
+		return {"status": "ok", "mode": "asgi"}, 200
+
+	# Cache, pool and breaker internals: for operators, not the public
+	@app.get("/stats")
+	@scheduler_required
+	async def stats() -> tuple[dict, int]:
+		return {
+			"tokenCache": token_cache.stats(),
+			"userCache": firebase_service.user_cache.stats(),
+			"quizPool": ai_service.pool.stats(),
+			"generateAdmission": ai_service.admission.stats(),
+			"singleFlight": singleflight.stats(),
+			"asyncSingleFlight": async_singleflight.stats(),
+			"outbound": outbound.stats(),
+			"submissionJournal": firebase_service.journal_stats(),
+		}, 200
+
+	# Readiness probe: pays the deferred SDK, client and cert costs up front
+	readiness = Readiness({
+		"firestore": async_firebase_service.warm_up,
+		"tokenCerts": firebase_service.warm_token_certs,
+		"model": ai_service.warm_up_async,
+	})
+
+	@app.get("/ready")
+	async def ready() -> tuple[dict, int]:
+		ok, steps = await readiness.check_async()
+		return {"ready": ok, "steps": steps}, 200 if ok else 503
+
+	# Per-route latency and upstream failures are for the scraper only
+	@app.get("/metrics")
+	@scheduler_required
+	async def metrics() -> Response:
+		return Response(tracer.render() + outbound.render(), mimetype="text/plain; version=0.0.4")
+
+	return app
+
+
+app = create_asgi_app()
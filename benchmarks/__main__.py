@@ -0,0 +1,24 @@
+"""Run the micro, payload, cold-start, hot-spot, saturation, scale and load benchmarks; exit non-zero if any regresses."""
+import sys
+
+from benchmarks import cold_start, hotspots, load, micro, payloads, saturation, scale
+
+
+def main() -> int:
+	status = micro.main([])
+	print()
+	status = payloads.main([]) or status
+	print()
+	status = cold_start.main(["--runs", "3"]) or status
+	print()
+	status = hotspots.main([]) or status
+	print()
+	status = saturation.main([]) or status
+	print()
+	status = scale.main([]) or status
+	print()
+	return load.main(sys.argv[1:]) or status
+
+
+if __name__ == "__main__":
+	sys.exit(main())
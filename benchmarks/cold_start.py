@@ -0,0 +1,110 @@
+"""Cold start: import time of the apps and latency of the first requests.
+
+Every sample runs in a fresh interpreter, as a new container would.
+``import`` is the wall time of ``import app`` / ``import asgi``. The first
+``GET /api/leaderboard/daily`` and ``POST /api/quiz/generate`` are timed
+after ``/ready`` has passed, against the offline fakes, so they measure the
+in-process costs a cold instance pays (SDK imports, client set-up,
+instrumentation) rather than the network; the same requests without
+``/ready`` are reported for comparison. Medians over ``--runs`` are checked
+against ``thresholds.json``.
+
+    python -m benchmarks.cold_start --runs 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.thresholds import check, load_thresholds
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_REQUESTS = [
+	("GET /api/leaderboard/daily", "GET", "/api/leaderboard/daily", None),
+	("POST /api/quiz/generate", "POST", "/api/quiz/generate", {"subject": "python", "difficulty": 2, "lastScore": 70}),
+]
+
+
+def _child_import(module: str) -> dict:
+	start = time.perf_counter()
+	__import__(module)
+	return {"ms": (time.perf_counter() - start) * 1000}
+
+
+def _child_requests(warm: bool) -> dict:
+	from benchmarks import fakes
+
+	backend = fakes.install()
+	backend.db.collection("users").document("cold").set({"userId": "cold", "username": "cold", "totalPoints": 0})
+	from app import app
+
+	client = app.test_client()
+	result = {}
+	if warm:
+		start = time.perf_counter()
+		resp = client.get("/ready")
+		result["ready_ms"] = (time.perf_counter() - start) * 1000
+		if resp.status_code != 200:
+			raise SystemExit(f"/ready returned {resp.status_code}: {resp.get_json()}")
+	for label, method, path, body in FIRST_REQUESTS:
+		start = time.perf_counter()
+		resp = client.open(path, method=method, json=body, headers={"Authorization": "Bearer fake-cold"})
+		result[label] = (time.perf_counter() - start) * 1000
+		if resp.status_code >= 400:
+			raise SystemExit(f"{label} returned {resp.status_code}")
+	return result
+
+
+def _sample(*args: str) -> dict:
+	out = subprocess.run(
+		[sys.executable, "-m", "benchmarks.cold_start", "--child", *args],
+		cwd=ROOT, capture_output=True, text=True, check=True,
+	)
+	return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int) -> dict[str, dict[str, float]]:
+	results: dict[str, dict[str, float]] = {}
+	for module in ("app", "asgi"):
+		samples = [_sample("import", module)["ms"] for _ in range(runs)]
+		results[f"import {module}"] = {"median_ms": statistics.median(samples)}
+	for mode in ("cold", "ready"):
+		samples = [_sample("requests", mode) for _ in range(runs)]
+		for key in samples[0]:
+			label = f"{key} ({mode})" if key != "ready_ms" else "GET /ready"
+			results[label] = {"median_ms": statistics.median(s[key] for s in samples)}
+	return results
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement.")
+	parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+	parser.add_argument("--no-thresholds", action="store_true", help="Report only; never fail the run.")
+	args = parser.parse_args(argv)
+
+	if args.child:
+		kind, arg = args.child
+		print(json.dumps(_child_import(arg) if kind == "import" else _child_requests(arg == "ready")))
+		return 0
+
+	results = run(args.runs)
+	print(f"{'cold start (median of ' + str(args.runs) + ')':<45} {'ms':>8}")
+	for label, row in results.items():
+		print(f"{label:<45} {row['median_ms']:>8.1f}")
+	if args.no_thresholds:
+		return 0
+	failures = check(load_thresholds()["cold_start"], results)
+	for failure in failures:
+		print("REGRESSION:", failure)
+	return 1 if failures else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,327 @@
+"""Seeded synthetic dataset at production-like sizes.
+
+``generate(spec)`` yields every document as ``(path, data)``: users whose
+progress histories follow a long-tailed (lognormal) length, the all-time
+leaderboard and the current daily and weekly buckets, mutual friend lists,
+and the quizzes still inside their 24 hour TTL. Totals, streaks and running
+aggregates on each user agree with that user's history, as if every item had
+gone through submit. Users are built in chunks of ``CHUNK``, each from its
+own ``(seed, chunk)`` random stream, so a dataset is reproducible from its
+spec and a smaller one is a prefix of a larger one: the users of every whole
+chunk are the same at 10k and at 10M (friend lists are drawn within a chunk,
+so only a partial last chunk differs), which lets per-user timings be
+compared across sizes. Only one chunk is in memory at a time.
+
+``load_fake`` fills ``benchmarks.fakes.FakeFirestore`` directly;
+``load_emulator`` writes through a BulkWriter and refuses to run unless
+``FIRESTORE_EMULATOR_HOST`` is set, so it can never reach a real project.
+
+    python -m benchmarks.dataset --users 1000000 --target emulator
+    python -m benchmarks.dataset --users 100000 --target count
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from benchmarks import fakes
+
+
+# Users per random stream; changing it changes every dataset
+CHUNK = 4096
+
+SUBJECTS = (
+	"python", "algebra", "biology", "world history", "javascript", "chemistry", "geometry", "physics",
+	"spanish", "sql", "statistics", "literature", "economics", "french", "astronomy", "music theory",
+)
+# Zipf-like popularity: a handful of subjects take most of the traffic
+_SUBJECT_WEIGHTS = 1 / np.arange(1, len(SUBJECTS) + 1) ** 1.1
+_SUBJECT_WEIGHTS /= _SUBJECT_WEIGHTS.sum()
+AVATARS = ("", "🧠", "🎯", "⚡", "🚀", "📚", "🦉", "🔥")
+QUESTIONS = 5
+DAY = 86400.0
+
+Doc = tuple[tuple[str, ...], dict]
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+	users: int = 10_000
+	seed: int = 7
+	# Reference time; pin it for an identical dataset across runs
+	now: datetime | None = None
+	# Accounts were created uniformly over this many days
+	days: int = 365
+	# Share of users who signed up and never finished a quiz
+	idle_share: float = 0.2
+	# Quizzes per active user: lognormal around the median, capped
+	median_history: float = 6.0
+	history_sigma: float = 1.3
+	max_history: int = 5000
+	max_per_day: float = 10.0
+	# Mean days since an active user's last quiz (exponential)
+	recency_days: float = 10.0
+	friends_mean: float = 2.0
+	frozen_share: float = 0.02
+	# Users without running aggregates, as before they were introduced
+	legacy_share: float = 0.0
+
+
+def user_id(n: int) -> str:
+	"""Id of the ``n``-th generated user; the same for every dataset size."""
+	return f"load-{n:08d}"
+
+
+@functools.lru_cache(maxsize=None)
+def _quiz_template(subject: str, difficulty: int) -> tuple[list, bytes]:
+	from services.answer_key import AnswerKey
+
+	questions = fakes.fake_quiz(subject)["questions"]
+	return questions, AnswerKey.from_questions(questions, difficulty).pack()
+
+
+def _at(seconds: float) -> datetime:
+	return datetime.fromtimestamp(seconds, timezone.utc)
+
+
+def _friend_lists(rng: np.random.Generator, degree: np.ndarray, limit: int) -> list[set[int]]:
+	# Mutual edges inside the chunk, so every list is complete without a second pass
+	owners = np.repeat(np.arange(len(degree)), degree)
+	others = rng.integers(0, len(degree), len(owners))
+	friends: list[set[int]] = [set() for _ in range(len(degree))]
+	for a, b in zip(owners.tolist(), others.tolist()):
+		if a != b and len(friends[a]) < limit and len(friends[b]) < limit:
+			friends[a].add(b)
+			friends[b].add(a)
+	return friends
+
+
+def _streaks(days: list[int], increments: list[bool], today: int) -> tuple[int, int]:
+	"""(current, longest): a missed day resets the streak, as the nightly job does."""
+	current = longest = 0
+	previous = None
+	for day, inc in zip(days, increments):
+		if previous is not None and day > previous + 1:
+			current = 0
+		current += inc
+		longest = max(longest, current)
+		previous = day
+	if previous is None or previous < today - 1:
+		current = 0
+	return current, longest
+
+
+def _chunk(spec: DatasetSpec, now: datetime, index: int) -> Iterator[Doc]:
+	from config import Config
+	from services.firebase_service import AGGREGATES_VERSION, period_key
+	from services.rescore import rescore_points
+	from services.scoring_service import scoring_service
+	from utils.helpers import field_key
+
+	# Every draw covers a full chunk, so a partial last chunk is a prefix of the full one
+	rng = np.random.default_rng([spec.seed, index])
+	stamp = now.timestamp()
+	today = int(stamp // DAY)
+	day_key, week_key = period_key("daily", now), period_key("weekly", now)
+	week_start = stamp - now.astimezone(timezone.utc).weekday() * DAY - stamp % DAY
+
+	age = rng.uniform(0, spec.days * DAY, CHUNK)
+	idle = rng.random(CHUNK) < spec.idle_share
+	history = np.minimum(np.floor(rng.lognormal(np.log(spec.median_history), spec.history_sigma, CHUNK)), spec.max_history)
+	# Nobody finishes more than max_per_day quizzes a day on average, however new
+	history = np.minimum(history, np.ceil(age / DAY * spec.max_per_day))
+	history = np.where(idle, 0, np.maximum(history, 1)).astype(np.int64)
+	recency = np.minimum(rng.exponential(spec.recency_days * DAY, CHUNK), age)
+	skill = rng.beta(4, 2, CHUNK)
+	frozen = rng.random(CHUNK) < spec.frozen_share
+	legacy = rng.random(CHUNK) < spec.legacy_share
+	avatar = rng.integers(0, len(AVATARS), CHUNK)
+	friends = _friend_lists(rng, rng.poisson(spec.friends_mean, CHUNK), Config.FRIENDS_MAX)
+
+	# Items of all users in one pass: placed between signup and last activity,
+	# in time order within a user, the last one exactly at last activity
+	owner = np.repeat(np.arange(CHUNK), history)
+	place = rng.random(len(owner))
+	order = np.lexsort((place, owner))
+	place = place[order]
+	bounds = np.concatenate(([0], np.cumsum(history)))
+	place[bounds[1:][history > 0] - 1] = 1.0
+	created = stamp - age
+	last = stamp - recency
+	completed = created[owner] + place * (last - created)[owner]
+	difficulty = rng.integers(1, 6, len(owner))
+	correct = rng.binomial(QUESTIONS, skill[owner])
+	subject = rng.choice(len(SUBJECTS), len(owner), p=_SUBJECT_WEIGHTS)
+	answers = rng.integers(0, 4, (len(owner), QUESTIONS))
+	points = rescore_points(correct, difficulty, scoring_service.rules)
+	score = correct * 100 // QUESTIONS
+
+	first = index * CHUNK
+	for i in range(min(CHUNK, spec.users - first)):
+		n = first + i
+		uid = user_id(n)
+		lo, hi = int(bounds[i]), int(bounds[i + 1])
+		item_days: list[int] = []
+		increments: list[bool] = []
+		subject_counts: Counter[str] = Counter()
+		today_points = week_points = 0
+		for k in range(lo, hi):
+			at = float(completed[k])
+			name = SUBJECTS[subject[k]]
+			quiz_id = f"{uid}-q{k - lo:05d}"
+			inc = bool(score[k] >= 60)
+			completed_at = _at(at)
+			yield ("progress", uid, "items", quiz_id), {
+				"score": int(score[k]),
+				"pointsEarned": int(points[k]),
+				"correctCount": int(correct[k]),
+				"difficulty": int(difficulty[k]),
+				"streakIncremented": inc,
+				"completedAt": completed_at,
+				"answers": answers[k].tolist(),
+				"subject": name,
+			}
+			if stamp - at < DAY:
+				# Still inside the quiz TTL
+				questions, key = _quiz_template(name, int(difficulty[k]))
+				created_at = completed_at - timedelta(minutes=5)
+				yield ("quizzes", quiz_id), {
+					"userId": uid,
+					"questions": questions,
+					"subject": name,
+					"difficulty": int(difficulty[k]),
+					"createdAt": created_at,
+					"expiresAt": created_at + timedelta(hours=24),
+					"answerKey": key,
+				}
+			item_days.append(int(at // DAY))
+			increments.append(inc)
+			subject_counts[field_key(name)] += 1
+			if at >= stamp - stamp % DAY:
+				today_points += int(points[k])
+			if at >= week_start:
+				week_points += int(points[k])
+
+		username = f"learner{n}"
+		current, longest = _streaks(item_days, increments, today)
+		total = int(points[lo:hi].sum())
+		user = {
+			"email": f"{username}@example.com",
+			"username": username,
+			"avatar": AVATARS[avatar[i]],
+			"currentStreak": current,
+			"longestStreak": longest,
+			"totalPoints": total,
+			"level": 1,
+			"lastQuizDate": _at(float(completed[hi - 1])) if hi > lo else None,
+			"createdAt": _at(float(created[i])),
+			"streakFrozen": bool(frozen[i]),
+		}
+		if not legacy[i]:
+			user.update({
+				"quizzesCompleted": hi - lo,
+				"scoreSum": int(score[lo:hi].sum()),
+				"bestScore": int(score[lo:hi].max(initial=0)),
+				"subjectCounts": dict(subject_counts),
+				"aggregatesVersion": AGGREGATES_VERSION,
+			})
+		yield ("users", uid), user
+		yield ("leaderboard", "all-time", "users", uid), {
+			"username": username, "avatar": user["avatar"], "points": total, "streak": current,
+		}
+		if today_points:
+			yield ("leaderboard", f"daily-{day_key}", "users", uid), {"points": today_points}
+		if week_points:
+			yield ("leaderboard", f"weekly-{week_key}", "users", uid), {"points": week_points}
+		ids = sorted(user_id(first + f) for f in friends[i] if first + f < spec.users)
+		if ids:
+			yield ("friends", uid), {"ids": ids}
+
+
+def generate(spec: DatasetSpec) -> Iterator[Doc]:
+	"""Every document of the dataset described by ``spec``, one chunk of users at a time."""
+	from services.firebase_service import period_key
+	from utils.helpers import utc_now
+
+	now = spec.now or utc_now()
+	yield ("leaderboard", "all-time"), {"updatedAt": now}
+	for period in ("daily", "weekly"):
+		key = period_key(period, now)
+		yield ("leaderboard", f"{period}-{key}"), {"updatedAt": now, "period": period, "key": key}
+	for index in range(-(-spec.users // CHUNK)):
+		yield from _chunk(spec, now, index)
+
+
+def load_fake(db: fakes.FakeFirestore, docs: Iterable[Doc]) -> int:
+	"""Store ``docs`` in the in-process fake as they are (not copied)."""
+	return db.bulk_load(docs)
+
+
+def load_emulator(docs: Iterable[Doc], project: str | None = None, ops_per_second: int = 20000) -> int:
+	"""Write ``docs`` to the Firestore emulator through a BulkWriter."""
+	if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+		raise RuntimeError("FIRESTORE_EMULATOR_HOST is not set; refusing to bulk-load a real project")
+	from google.cloud import firestore
+	from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+
+	client = firestore.Client(project=project or os.getenv("GCLOUD_PROJECT", "demo-webnova"))
+	# The emulator has no 500/50/5 ramp-up to respect
+	writer = client.bulk_writer(BulkWriterOptions(initial_ops_per_second=ops_per_second, max_ops_per_second=ops_per_second))
+	count = 0
+	for path, data in docs:
+		writer.set(client.document(*path), data)
+		count += 1
+	writer.close()
+	return count
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--users", type=int, default=DatasetSpec.users)
+	parser.add_argument("--seed", type=int, default=DatasetSpec.seed)
+	parser.add_argument("--now", type=datetime.fromisoformat, help="Reference time (ISO 8601, with offset); default now.")
+	parser.add_argument("--median-history", type=float, default=DatasetSpec.median_history)
+	parser.add_argument("--legacy-share", type=float, default=DatasetSpec.legacy_share)
+	parser.add_argument("--target", choices=["count", "fake", "emulator"], default="count")
+	parser.add_argument("--project", help="Emulator project id (default: $GCLOUD_PROJECT or demo-webnova).")
+	parser.add_argument("--ops-per-second", type=int, default=20000, help="BulkWriter rate against the emulator.")
+	args = parser.parse_args(argv)
+
+	spec = DatasetSpec(
+		users=args.users, seed=args.seed, now=args.now,
+		median_history=args.median_history, legacy_share=args.legacy_share,
+	)
+	collections: Counter[str] = Counter()
+
+	def counted(docs: Iterable[Doc]) -> Iterator[Doc]:
+		for path, data in docs:
+			# progress/{uid}/items and leaderboard/{id}/users are counted as subcollections
+			collections["/".join(path[0::2])] += 1
+			yield path, data
+
+	start = time.perf_counter()
+	docs = counted(generate(spec))
+	if args.target == "emulator":
+		written = load_emulator(docs, args.project, args.ops_per_second)
+	elif args.target == "fake":
+		written = load_fake(fakes.FakeFirestore(), docs)
+	else:
+		written = sum(1 for _ in docs)
+	elapsed = time.perf_counter() - start
+	for name, count in sorted(collections.items()):
+		print(f"{name:<25} {count:>12,}")
+	print(f"{written:,} documents ({args.target}) in {elapsed:.1f}s, {written / elapsed:,.0f}/s")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
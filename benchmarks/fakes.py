@@ -0,0 +1,617 @@
+"""In-process stand-ins for Firestore, Firebase Auth and the Gemini model.
+
+They implement just the surface ``FirebaseService`` and ``AIService`` use, add
+a configurable per-call latency, and count every backend round trip so the
+load harness can attribute them to the request that caused them.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import functools
+import json
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from types import SimpleNamespace
+
+from google.api_core.exceptions import AlreadyExists
+
+
+class RoundTrips:
+	"""Counts backend calls overall and for the request running on this thread."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._local = threading.local()
+		self.totals: Counter[str] = Counter()
+
+	def add(self, kind: str) -> None:
+		with self._lock:
+			self.totals[kind] += 1
+		if getattr(self._local, "count", None) is not None:
+			self._local.count += 1
+
+	def start(self) -> None:
+		self._local.count = 0
+
+	def stop(self) -> int:
+		count, self._local.count = self._local.count, None
+		return count
+
+
+# ---------- Firestore ----------
+def _transform(current, value):
+	kind = type(value).__name__
+	if kind == "Increment":
+		return (current or 0) + value.value
+	if kind == "Maximum":
+		return value.value if current is None else max(current, value.value)
+	if kind == "Minimum":
+		return value.value if current is None else min(current, value.value)
+	if kind == "ArrayUnion":
+		return list(current or []) + [v for v in value.values if v not in (current or [])]
+	if kind == "ArrayRemove":
+		return [v for v in current or [] if v not in value.values]
+	return _clone(value)
+
+
+def _clone(value):
+	# Stored values are trees of dicts and lists over immutable leaves
+	# (numbers, strings, bytes, datetimes); copy.deepcopy is several times slower
+	if isinstance(value, dict):
+		return {k: _clone(v) for k, v in value.items()}
+	if isinstance(value, list):
+		return [_clone(v) for v in value]
+	return value
+
+
+def _merge(target: dict, data: dict) -> None:
+	for key, value in data.items():
+		if isinstance(value, dict) and isinstance(target.get(key), dict):
+			_merge(target[key], value)
+		else:
+			target[key] = _transform(target.get(key), value)
+
+
+def _field(data: dict, path: str):
+	for part in path.split("."):
+		if not isinstance(data, dict) or part not in data:
+			return _MISSING
+		data = data[part]
+	return data
+
+
+_MISSING = object()
+# Query results kept by FakeQuery._rows, least recently used dropped first
+_SORTED_MAX = 256
+_OPS = {
+	"==": lambda a, b: a == b,
+	"!=": lambda a, b: a != b,
+	"<": lambda a, b: a < b,
+	"<=": lambda a, b: a <= b,
+	">": lambda a, b: a > b,
+	">=": lambda a, b: a >= b,
+	"in": lambda a, b: a in b,
+	"array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+def _test(value, op: str, arg) -> bool:
+	if value is _MISSING:
+		return False
+	try:
+		return _OPS[op](value, arg)
+	except TypeError:
+		# Firestore orders by type first, so a range over timestamps skips nulls
+		return False
+
+
+class FakeSnapshot:
+
+	def __init__(self, reference: "FakeDocument", data: dict | None, fields: list[str] | None = None):
+		self.reference = reference
+		self.id = reference.id
+		self.exists = data is not None
+		if data is not None and fields is not None:
+			data = {f: data[f] for f in fields if f in data}
+		self._data = data
+
+	def to_dict(self) -> dict | None:
+		return _clone(self._data)
+
+
+class FakeDocument:
+
+	def __init__(self, db: "FakeFirestore", path: tuple[str, ...]):
+		self._db = db
+		self.path = path
+		self.id = path[-1]
+
+	@property
+	def parent(self) -> "FakeCollection":
+		return FakeCollection(self._db, self.path[:-1])
+
+	def collection(self, name: str) -> "FakeCollection":
+		return FakeCollection(self._db, self.path + (name,))
+
+	def get(self, field_paths: list[str] | None = None, transaction=None) -> FakeSnapshot:
+		self._db._rpc("get")
+		return self._db._snapshot(self, field_paths)
+
+	def set(self, data: dict, merge: bool = False) -> None:
+		self._db._rpc("set")
+		self._db._write([("set", self, data, merge)])
+
+	def update(self, data: dict) -> None:
+		self._db._rpc("update")
+		self._db._write([("update", self, data, False)])
+
+	def delete(self) -> None:
+		self._db._rpc("delete")
+		self._db._write([("delete", self, None, False)])
+
+
+class FakeQuery:
+
+	def __init__(self, db: "FakeFirestore", path: tuple[str, ...], filters=(), orders=(), limit=None, fields=None, cursor=None, group=False):
+		self._db = db
+		self._path = path
+		# Collection-group queries match every collection with this id
+		self._group = group
+		self._filters = tuple(filters)
+		self._orders = tuple(orders)
+		self._limit = limit
+		self._fields = fields
+		self._cursor = cursor
+
+	def _copy(self, **changes) -> "FakeQuery":
+		state = {
+			"filters": self._filters,
+			"orders": self._orders,
+			"limit": self._limit,
+			"fields": self._fields,
+			"cursor": self._cursor,
+			"group": self._group,
+			**changes,
+		}
+		return FakeQuery(self._db, self._path, **state)
+
+	def where(self, field: str, op: str, value) -> "FakeQuery":
+		return self._copy(filters=self._filters + ((field, op, value),))
+
+	def order_by(self, field: str, direction: str = "ASCENDING") -> "FakeQuery":
+		return self._copy(orders=self._orders + ((field, direction),))
+
+	def limit(self, count: int) -> "FakeQuery":
+		return self._copy(limit=count)
+
+	def select(self, fields: list[str]) -> "FakeQuery":
+		return self._copy(fields=list(fields))
+
+	def start_after(self, cursor) -> "FakeQuery":
+		return self._copy(cursor=cursor)
+
+	def get(self) -> list[FakeSnapshot]:
+		self._db._rpc("query")
+		return self._run()
+
+	def stream(self):
+		self._db._rpc("query")
+		yield from self._run()
+
+	def _value(self, path: tuple[str, ...], data: dict, field: str):
+		if field == "__name__":
+			# Group queries order by full path, like Firestore
+			return "/".join(path) if self._group else path[-1]
+		return _field(data, field)
+
+	def _cursor_values(self) -> list:
+		cursor = self._cursor
+		if isinstance(cursor, FakeSnapshot):
+			data = self._db._docs.get(cursor.reference.path, {})
+			return [self._value(cursor.reference.path, data, f) for f, _ in self._orders]
+		if isinstance(cursor, dict):
+			values = [cursor.get(f) for f, _ in self._orders]
+			return [self._value(v.path, {}, "__name__") if isinstance(v, FakeDocument) else v for v in values]
+		return list(cursor)
+
+	def _candidates(self):
+		# Only the queried collection (or every collection with the group's id)
+		if self._group:
+			return self._db._groups.get(self._path[-1], {})
+		return self._db._children.get(self._path, {})
+
+	def _compare(self, left: list, right: list) -> int:
+		for (_, direction), a, b in zip(self._orders, left, right):
+			if a != b:
+				result = -1 if a < b else 1
+				return -result if direction == "DESCENDING" else result
+		return 0
+
+	def _rows(self) -> list[tuple[list, tuple[str, ...]]]:
+		"""(order key, path) of every match in query order.
+
+		Results are kept until a write could change them, so paging through a
+		large collection (or a range of it) reads an index instead of
+		re-scanning and re-sorting for every page.
+		"""
+		shape = (self._group, self._path, self._orders, self._filters)
+		try:
+			hash(shape)
+		except TypeError:
+			shape = None  # an "in" filter's list; not worth caching
+		scope = (self._group, self._path[-1] if self._group else self._path)
+		# Writes to fields the query neither filters nor orders by leave its rows as they were
+		fields = sorted({f.split(".")[0] for f, *_ in (*self._orders, *self._filters) if f != "__name__"})
+		version = (self._db._versions[scope], *(self._db._versions[scope + (f,)] for f in fields))
+		cached = self._db._sorted.get(shape) if shape is not None else None
+		if cached is not None and cached[0] == version:
+			self._db._sorted.move_to_end(shape)
+			return cached[1]
+		rows = []
+		for path in self._candidates():
+			data = self._db._docs[path]
+			values = [_field(data, f) for f, _, _ in self._filters]
+			if any(not _test(v, op, arg) for v, (_, op, arg) in zip(values, self._filters)):
+				continue
+			key = [self._value(path, data, f) for f, _ in self._orders]
+			if any(v is _MISSING for v in key):
+				continue
+			rows.append((key, path))
+		rows.sort(key=functools.cmp_to_key(lambda a, b: self._compare(a[0], b[0]) or (-1 if a[1] < b[1] else 1)))
+		if shape is not None:
+			self._db._sorted[shape] = (version, rows)
+			self._db._sorted.move_to_end(shape)
+			while len(self._db._sorted) > _SORTED_MAX:
+				self._db._sorted.popitem(last=False)
+		return rows
+
+	def _run(self) -> list[FakeSnapshot]:
+		with self._db._lock:
+			rows = self._rows()
+			if self._cursor is not None:
+				order = functools.cmp_to_key(self._compare)
+				start = bisect.bisect_right(rows, order(self._cursor_values()), key=lambda row: order(row[0]))
+				rows = rows[start:]
+			if self._limit is not None:
+				rows = rows[:self._limit]
+			return [self._db._snapshot(FakeDocument(self._db, path), self._fields) for _, path in rows]
+
+
+class FakeCollection(FakeQuery):
+
+	def __init__(self, db: "FakeFirestore", path: tuple[str, ...]):
+		super().__init__(db, path)
+		self.id = path[-1]
+
+	@property
+	def parent(self) -> FakeDocument | None:
+		return FakeDocument(self._db, self._path[:-1]) if len(self._path) > 1 else None
+
+	def document(self, doc_id: str | None = None) -> FakeDocument:
+		return FakeDocument(self._db, self._path + (doc_id or uuid.uuid4().hex[:20],))
+
+	def list_documents(self):
+		# Like Firestore, includes missing documents that have subcollections
+		depth = len(self._path) + 1
+		with self._db._lock:
+			paths = {path[:depth] for path in self._db._children.get(self._path, {})}
+			# Parents of non-empty subcollections, whether or not they exist
+			paths.update(c[:depth] for c, docs in self._db._children.items() if docs and len(c) > depth and c[:depth - 1] == self._path)
+		return [FakeDocument(self._db, path) for path in sorted(paths)]
+
+
+class FakeBatch:
+
+	def __init__(self, db: "FakeFirestore"):
+		self._db = db
+		self._ops: list = []
+
+	def set(self, ref: FakeDocument, data: dict, merge: bool = False) -> None:
+		self._ops.append(("set", ref, data, merge))
+
+	def create(self, ref: FakeDocument, data: dict) -> None:
+		self._ops.append(("create", ref, data, False))
+
+	def update(self, ref: FakeDocument, data: dict) -> None:
+		self._ops.append(("update", ref, data, False))
+
+	def delete(self, ref: FakeDocument) -> None:
+		self._ops.append(("delete", ref, None, False))
+
+	def commit(self) -> None:
+		self._db._rpc("commit")
+		self._db._write(self._ops)
+
+
+class FakeTransaction(FakeBatch):
+	"""Batch with the hooks ``firestore.transactional`` drives.
+
+	Transactions run one at a time (a lock held from begin to commit), which
+	is all the isolation the services' read-then-write transactions rely on.
+	"""
+
+	_read_only = False
+	_max_attempts = 5
+
+	def __init__(self, db: "FakeFirestore"):
+		super().__init__(db)
+		self._id = None
+
+	@property
+	def in_progress(self) -> bool:
+		return self._id is not None
+
+	def _clean_up(self) -> None:
+		self._ops = []
+		self._id = None
+
+	def _begin(self, retry_id=None) -> None:
+		self._db._rpc("begin")
+		self._db._txn_lock.acquire()
+		self._id = uuid.uuid4().bytes
+
+	def _commit(self) -> None:
+		try:
+			self.commit()
+		finally:
+			self._release()
+
+	def _rollback(self) -> None:
+		self._release()
+
+	def _release(self) -> None:
+		if self._id is not None:
+			self._clean_up()
+			self._db._txn_lock.release()
+
+
+class FakeFirestore:
+	"""Dict-backed Firestore client with per-RPC latency.
+
+	``doc_write_interval`` models Firestore's sustained per-document write
+	rate: a commit waits until every document it writes has been idle that
+	long, so writes to one hot document serialize. ``writes`` counts commits
+	per document path. Documents are indexed by parent collection and by
+	collection id, so a query reads its own collection however large the
+	rest of the database is; ``bulk_load`` fills it without RPCs.
+	"""
+
+	def __init__(self, latency: float = 0.0, doc_write_interval: float = 0.0):
+		self.latency = latency
+		self.doc_write_interval = doc_write_interval
+		self.round_trips = RoundTrips()
+		self.writes: Counter[tuple[str, ...]] = Counter()
+		self._lock = threading.RLock()
+		self._docs: dict[tuple[str, ...], dict] = {}
+		# Document paths per parent collection path and per collection id
+		self._children: dict[tuple[str, ...], dict[tuple[str, ...], None]] = {}
+		self._groups: dict[str, dict[tuple[str, ...], None]] = {}
+		# Write counters per collection (and group), overall and per field; see FakeQuery._rows
+		self._versions: Counter[tuple] = Counter()
+		self._sorted: OrderedDict[tuple, tuple[tuple, list]] = OrderedDict()
+		self._next_write: dict[tuple[str, ...], float] = {}
+		self._txn_lock = threading.Lock()
+
+	def collection(self, name: str) -> FakeCollection:
+		return FakeCollection(self, (name,))
+
+	def collection_group(self, collection_id: str) -> FakeQuery:
+		return FakeQuery(self, (collection_id,), group=True)
+
+	def batch(self) -> FakeBatch:
+		return FakeBatch(self)
+
+	def transaction(self) -> FakeTransaction:
+		return FakeTransaction(self)
+
+	def get_all(self, refs, field_paths: list[str] | None = None, transaction=None):
+		self._rpc("get_all")
+		return [self._snapshot(ref, field_paths) for ref in refs]
+
+	def bulk_load(self, docs) -> int:
+		"""Store ``(path, data)`` pairs as plain sets, bypassing latency and round trips."""
+		count = 0
+		with self._lock:
+			for path, data in docs:
+				self._put(tuple(path), data)
+				count += 1
+		return count
+
+	def _touch(self, path: tuple[str, ...], fields=None) -> None:
+		# Without fields a document came, went or was replaced; with them only those changed
+		for scope in ((False, path[:-1]), (True, path[-2])):
+			if fields is None:
+				self._versions[scope] += 1
+			else:
+				for field in fields:
+					self._versions[scope + (field.split(".")[0],)] += 1
+
+	def _put(self, path: tuple[str, ...], data: dict) -> None:
+		self._touch(path)
+		if path not in self._docs:
+			self._children.setdefault(path[:-1], {})[path] = None
+			self._groups.setdefault(path[-2], {})[path] = None
+		self._docs[path] = data
+
+	def _drop(self, path: tuple[str, ...]) -> None:
+		self._touch(path)
+		if self._docs.pop(path, None) is not None:
+			self._children[path[:-1]].pop(path, None)
+			self._groups[path[-2]].pop(path, None)
+
+	def _rpc(self, kind: str) -> None:
+		self.round_trips.add(kind)
+		if self.latency:
+			time.sleep(self.latency)
+
+	def _snapshot(self, ref: FakeDocument, fields: list[str] | None) -> FakeSnapshot:
+		with self._lock:
+			data = self._docs.get(ref.path)
+			if data is not None and fields is not None:
+				data = {f: data[f] for f in fields if f in data}
+			return FakeSnapshot(ref, _clone(data) if data is not None else None, fields)
+
+	def _write(self, ops: list) -> None:
+		paths = {ref.path for _, ref, _, _ in ops}
+		if self.doc_write_interval:
+			with self._lock:
+				now = time.monotonic()
+				at = max([now, *(self._next_write.get(path, 0.0) for path in paths)])
+				for path in paths:
+					self._next_write[path] = at + self.doc_write_interval
+			if at > now:
+				time.sleep(at - now)
+		self._apply(ops)
+		with self._lock:
+			self.writes.update(paths)
+
+	def _apply(self, ops: list) -> None:
+		with self._lock:
+			# Validate first so a failing update leaves the batch unapplied
+			for kind, ref, _, _ in ops:
+				if kind == "update" and ref.path not in self._docs:
+					raise KeyError(f"No document to update: {'/'.join(ref.path)}")
+				if kind == "create" and ref.path in self._docs:
+					raise AlreadyExists(f"Document already exists: {'/'.join(ref.path)}")
+			for kind, ref, data, merge in ops:
+				if kind in ("set", "update") and (merge or kind == "update") and ref.path in self._docs:
+					self._touch(ref.path, data)
+				if kind == "delete":
+					self._drop(ref.path)
+				elif kind in ("set", "create") and not merge:
+					self._put(ref.path, {})
+					_merge(self._docs[ref.path], data)
+				elif kind == "set":
+					if ref.path not in self._docs:
+						self._put(ref.path, {})
+					_merge(self._docs[ref.path], data)
+				else:
+					doc = self._docs[ref.path]
+					for path, value in data.items():
+						*parents, leaf = path.split(".")
+						target = doc
+						for part in parents:
+							target = target.setdefault(part, {})
+						target[leaf] = _transform(target.get(leaf), value)
+
+
+# ---------- Auth ----------
+class FakeAuth:
+	"""Issues ``fake-<uid>`` ID tokens and verifies them without crypto."""
+
+	def __init__(self, latency: float = 0.0):
+		self.latency = latency
+		self._lock = threading.Lock()
+		self._emails: dict[str, str] = {}
+
+	def create_user(self, email: str, password: str, display_name: str | None = None):
+		time.sleep(self.latency)
+		with self._lock:
+			if email in self._emails:
+				raise ValueError("EMAIL_EXISTS")
+			uid = self._emails[email] = uuid.uuid4().hex[:28]
+		return SimpleNamespace(uid=uid, email=email, display_name=display_name)
+
+	def create_custom_token(self, uid: str) -> bytes:
+		return f"fake-{uid}".encode()
+
+	def verify_id_token(self, token: str) -> dict:
+		time.sleep(self.latency)
+		if not token.startswith("fake-"):
+			raise ValueError("Invalid token")
+		return {"uid": token[len("fake-"):], "exp": time.time() + 3600}
+
+	def revoke_refresh_tokens(self, uid: str) -> None:
+		pass
+
+
+# ---------- Gemini ----------
+def fake_quiz(subject: str = "python") -> dict:
+	return {
+		"questions": [
+			{
+				"question": f"{subject} question {i + 1}?",
+				"options": ["A", "B", "C", "D"],
+				"correctAnswer": "ABCD"[i % 4],
+				"explanation": "Because.",
+				"difficulty": 2 + i % 3,
+				"topic": subject,
+			}
+			for i in range(5)
+		]
+	}
+
+
+class FakeModel:
+	"""Stands in for ``genai.GenerativeModel`` with a fixed response latency."""
+
+	def __init__(self, latency: float = 0.0, chunks: int = 8):
+		self.latency = latency
+		self.chunks = chunks
+		self.calls = 0
+		self._text = json.dumps(fake_quiz())
+
+	def _split(self) -> list[SimpleNamespace]:
+		size = -(-len(self._text) // self.chunks)
+		return [SimpleNamespace(text=self._text[i:i + size]) for i in range(0, len(self._text), size)]
+
+	def generate_content(self, prompt: str, stream: bool = False):
+		self.calls += 1
+		if not stream:
+			time.sleep(self.latency)
+			return SimpleNamespace(text=self._text)
+
+		def chunks():
+			for chunk in self._split():
+				time.sleep(self.latency / self.chunks)
+				yield chunk
+
+		return chunks()
+
+	async def generate_content_async(self, prompt: str, stream: bool = False):
+		self.calls += 1
+		if not stream:
+			await asyncio.sleep(self.latency)
+			return SimpleNamespace(text=self._text)
+
+		async def chunks():
+			for chunk in self._split():
+				await asyncio.sleep(self.latency / self.chunks)
+				yield chunk
+
+		return chunks()
+
+
+def install(firestore_latency: float = 0.0, model_latency: float = 0.0, auth_latency: float = 0.0, doc_write_interval: float = 0.0) -> SimpleNamespace:
+	"""Point the app's service singletons at fresh fakes and return them."""
+	import services.firebase_service as firebase_module
+	import utils.decorators as decorators
+	from services.ai_service import ai_service
+	from services.firebase_service import firebase_service
+	from services.rank_index import RankIndex
+	from utils.token_cache import token_cache
+	from utils.tracing import instrument
+
+	# Same span names as the real clients, so Server-Timing and /metrics line up
+	instrument(FakeDocument, {m: f"firestore.{m}" for m in ("get", "set", "update", "delete")})
+	instrument(FakeBatch, {"commit": "firestore.commit"})
+	instrument(FakeQuery, {"stream": "firestore.query", "get": "firestore.query"})
+	instrument(FakeFirestore, {"get_all": "firestore.get_all"})
+	instrument(FakeModel, {"generate_content": "gemini.generate_content", "generate_content_async": "gemini.generate_content"})
+
+	db = FakeFirestore(firestore_latency, doc_write_interval)
+	auth = FakeAuth(auth_latency)
+	model = FakeModel(model_latency)
+	firebase_service.db = db
+	firebase_service._initialized = True
+	firebase_service.rank_index = RankIndex()
+	firebase_service.leaderboard_cache.clear()
+	firebase_service.user_cache.clear()
+	firebase_module.fb_auth = auth
+	decorators.fb_auth = auth
+	token_cache.clear()
+	ai_service.model = model
+	return SimpleNamespace(db=db, auth=auth, model=model)
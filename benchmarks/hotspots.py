@@ -0,0 +1,99 @@
+"""Submit throughput when each Firestore document sustains a limited write rate.
+
+Concurrent workers store graded results for distinct users through
+``FirebaseService.store_quiz_result`` against the fake Firestore, which makes
+every commit wait until each document it writes has been idle for
+``--doc-write-ms`` (Firestore sustains about one write per second per
+document; the interval is scaled down so the run stays short). A document
+written by every submit caps throughput at one submit per interval; the run
+reports throughput against that ceiling and the documents written most, and
+fails when the hottest one takes more than the ``thresholds.json`` share of
+submits.
+
+    python -m benchmarks.hotspots --submits 400 --users 200 --concurrency 16
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import fakes
+from benchmarks.thresholds import check, load_thresholds
+from services.answer_key import AnswerKey
+
+
+KEY = AnswerKey(difficulty=3, indices=(0, 1, 2, 3, 0), digests=(b"\0\0\0\0",) * 5)
+
+
+def run(submits: int, users: int, concurrency: int, firestore_ms: float, doc_write_ms: float) -> tuple[dict, list]:
+	backend = fakes.install(firestore_latency=firestore_ms / 1000, doc_write_interval=doc_write_ms / 1000)
+	from services.firebase_service import firebase_service
+	from services.scoring_service import scoring_service
+
+	user_ids = [f"hot-{n}" for n in range(users)]
+	for uid in user_ids:
+		backend.db.collection("users").document(uid).set({"userId": uid, "username": uid, "totalPoints": 0})
+	# SDK imports are deferred to first use; keep them out of the timed loop
+	firebase_service.warm_up()
+	backend.db.writes.clear()
+	grading = scoring_service.grade(KEY, [0, 1, 2, 0, 0])
+	budget = itertools.count()
+
+	def worker(worker_id: int) -> None:
+		# Each worker cycles through its own slice of users
+		mine = user_ids[worker_id::concurrency] or user_ids
+		for n in itertools.count():
+			i = next(budget)
+			if i >= submits:
+				return
+			firebase_service.store_quiz_result(mine[n % len(mine)], f"quiz-{i}", grading, "python")
+
+	start = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=concurrency) as pool:
+		list(pool.map(worker, range(concurrency)))
+	elapsed = time.perf_counter() - start
+	firebase_service.leaderboard_touch.flush()
+
+	hottest = backend.db.writes.most_common(5)
+	ceiling = 1000 / doc_write_ms if doc_write_ms else float("inf")
+	result = {
+		"submits": submits,
+		"elapsed_s": elapsed,
+		"submits_per_s": submits / elapsed,
+		"single_doc_ceiling_per_s": ceiling,
+		"hottest_doc_share": hottest[0][1] / submits if hottest else 0.0,
+	}
+	return result, hottest
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--submits", type=int, default=400)
+	parser.add_argument("--users", type=int, default=200)
+	parser.add_argument("--concurrency", type=int, default=16)
+	parser.add_argument("--firestore-ms", type=float, default=5.0, help="Latency of each fake Firestore RPC.")
+	parser.add_argument("--doc-write-ms", type=float, default=20.0, help="Minimum interval between writes to one document.")
+	parser.add_argument("--no-thresholds", action="store_true", help="Report only; never fail the run.")
+	args = parser.parse_args(argv)
+
+	result, hottest = run(args.submits, args.users, args.concurrency, args.firestore_ms, args.doc_write_ms)
+	print(
+		f"{result['submits']} submits in {result['elapsed_s']:.2f}s -> {result['submits_per_s']:.1f}/s"
+		f" (one document caps at {result['single_doc_ceiling_per_s']:.1f}/s)"
+	)
+	print(f"{'hottest documents':<50} {'writes':>7} {'per submit':>11}")
+	for path, count in hottest:
+		print(f"{'/'.join(path):<50} {count:>7} {count / result['submits']:>11.3f}")
+	if args.no_thresholds:
+		return 0
+	failures = check(load_thresholds()["hotspots"], {"submit": result})
+	for failure in failures:
+		print("REGRESSION:", failure)
+	return 1 if failures else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
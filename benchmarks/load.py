@@ -0,0 +1,202 @@
+"""End-to-end load benchmark of ``create_app()`` against in-process fakes.
+
+Virtual users sign up, then mix quiz generation and submission with
+leaderboard, rank, stats and progress reads. Firestore, Auth and Gemini are replaced by
+the latency-injecting fakes in ``benchmarks.fakes``, so the run is offline and
+repeatable. Per endpoint it reports p50/p95/p99 latency, throughput and mean
+backend round trips, and fails when ``thresholds.json`` limits are exceeded.
+
+    python -m benchmarks.load --requests 2000 --concurrency 16
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import fakes
+from benchmarks.thresholds import check, load_thresholds, percentile
+
+
+# (label, weight) of the steady-state mix after signup
+MIX = [
+	("POST /api/quiz/generate", 2),
+	("POST /api/quiz/submit", 2),
+	("GET /api/leaderboard/daily", 3),
+	("GET /api/leaderboard/rank", 2),
+	("GET /api/user/stats", 2),
+	("GET /api/user/progress", 1),
+]
+SUBJECTS = ["python", "algorithms", "databases", "networking"]
+
+
+class Recorder:
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self.latencies: dict[str, list[float]] = defaultdict(list)
+		self.round_trips: dict[str, int] = defaultdict(int)
+		self.errors: dict[str, int] = defaultdict(int)
+
+	def add(self, label: str, seconds: float, round_trips: int, ok: bool) -> None:
+		with self._lock:
+			self.latencies[label].append(seconds)
+			self.round_trips[label] += round_trips
+			if not ok:
+				self.errors[label] += 1
+
+	def summary(self, elapsed: float) -> dict[str, dict]:
+		rows = {}
+		for label, values in sorted(self.latencies.items()):
+			values = sorted(values)
+			rows[label] = {
+				"count": len(values),
+				"errors": self.errors[label],
+				"p50_ms": percentile(values, 50) * 1000,
+				"p95_ms": percentile(values, 95) * 1000,
+				"p99_ms": percentile(values, 99) * 1000,
+				"rps": len(values) / elapsed,
+				"round_trips": self.round_trips[label] / len(values),
+			}
+		return rows
+
+
+class VirtualUser:
+
+	def __init__(self, app, backend, recorder: Recorder, rng: random.Random):
+		self.client = app.test_client()
+		self.backend = backend
+		self.recorder = recorder
+		self.rng = rng
+		self.headers: dict[str, str] = {}
+		self.pending_quiz: dict | None = None
+
+	def _call(self, label: str, method: str, path: str, **kwargs):
+		self.backend.db.round_trips.start()
+		start = time.perf_counter()
+		resp = self.client.open(path, method=method, headers=self.headers, **kwargs)
+		elapsed = time.perf_counter() - start
+		self.recorder.add(label, elapsed, self.backend.db.round_trips.stop(), resp.status_code < 400)
+		return resp
+
+	def signup(self, n: int) -> None:
+		resp = self._call("POST /api/auth/signup", "POST", "/api/auth/signup", json={
+			"email": f"bench{n}-{self.rng.random():.8f}@example.com",
+			"password": "secret123",
+			"username": f"bench{n}",
+		})
+		uid = (resp.get_json() or {}).get("userId", "")
+		# The client would exchange the custom token; the fake accepts fake-<uid> directly
+		self.headers = {"Authorization": f"Bearer fake-{uid}"}
+
+	def step(self) -> None:
+		label = self.rng.choices([m[0] for m in MIX], weights=[m[1] for m in MIX])[0]
+		if label == "POST /api/quiz/submit" and self.pending_quiz is None:
+			label = "POST /api/quiz/generate"
+		if label == "POST /api/quiz/generate":
+			resp = self._call(label, "POST", "/api/quiz/generate", json={
+				"subject": self.rng.choice(SUBJECTS),
+				"difficulty": self.rng.randint(1, 5),
+				"lastScore": self.rng.choice([40, 70, 90]),
+			})
+			self.pending_quiz = resp.get_json() if resp.status_code == 201 else None
+		elif label == "POST /api/quiz/submit":
+			quiz, self.pending_quiz = self.pending_quiz, None
+			answers = [
+				q["correctAnswer"] if self.rng.random() < 0.7 else q["options"][0]
+				for q in quiz.get("questions", [])
+			]
+			self._call(label, "POST", "/api/quiz/submit", json={"quizId": quiz["quizId"], "answers": answers})
+		else:
+			method, path = label.split(" ", 1)
+			self._call(label, method, path)
+
+
+def run(requests: int, concurrency: int, users: int, firestore_ms: float, model_ms: float, seed: int, write_behind: bool = False) -> tuple[dict, float, dict]:
+	backend = fakes.install(firestore_latency=firestore_ms / 1000, model_latency=model_ms / 1000)
+	from config import Config
+	from app import create_app
+	from services.ai_service import ai_service
+	from utils.admission import AdmissionControl
+
+	if write_behind:
+		Config.SUBMIT_WRITE_BEHIND = True
+		Config.SUBMIT_JOURNAL_PATH = os.path.join(tempfile.mkdtemp(prefix="webnova-bench-"), "submissions.db")
+
+	# Virtual users replay whole sessions in seconds, far above any per-user
+	# rate; keep the concurrency bound but not the token buckets
+	ai_service.admission = AdmissionControl(
+		"Quiz generation",
+		max_active=Config.GENERATE_MAX_ACTIVE,
+		max_queued=Config.GENERATE_MAX_QUEUED,
+		queue_timeout=Config.GENERATE_QUEUE_TIMEOUT_SECONDS,
+	)
+	app = create_app()
+	# Like a readiness probe before traffic: deferred SDK imports stay out of the timings
+	app.test_client().get("/ready")
+	recorder = Recorder()
+	budget = itertools.count()
+	per_worker = max(1, -(-users // concurrency))
+
+	def worker(worker_id: int) -> None:
+		# Each worker owns its users, so a session is never driven by two threads
+		rng = random.Random(seed + worker_id)
+		sessions: list[VirtualUser] = []
+		while next(budget) < requests:
+			if len(sessions) < per_worker:
+				user = VirtualUser(app, backend, recorder, rng)
+				user.signup(worker_id * per_worker + len(sessions))
+				sessions.append(user)
+			else:
+				rng.choice(sessions).step()
+
+	start = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=concurrency) as pool:
+		list(pool.map(worker, range(concurrency)))
+	elapsed = time.perf_counter() - start
+	return recorder.summary(elapsed), elapsed, dict(backend.db.round_trips.totals)
+
+
+def report(rows: dict, elapsed: float, totals: dict) -> None:
+	count = sum(r["count"] for r in rows.values())
+	print(f"{count} requests in {elapsed:.2f}s -> {count / elapsed:.1f} req/s")
+	print(f"{'endpoint':<30} {'n':>6} {'err':>4} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'rps':>8} {'rt/req':>7}")
+	for label, r in rows.items():
+		print(
+			f"{label:<30} {r['count']:>6} {r['errors']:>4} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}"
+			f" {r['p99_ms']:>8.1f} {r['rps']:>8.1f} {r['round_trips']:>7.2f}"
+		)
+	print("backend calls:", ", ".join(f"{k}={v}" for k, v in sorted(totals.items())))
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--requests", type=int, default=2000)
+	parser.add_argument("--concurrency", type=int, default=16)
+	parser.add_argument("--users", type=int, default=50, help="Virtual users, split evenly across workers.")
+	parser.add_argument("--firestore-ms", type=float, default=5.0, help="Latency of each fake Firestore RPC.")
+	parser.add_argument("--model-ms", type=float, default=200.0, help="Latency of each fake model call.")
+	parser.add_argument("--seed", type=int, default=7)
+	parser.add_argument("--write-behind", action="store_true", help="Journal submits and flush them in the background.")
+	parser.add_argument("--no-thresholds", action="store_true", help="Report only; never fail the run.")
+	args = parser.parse_args(argv)
+
+	rows, elapsed, totals = run(args.requests, args.concurrency, args.users, args.firestore_ms, args.model_ms, args.seed, args.write_behind)
+	report(rows, elapsed, totals)
+	if args.no_thresholds:
+		return 0
+	failures = check(load_thresholds()["load"], rows)
+	for failure in failures:
+		print("REGRESSION:", failure)
+	return 1 if failures else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,68 @@
+"""Microbenchmarks for the CPU-bound quiz paths.
+
+Reports the best-of-``--repeat`` cost per call in microseconds and fails when
+a path is slower than its limit in ``thresholds.json``.
+
+    python -m benchmarks.micro
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+
+from benchmarks.fakes import fake_quiz
+from benchmarks.thresholds import check, load_thresholds
+
+
+def cases() -> dict:
+	from services.ai_service import ai_service
+	from services.answer_key import AnswerKey
+	from services.scoring_service import scoring_service
+
+	quiz = {**fake_quiz(), "difficulty": 3}
+	answers = [q["correctAnswer"] for q in quiz["questions"][:3]] + ["A", "B"]
+	text = json.dumps(fake_quiz())
+	# Model output wrapped in a markdown fence forces the salvage path
+	fenced = f"```json\n{text}\n```"
+	parsed = json.loads(text)
+	packed = AnswerKey.from_questions(quiz["questions"], 3).pack()
+	return {
+		"grade_quiz": lambda: scoring_service.grade_quiz(quiz, answers),
+		# What submit does: unpack the stored key, grade against it
+		"grade_answer_key": lambda: scoring_service.grade(AnswerKey.unpack(packed), answers),
+		"parse_json": lambda: ai_service._parse_json(text),
+		"parse_json_fenced": lambda: ai_service._parse_json(fenced),
+		"validate": lambda: ai_service._validate(parsed),
+	}
+
+
+def run(number: int, repeat: int) -> dict[str, dict]:
+	results = {}
+	for name, fn in cases().items():
+		best = min(timeit.repeat(fn, number=number, repeat=repeat))
+		results[name] = {"us_per_call": best / number * 1e6}
+	return results
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--number", type=int, default=2000, help="Calls per timing sample.")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--no-thresholds", action="store_true", help="Report only; never fail the run.")
+	args = parser.parse_args(argv)
+
+	results = run(args.number, args.repeat)
+	for name, r in results.items():
+		print(f"{name:<20} {r['us_per_call']:>9.2f} us/call")
+	if args.no_thresholds:
+		return 0
+	failures = check(load_thresholds()["micro"], results)
+	for failure in failures:
+		print("REGRESSION:", failure)
+	return 1 if failures else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,120 @@
+"""Response encoding cost and bytes on the wire per endpoint.
+
+Each endpoint's payload is built by the services against the offline fakes,
+with stored timestamps as a ``datetime`` subclass the way Firestore returns
+them. ``encode`` compares the stdlib provider (what ``jsonify`` used) with
+the orjson one, best of ``--repeat``; ``bytes`` fetches the endpoint through
+``create_app()`` as identity, gzip and (when installed) brotli. Fails when
+the ``thresholds.json`` limits on orjson time or compressed size are passed.
+
+    python -m benchmarks.payloads
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from benchmarks import fakes
+from benchmarks.thresholds import check, load_thresholds
+
+
+class Timestamp(datetime):
+	"""Stands in for Firestore's DatetimeWithNanoseconds."""
+
+
+def _seed(backend, uid: str) -> str:
+	from services.firebase_service import firebase_service
+
+	now = Timestamp.now().astimezone()
+	backend.db.collection("users").document(uid).set({
+		"userId": uid, "username": uid, "totalPoints": 1200, "currentStreak": 4,
+		"createdAt": now, "lastQuizDate": now,
+	})
+	for n in range(30):
+		backend.db.collection("leaderboard").document("all-time").collection("users").document(f"p{n}").set(
+			{"userId": f"p{n}", "username": f"player{n}", "points": 1000 - n, "streak": n % 7}
+		)
+	items = backend.db.collection("progress").document(uid).collection("items")
+	for n in range(100):
+		items.document(f"quiz-{n:03d}").set({
+			"score": 60 + n % 40, "pointsEarned": 20 + n % 15, "correctCount": 3 + n % 3, "difficulty": 2 + n % 3,
+			"streakIncremented": n % 2 == 0, "subject": "python", "answers": [n % 4, 1, 2, 3, 0],
+			"completedAt": now - timedelta(hours=n),
+		})
+	quiz = firebase_service.save_quiz(uid, fakes.fake_quiz(), {"subject": "python", "difficulty": 3})
+	return quiz["id"]
+
+
+def run(repeat: int, number: int) -> dict[str, dict]:
+	backend = fakes.install()
+	from flask.json.provider import DefaultJSONProvider
+	from app import create_app
+	from services.firebase_service import firebase_service
+	from utils.compression import supported_encodings
+	from utils.json_provider import OrjsonProvider
+
+	uid = "payload-user"
+	quiz_id = _seed(backend, uid)
+	saved = firebase_service.get_quiz(quiz_id)
+	endpoints = {
+		"GET /api/user/me": ("/api/user/me", firebase_service.get_user(uid)),
+		"GET /api/quiz/<id>": (f"/api/quiz/{quiz_id}", saved),
+		"GET /api/leaderboard/all-time": ("/api/leaderboard/all-time", firebase_service.get_leaderboard("all-time")),
+		"GET /api/user/progress": ("/api/user/progress", firebase_service.get_user_progress(uid, 20)),
+		"GET /api/user/progress?limit=100&fields=full": (
+			"/api/user/progress?limit=100&fields=full", firebase_service.get_user_progress(uid, 100, None, True),
+		),
+	}
+
+	app = create_app()
+	client = app.test_client()
+	client.get("/ready")
+	stdlib, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+	results = {}
+	for label, (path, payload) in endpoints.items():
+		row = {}
+		for name, provider in (("stdlib", stdlib), ("orjson", fast)):
+			best = min(timeit.repeat(lambda: provider.dumps(payload), number=number, repeat=repeat))
+			row[f"{name}_us"] = best / number * 1e6
+		headers = {"Authorization": f"Bearer fake-{uid}"}
+		sizes = {}
+		for encoding in ["identity"] + supported_encodings():
+			resp = client.get(path, headers={**headers, "Accept-Encoding": encoding})
+			if resp.status_code != 200:
+				raise SystemExit(f"{label} returned {resp.status_code}")
+			sizes[encoding] = len(resp.get_data())
+		row["identity_bytes"] = sizes["identity"]
+		row["gzip_bytes"] = sizes["gzip"]
+		row["br_bytes"] = sizes.get("br")
+		row["wire_ratio"] = min(sizes.values()) / sizes["identity"]
+		results[label] = row
+	return results
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--number", type=int, default=200, help="Encodes per timing sample.")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--no-thresholds", action="store_true", help="Report only; never fail the run.")
+	args = parser.parse_args(argv)
+
+	results = run(args.repeat, args.number)
+	print(f"{'endpoint':<45} {'stdlib us':>10} {'orjson us':>10} {'bytes':>7} {'gzip':>7} {'br':>7} {'wire':>6}")
+	for label, r in results.items():
+		br = "-" if r["br_bytes"] is None else str(r["br_bytes"])
+		print(
+			f"{label:<45} {r['stdlib_us']:>10.1f} {r['orjson_us']:>10.1f} {r['identity_bytes']:>7}"
+			f" {r['gzip_bytes']:>7} {br:>7} {r['wire_ratio']:>6.2f}"
+		)
+	if args.no_thresholds:
+		return 0
+	failures = check(load_thresholds()["payloads"], results)
+	for failure in failures:
+		print("REGRESSION:", failure)
+	return 1 if failures else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,129 @@
+"""Cheap-endpoint latency while quiz generation is saturated.
+
+Requests arrive open-loop at fixed rates and are served by a fixed pool of
+``--workers`` threads, as a gunicorn worker's threads would serve them:
+``POST /api/quiz/generate`` against a slow fake model (quiz pool off, every
+subject distinct so nothing is shared), mixed with ``GET /api/user/stats``
+and ``GET /api/leaderboard/daily``. Latency counts from arrival, so time
+spent waiting for a free thread is included. The run is repeated without
+admission control for comparison; with it, cheap p95 and the time to refuse
+a generate are checked against ``thresholds.json``.
+
+    python -m benchmarks.saturation --seconds 3 --generate-rps 40 --workers 16
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import fakes
+from benchmarks.thresholds import check, load_thresholds, percentile
+
+
+CHEAP = ["GET /api/user/stats", "GET /api/leaderboard/daily"]
+
+
+def _schedule(seconds: float, generate_rps: float, cheap_rps: float) -> list[tuple[float, str]]:
+	arrivals = [(i / generate_rps, "POST /api/quiz/generate") for i in range(int(seconds * generate_rps))]
+	arrivals += [(i / cheap_rps, CHEAP[i % len(CHEAP)]) for i in range(int(seconds * cheap_rps))]
+	return sorted(arrivals)
+
+
+def run(seconds: float, generate_rps: float, cheap_rps: float, workers: int, model_ms: float, admission: bool) -> dict[str, dict]:
+	backend = fakes.install(firestore_latency=0.005, model_latency=model_ms / 1000)
+	from config import Config
+	from app import create_app
+	from services.ai_service import ai_service
+	from utils.admission import AdmissionControl
+
+	Config.QUIZ_POOL_ENABLED = False
+	saved = ai_service.admission
+	if not admission:
+		ai_service.admission = AdmissionControl("Quiz generation", max_active=10 ** 6)
+	app = create_app()
+	client = app.test_client()
+	client.get("/ready")
+	users = [f"sat-{n}" for n in range(200)]
+	for uid in users:
+		backend.db.collection("users").document(uid).set({"userId": uid, "username": uid, "totalPoints": 0, "streak": 0})
+
+	lock = threading.Lock()
+	latencies: dict[str, list[float]] = defaultdict(list)
+	counts: dict[str, int] = defaultdict(int)
+	seq = itertools.count()
+
+	def serve(arrived: float, label: str) -> None:
+		n = next(seq)
+		method, path = label.split(" ", 1)
+		body = {"subject": f"topic-{n}", "difficulty": 3, "lastScore": 70} if method == "POST" else None
+		resp = client.open(path, method=method, json=body, headers={"Authorization": f"Bearer fake-{users[n % len(users)]}"})
+		elapsed = time.perf_counter() - arrived
+		key = label
+		if label.startswith("POST") and resp.status_code in (429, 503):
+			key = "POST /api/quiz/generate (refused)"
+		with lock:
+			latencies[key].append(elapsed)
+			counts[f"{key} {resp.status_code}"] += 1
+
+	try:
+		with ThreadPoolExecutor(max_workers=workers) as pool:
+			start = time.perf_counter()
+			for offset, label in _schedule(seconds, generate_rps, cheap_rps):
+				delay = start + offset - time.perf_counter()
+				if delay > 0:
+					time.sleep(delay)
+				pool.submit(serve, time.perf_counter(), label)
+	finally:
+		ai_service.admission = saved
+		Config.QUIZ_POOL_ENABLED = True
+
+	rows = {}
+	for label, values in sorted(latencies.items()):
+		values.sort()
+		rows[label] = {"count": len(values), "p50_ms": percentile(values, 50) * 1000, "p95_ms": percentile(values, 95) * 1000}
+	cheap = sorted(v for label in CHEAP for v in latencies[label])
+	if cheap:
+		rows["cheap endpoints"] = {"count": len(cheap), "p50_ms": percentile(cheap, 50) * 1000, "p95_ms": percentile(cheap, 95) * 1000}
+	rows["statuses"] = dict(sorted(counts.items()))
+	return rows
+
+
+def report(title: str, rows: dict) -> None:
+	print(title)
+	print(f"{'endpoint':<40} {'n':>6} {'p50ms':>8} {'p95ms':>8}")
+	for label, r in rows.items():
+		if label != "statuses":
+			print(f"{label:<40} {r['count']:>6} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}")
+	print("statuses:", ", ".join(f"{k}={v}" for k, v in rows["statuses"].items()))
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--seconds", type=float, default=3.0)
+	parser.add_argument("--generate-rps", type=float, default=40.0)
+	parser.add_argument("--cheap-rps", type=float, default=60.0)
+	parser.add_argument("--workers", type=int, default=16, help="Server threads shared by all requests.")
+	parser.add_argument("--model-ms", type=float, default=500.0, help="Latency of each fake model call.")
+	parser.add_argument("--no-thresholds", action="store_true", help="Report only; never fail the run.")
+	args = parser.parse_args(argv)
+
+	params = (args.seconds, args.generate_rps, args.cheap_rps, args.workers, args.model_ms)
+	report("without admission control", run(*params, admission=False))
+	print()
+	rows = run(*params, admission=True)
+	report("with admission control", rows)
+	if args.no_thresholds:
+		return 0
+	failures = check(load_thresholds()["saturation"], rows)
+	for failure in failures:
+		print("REGRESSION:", failure)
+	return 1 if failures else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,147 @@
+"""How ``FirebaseService`` paths scale with the size of the dataset.
+
+For each ``--users`` size a seeded ``benchmarks.dataset`` is bulk-loaded into
+the fake Firestore (no latency, so only our own work is timed). Request paths
+are timed for the first ``--sample`` users, the same users at every size,
+each call on cold service caches (the rank index stays built once built).
+The whole-dataset paths (rank index build, dry-run re-score, aggregate
+reconcile, streak reset) run once. ``growth`` is the exponent of time
+against size between the smallest and largest run: ~0 means the path does
+not depend on how many users exist, ~1 that it is linear. Fails when the
+``thresholds.json`` limits on growth or round trips are passed.
+
+    python -m benchmarks.scale --users 1000,10000,100000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import math
+import sys
+import time
+from datetime import timedelta
+
+from benchmarks import dataset, fakes
+from benchmarks.thresholds import check, load_thresholds
+
+
+def _clear(service) -> None:
+	service.user_cache.clear()
+	service.leaderboard_cache.clear()
+	service.friends_cache.clear()
+
+
+def _per_call(backend, service, users: list[str], call, repeat: int) -> tuple[float, float]:
+	"""Best mean milliseconds per call over ``repeat`` passes, and round trips per call."""
+	# Settle the garbage of earlier steps (a replaced index) outside the timing
+	gc.collect()
+	best = math.inf
+	trips = 0
+	for _ in range(repeat):
+		elapsed = 0.0
+		trips = 0
+		for uid in users:
+			_clear(service)
+			backend.db.round_trips.start()
+			start = time.perf_counter()
+			call(uid)
+			elapsed += time.perf_counter() - start
+			trips += backend.db.round_trips.stop()
+		best = min(best, elapsed / len(users))
+	return best * 1000, trips / len(users)
+
+
+def _once(backend, call) -> tuple[float, float]:
+	gc.collect()
+	backend.db.round_trips.start()
+	start = time.perf_counter()
+	call()
+	elapsed = time.perf_counter() - start
+	return elapsed * 1000, backend.db.round_trips.stop()
+
+
+def run_size(spec: dataset.DatasetSpec, sample: int, repeat: int) -> dict[str, dict]:
+	backend = fakes.install()
+	from services.firebase_service import firebase_service as service
+
+	start = time.perf_counter()
+	docs = dataset.load_fake(backend.db, dataset.generate(spec))
+	rows = {"load": {"ms": (time.perf_counter() - start) * 1000, "round_trips": 0, "docs": docs}}
+	service.warm_up()
+	users = [dataset.user_id(n) for n in range(min(sample, spec.users))]
+
+	# warm_up built the rank index; time a full rebuild on its own
+	ms, trips = _once(backend, service._rebuild_rank_index)
+	rows["rank index build"] = {"ms": ms, "round_trips": trips}
+	requests = {
+		"get_user": service.get_user,
+		"get_user_stats": service.get_user_stats,
+		"get_user_progress": service.get_user_progress,
+		"get_friends_leaderboard": service.get_friends_leaderboard,
+		"get_user_rank": service.get_user_rank,
+		"get_rank_window": service.get_rank_window,
+		"get_leaderboard all-time": lambda uid: service.get_leaderboard("all-time"),
+		"get_leaderboard daily": lambda uid: service.get_leaderboard("daily"),
+	}
+	for label, call in requests.items():
+		ms, trips = _per_call(backend, service, users, call, repeat)
+		rows[label] = {"ms": ms, "round_trips": trips}
+
+	now = spec.now
+	cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0) if now else None
+	jobs = {
+		"rescore_all (dry run)": lambda: service.rescore_all(dry_run=True),
+		"reconcile_all_aggregates": service.reconcile_all_aggregates,
+		# Last: it resets streaks, which the other paths read
+		"daily_streak_check": lambda: service.daily_streak_check(cutoff),
+	}
+	for label, call in jobs.items():
+		ms, trips = _once(backend, call)
+		rows[label] = {"ms": ms, "round_trips": trips}
+	return rows
+
+
+def run(sizes: list[int], seed: int, sample: int, repeat: int) -> tuple[dict[int, dict], dict[str, dict]]:
+	from utils.helpers import utc_now
+
+	# One reference time, so every size has the same sampled users
+	now = utc_now() - timedelta(minutes=1)
+	by_size = {n: run_size(dataset.DatasetSpec(users=n, seed=seed, now=now), sample, repeat) for n in sizes}
+	small, large = min(sizes), max(sizes)
+	results = {}
+	for label, row in by_size[large].items():
+		growth = None
+		if large > small and by_size[small][label]["ms"] > 0:
+			growth = math.log(row["ms"] / by_size[small][label]["ms"]) / math.log(large / small)
+		results[label] = {"growth": growth, "round_trips": row["round_trips"]}
+	return by_size, results
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--users", default="1000,10000", help="Comma-separated dataset sizes.")
+	parser.add_argument("--seed", type=int, default=dataset.DatasetSpec.seed)
+	parser.add_argument("--sample", type=int, default=100, help="Users whose request paths are timed.")
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--no-thresholds", action="store_true", help="Report only; never fail the run.")
+	args = parser.parse_args(argv)
+
+	sizes = sorted({int(n) for n in args.users.split(",")})
+	by_size, results = run(sizes, args.seed, args.sample, args.repeat)
+	header = "".join(f" {f'{n:,} users ms':>17}" for n in sizes)
+	print(f"{'path':<28}{header} {'trips':>7} {'growth':>7}")
+	for label, r in results.items():
+		times = "".join(f" {by_size[n][label]['ms']:>17.3f}" for n in sizes)
+		growth = "-" if r["growth"] is None else f"{r['growth']:.2f}"
+		print(f"{label:<28}{times} {r['round_trips']:>7.1f} {growth:>7}")
+	print("documents:", ", ".join(f"{n:,} users={by_size[n]['load']['docs']:,}" for n in sizes))
+	if args.no_thresholds:
+		return 0
+	failures = check(load_thresholds()["scale"], results)
+	for failure in failures:
+		print("REGRESSION:", failure)
+	return 1 if failures else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
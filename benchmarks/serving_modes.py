@@ -0,0 +1,153 @@
+"""Throughput of the sync (WSGI) and async (ASGI) serving modes under mixed load.
+
+Firestore and Gemini are replaced by fixed-latency stand-ins: a slow
+``/api/quiz/generate`` (model call + quiz write) and a fast
+``/api/leaderboard/daily`` (one Firestore query). The sync app is driven by a
+pool of ``--workers`` threads, mirroring gunicorn sync workers; the async app
+serves every request from one event loop, as a single hypercorn worker would.
+Requests go through each framework's in-process test client, so HTTP parsing
+and sockets are not measured.
+
+    python -m benchmarks.serving_modes --requests 400 --slow-ratio 0.1
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+
+SLOW_PATH = "/api/quiz/generate"
+FAST_PATH = "/api/leaderboard/daily"
+QUIZ = {"questions": []}
+
+
+def _install_fakes(slow: float, fast: float) -> None:
+	from services.ai_service import ai_service
+	from services.async_firebase_service import async_firebase_service
+	from services.firebase_service import firebase_service
+
+	def generate_quiz(subject, difficulty, last_score):
+		time.sleep(slow)
+		return QUIZ
+
+	async def generate_quiz_async(subject, difficulty, last_score):
+		await asyncio.sleep(slow)
+		return QUIZ
+
+	def get_leaderboard(period):
+		time.sleep(fast)
+		return []
+
+	async def get_leaderboard_async(period):
+		await asyncio.sleep(fast)
+		return []
+
+	def save_quiz(user_id, quiz, meta):
+		time.sleep(fast)
+		return {"id": "bench-quiz", "data": {**quiz, **meta}}
+
+	async def save_quiz_async(user_id, quiz, meta):
+		await asyncio.sleep(fast)
+		return {"id": "bench-quiz", "data": {**quiz, **meta}}
+
+	ai_service.generate_quiz = generate_quiz
+	ai_service.generate_quiz_async = generate_quiz_async
+	firebase_service.get_leaderboard = get_leaderboard
+	firebase_service.save_quiz = save_quiz
+	async_firebase_service.get_leaderboard = get_leaderboard_async
+	async_firebase_service.save_quiz = save_quiz_async
+
+
+def _workload(total: int, slow_ratio: float) -> list[str]:
+	# Deterministic interleaving so both modes see the same request order
+	every = max(1, round(1 / slow_ratio)) if slow_ratio > 0 else 0
+	return [SLOW_PATH if every and i % every == 0 else FAST_PATH for i in range(total)]
+
+
+_HEADERS = {"Authorization": "Demo uid-bench"}
+_BODY = {"subject": "python", "difficulty": 3, "lastScore": 70}
+
+
+def run_sync(paths: list[str], workers: int) -> dict[str, list[float]]:
+	from app import create_app
+
+	app = create_app()
+	latencies: dict[str, list[float]] = {SLOW_PATH: [], FAST_PATH: []}
+
+	def one(path: str) -> None:
+		client = app.test_client()
+		start = time.perf_counter()
+		if path == SLOW_PATH:
+			client.post(path, json=_BODY, headers=_HEADERS)
+		else:
+			client.get(path)
+		latencies[path].append(time.perf_counter() - start)
+
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		list(pool.map(one, paths))
+	return latencies
+
+
+async def run_async(paths: list[str], concurrency: int) -> dict[str, list[float]]:
+	from asgi import create_asgi_app
+
+	app = create_asgi_app()
+	client = app.test_client()
+	latencies: dict[str, list[float]] = {SLOW_PATH: [], FAST_PATH: []}
+	gate = asyncio.Semaphore(concurrency)
+
+	async def one(path: str) -> None:
+		async with gate:
+			start = time.perf_counter()
+			if path == SLOW_PATH:
+				await client.post(path, json=_BODY, headers=_HEADERS)
+			else:
+				await client.get(path)
+			latencies[path].append(time.perf_counter() - start)
+
+	await asyncio.gather(*(one(p) for p in paths))
+	return latencies
+
+
+def _report(mode: str, elapsed: float, latencies: dict[str, list[float]]) -> None:
+	total = sum(len(v) for v in latencies.values())
+	print(f"{mode:<6} {total} requests in {elapsed:.2f}s -> {total / elapsed:.1f} req/s")
+	for path, values in latencies.items():
+		if not values:
+			continue
+		values = sorted(values)
+		p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+		print(f"  {path:<26} n={len(values):<5} p50={statistics.median(values) * 1000:7.1f}ms p95={p95 * 1000:7.1f}ms")
+
+
+def main(argv: list[str] | None = None) -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--requests", type=int, default=400)
+	parser.add_argument("--slow-ratio", type=float, default=0.1, help="Share of requests hitting the slow endpoint.")
+	parser.add_argument("--slow-ms", type=float, default=1500, help="Simulated Gemini latency.")
+	parser.add_argument("--fast-ms", type=float, default=20, help="Simulated Firestore latency.")
+	parser.add_argument("--workers", type=int, default=8, help="Sync worker threads (gunicorn -w).")
+	parser.add_argument("--concurrency", type=int, default=400, help="In-flight requests for the async mode.")
+	args = parser.parse_args(argv)
+
+	# Demo auth ("Demo <uid>") keeps token verification out of the measurement
+	Config.DEMO_MODE = True
+	_install_fakes(args.slow_ms / 1000, args.fast_ms / 1000)
+	paths = _workload(args.requests, args.slow_ratio)
+
+	start = time.perf_counter()
+	latencies = run_sync(paths, args.workers)
+	_report("sync", time.perf_counter() - start, latencies)
+
+	start = time.perf_counter()
+	latencies = asyncio.run(run_async(paths, args.concurrency))
+	_report("async", time.perf_counter() - start, latencies)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,37 @@
+"""Regression limits shared by the load and micro benchmarks.
+
+Round-trip limits are exact budgets; latency limits assume the default fake
+latencies and leave several times the observed headroom for slow machines.
+"""
+from __future__ import annotations
+
+import json
+import os
+
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "thresholds.json")
+
+
+def load_thresholds(path: str = THRESHOLDS_PATH) -> dict:
+	with open(path, encoding="utf-8") as fh:
+		return json.load(fh)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+	if not sorted_values:
+		return 0.0
+	index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+	return sorted_values[index]
+
+
+def check(limits: dict[str, dict[str, float]], results: dict[str, dict[str, float]]) -> list[str]:
+	"""Return one message per metric above its limit (``{name: {metric: max}}``)."""
+	failures = []
+	for name, metrics in limits.items():
+		if name not in results:
+			continue
+		for metric, limit in metrics.items():
+			value = results[name].get(metric)
+			if value is not None and value > limit:
+				failures.append(f"{name} {metric}={value:.2f} exceeds {limit}")
+	return failures
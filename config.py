@@ -15,6 +15,106 @@ class Config:
 	GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 	DEMO_MODE = os.getenv("DEMO_MODE", "False").lower() == "true"
 
+	# Seconds before the in-memory rank index is rebuilt from Firestore (0 = never)
+	RANK_INDEX_REFRESH_SECONDS = int(os.getenv("RANK_INDEX_REFRESH_SECONDS", "300"))
+
+	# Verified ID-token cache (entries never outlive the token's exp)
+	TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+	TOKEN_CACHE_MAX_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_MAX_TTL_SECONDS", "300"))
+
+	# Pre-generated quizzes per (subject, difficulty band), refilled in the background
+	QUIZ_POOL_ENABLED = os.getenv("QUIZ_POOL_ENABLED", "True").lower() == "true"
+	QUIZ_POOL_CAPACITY = int(os.getenv("QUIZ_POOL_CAPACITY", "3"))
+	QUIZ_POOL_LOW_WATER = int(os.getenv("QUIZ_POOL_LOW_WATER", "1"))
+	QUIZ_POOL_MAX_AGE_SECONDS = int(os.getenv("QUIZ_POOL_MAX_AGE_SECONDS", "3600"))
+	QUIZ_POOL_MAX_KEYS = int(os.getenv("QUIZ_POOL_MAX_KEYS", "200"))
+	# A key is stocked only after this many misses within the window
+	QUIZ_POOL_REFILL_MIN_MISSES = int(os.getenv("QUIZ_POOL_REFILL_MIN_MISSES", "2"))
+	QUIZ_POOL_DEMAND_WINDOW_SECONDS = float(os.getenv("QUIZ_POOL_DEMAND_WINDOW_SECONDS", "600"))
+
+	# Public leaderboard responses: in-process cache TTL and browser/CDN max-age
+	LEADERBOARD_CACHE_TTL_SECONDS = int(os.getenv("LEADERBOARD_CACHE_TTL_SECONDS", "30"))
+
+	# users/{uid} documents: read at most once per request, then cached per
+	# process; local writes invalidate, other processes' show after the TTL
+	USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "5"))
+	USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+	# Friends leaderboard: per-user cached boards and the friend list cap
+	FRIENDS_CACHE_TTL_SECONDS = int(os.getenv("FRIENDS_CACHE_TTL_SECONDS", "60"))
+	FRIENDS_CACHE_MAX_ENTRIES = int(os.getenv("FRIENDS_CACHE_MAX_ENTRIES", "5000"))
+	FRIENDS_MAX = int(os.getenv("FRIENDS_MAX", "500"))
+
+	# Daily streak reset: users read per page and parallel time-slice shards
+	STREAK_RESET_PAGE_SIZE = int(os.getenv("STREAK_RESET_PAGE_SIZE", "500"))
+	STREAK_RESET_SHARDS = int(os.getenv("STREAK_RESET_SHARDS", "4"))
+	# A run holds the checkpoint this long past its last page; a second run is refused meanwhile
+	STREAK_RESET_LEASE_SECONDS = float(os.getenv("STREAK_RESET_LEASE_SECONDS", "300"))
+	# POST /api/streak/daily-check, GET /stats and GET /metrics need this in
+	# X-Scheduler-Secret; empty disables them
+	STREAK_JOB_SECRET = os.getenv("STREAK_JOB_SECRET", "")
+
+	# updatedAt of the shared leaderboard/{period} docs is written in the
+	# background at most once per interval per process, never by a submit;
+	# keep workers / interval under Firestore's ~1 write/s per document
+	LEADERBOARD_TOUCH_SECONDS = float(os.getenv("LEADERBOARD_TOUCH_SECONDS", "10"))
+	# Daily/weekly buckets kept (current one included); older ones are pruned
+	LEADERBOARD_KEEP_DAYS = int(os.getenv("LEADERBOARD_KEEP_DAYS", "7"))
+	LEADERBOARD_KEEP_WEEKS = int(os.getenv("LEADERBOARD_KEEP_WEEKS", "4"))
+
+	# /api/user/progress page size (default and cap) and the NDJSON export's read page
+	PROGRESS_PAGE_SIZE = int(os.getenv("PROGRESS_PAGE_SIZE", "20"))
+	PROGRESS_MAX_PAGE_SIZE = int(os.getenv("PROGRESS_MAX_PAGE_SIZE", "100"))
+	PROGRESS_EXPORT_PAGE_SIZE = int(os.getenv("PROGRESS_EXPORT_PAGE_SIZE", "500"))
+
+	# Bulk re-scoring after a ScoringRules change: progress items read per page
+	RESCORE_PAGE_SIZE = int(os.getenv("RESCORE_PAGE_SIZE", "1000"))
+
+	# Write-behind submits: graded results are journaled locally (SQLite) and
+	# flushed to Firestore in the background, at most 50 per batch (6 writes each)
+	SUBMIT_WRITE_BEHIND = os.getenv("SUBMIT_WRITE_BEHIND", "False").lower() == "true"
+	SUBMIT_JOURNAL_PATH = os.getenv("SUBMIT_JOURNAL_PATH", "./data/submissions.db")
+	SUBMIT_JOURNAL_BATCH = min(50, int(os.getenv("SUBMIT_JOURNAL_BATCH", "50")))
+	SUBMIT_JOURNAL_FLUSH_SECONDS = float(os.getenv("SUBMIT_JOURNAL_FLUSH_SECONDS", "0.5"))
+	# Failed flushes back off exponentially; after this many an entry is dead-lettered
+	SUBMIT_JOURNAL_MAX_ATTEMPTS = int(os.getenv("SUBMIT_JOURNAL_MAX_ATTEMPTS", "10"))
+
+	# Outbound calls (identitytoolkit, Gemini): keep-alive pools, retries and breakers
+	HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "4"))
+	HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+	HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+	OUTBOUND_DEADLINE_SECONDS = float(os.getenv("OUTBOUND_DEADLINE_SECONDS", "10"))
+	OUTBOUND_ATTEMPTS = int(os.getenv("OUTBOUND_ATTEMPTS", "3"))
+	OUTBOUND_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOUND_BACKOFF_BASE_SECONDS", "0.1"))
+	BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+	BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+	GEMINI_DEADLINE_SECONDS = float(os.getenv("GEMINI_DEADLINE_SECONDS", "30"))
+	# Default for GENERATE_MAX_ACTIVE; also the spare threads kept for sync Gemini calls abandoned at their deadline
+	GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+
+	# /api/quiz/generate admission: per-user and global token buckets (0 = off)
+	# and a bounded queue for model calls; keep active + queued below the
+	# server's worker threads so cheap endpoints always find a free one
+	GENERATE_USER_RATE_PER_MINUTE = float(os.getenv("GENERATE_USER_RATE_PER_MINUTE", "10"))
+	GENERATE_USER_BURST = int(os.getenv("GENERATE_USER_BURST", "5"))
+	GENERATE_GLOBAL_RATE_PER_SECOND = float(os.getenv("GENERATE_GLOBAL_RATE_PER_SECOND", "20"))
+	GENERATE_GLOBAL_BURST = int(os.getenv("GENERATE_GLOBAL_BURST", "40"))
+	GENERATE_MAX_ACTIVE = int(os.getenv("GENERATE_MAX_ACTIVE", str(GEMINI_MAX_CONCURRENCY)))
+	GENERATE_MAX_QUEUED = int(os.getenv("GENERATE_MAX_QUEUED", "4"))
+	GENERATE_QUEUE_TIMEOUT_SECONDS = float(os.getenv("GENERATE_QUEUE_TIMEOUT_SECONDS", "5"))
+
+	# Response bodies: JSON provider ("orjson", or "default" for the stdlib
+	# one) and gzip/brotli for buffered text bodies of at least COMPRESS_MIN_BYTES
+	JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
+	COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "True").lower() == "true"
+	COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+	COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+	COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+
+	# Per-request spans: Server-Timing response header and /metrics histograms
+	TRACING_ENABLED = os.getenv("TRACING_ENABLED", "True").lower() == "true"
+	SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "True").lower() == "true"
+
 	CORS_RESOURCES = {r"/api/*": {"origins": [FRONTEND_URL]}}
 	CORS_SUPPORTS_CREDENTIALS = True
 	CORS_ALLOW_HEADERS = [
@@ -1,30 +1,40 @@
-from flask import Blueprint, jsonify, g
+from flask import Blueprint, jsonify, g, request
 from utils.decorators import auth_required
 from services.firebase_service import firebase_service
+from config import Config
 
 
 bp = Blueprint("leaderboard", __name__, url_prefix="/api/leaderboard")
 
 
+def _public_leaderboard(period: str):
+	# Identical for every caller, so let browsers and CDNs revalidate via ETag
+	response = jsonify(firebase_service.get_leaderboard(period))
+	response.add_etag()
+	response.cache_control.public = True
+	response.cache_control.max_age = Config.LEADERBOARD_CACHE_TTL_SECONDS
+	return response.make_conditional(request)
+
+
 @bp.get("/daily")
 def daily():
-	return jsonify(firebase_service.get_leaderboard("daily")), 200
+	return _public_leaderboard("daily")
 
 
 @bp.get("/weekly")
 def weekly():
-	return jsonify(firebase_service.get_leaderboard("weekly")), 200
+	return _public_leaderboard("weekly")
 
 
 @bp.get("/all-time")
 def all_time():
-	return jsonify(firebase_service.get_leaderboard("all-time")), 200
+	return _public_leaderboard("all-time")
 
 
 @bp.get("/friends")
 @auth_required
 def friends():
-	# Assuming friends list stored on user doc later; placeholder ranks self only
+	# The caller plus everyone on their friends list, ranked by all-time points
 	return jsonify(firebase_service.get_friends_leaderboard(g.user_id)), 200
 
 
@@ -33,3 +43,9 @@ def friends():
 def rank():
 	return jsonify(firebase_service.get_user_rank(g.user_id)), 200
 
+
+@bp.get("/around")
+@auth_required
+def around():
+	k = min(max(request.args.get("k", 5, type=int), 0), 50)
+	return jsonify(firebase_service.get_rank_window(g.user_id, k)), 200
@@ -1,6 +1,7 @@
-from flask import Blueprint, jsonify, g
+from flask import Blueprint, Response, jsonify, g, stream_with_context
 from utils.decorators import auth_required
-from utils.helpers import get_json
+from utils.errors import APIError
+from utils.helpers import get_json, sse_event
 from services.ai_service import ai_service
 from services.firebase_service import firebase_service
 from services.scoring_service import scoring_service
@@ -12,6 +13,7 @@ bp = Blueprint("quiz", __name__, url_prefix="/api/quiz")
 @bp.post("/generate")
 @auth_required
 def generate_quiz():
+	ai_service.admission.limit(g.user_id)
 	body = get_json(["subject", "difficulty", "lastScore"])
 	quiz = ai_service.generate_quiz(
 		subject=body["subject"],
@@ -25,16 +27,47 @@ def generate_quiz():
 	return jsonify({"quizId": quiz_doc["id"], **quiz_doc["data"]}), 201
 
 
+@bp.post("/generate/stream")
+@auth_required
+def generate_quiz_stream():
+	# Server-sent events: one "question" per validated question, then "done"
+	# once the quiz is saved (or "error" if generation fails mid-stream or
+	# waits too long for a model slot); rate limits answer 429/503 up front
+	ai_service.admission.limit(g.user_id)
+	body = get_json(["subject", "difficulty", "lastScore"])
+	user_id = g.user_id
+	meta = {"subject": body["subject"], "difficulty": int(body["difficulty"])}
+
+	def events():
+		questions = []
+		try:
+			for question in ai_service.stream_quiz(
+				subject=body["subject"],
+				difficulty=meta["difficulty"],
+				last_score=float(body["lastScore"]),
+			):
+				yield sse_event("question", {"index": len(questions), **question})
+				questions.append(question)
+			quiz_doc = firebase_service.save_quiz(user_id=user_id, quiz={"questions": questions}, meta=meta)
+			yield sse_event("done", {"quizId": quiz_doc["id"], "totalQuestions": len(questions)})
+		except APIError as e:
+			yield sse_event("error", {"error": e.message, "status": e.status_code})
+
+	headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+	return Response(stream_with_context(events()), mimetype="text/event-stream", headers=headers)
+
+
 @bp.post("/submit")
 @auth_required
 def submit_quiz():
 	body = get_json(["quizId", "answers"])
-	quiz = firebase_service.get_quiz(body["quizId"])  # includes correct answers
-	grading = scoring_service.grade_quiz(quiz, body["answers"])
+	key = firebase_service.get_answer_key(body["quizId"])
+	grading = scoring_service.grade(key["answerKey"], body["answers"])
 	update = firebase_service.store_quiz_result(
 		user_id=g.user_id,
 		quiz_id=body["quizId"],
 		grading=grading,
+		subject=key["subject"],
 	)
 	return jsonify(update), 200
 
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, g
-from utils.decorators import auth_required
+from utils.decorators import auth_required, scheduler_required
 from services.firebase_service import firebase_service
+from services.streak_reset import missed_day_cutoff
 
 
 bp = Blueprint("streak", __name__, url_prefix="/api/streak")
@@ -18,9 +19,10 @@ def freeze():
 	return jsonify(firebase_service.freeze_streak(g.user_id)), 200
 
 
-@bp.get("/daily-check")
+@bp.post("/daily-check")
+@scheduler_required
 def daily_check():
-	# This endpoint is intended for scheduled invocation
-	firebase_service.daily_streak_check()
-	return jsonify({"success": True}), 200
+	# Scheduled shortly after midnight UTC; 409 while another run holds the checkpoint
+	summary = firebase_service.daily_streak_check(cutoff=missed_day_cutoff())
+	return jsonify({"success": True, **summary}), 200
 
@@ -1,7 +1,8 @@
-from flask import Blueprint, jsonify, g
+from flask import Blueprint, Response, jsonify, g, request, stream_with_context
 from utils.decorators import auth_required
-from utils.helpers import get_json
+from utils.helpers import get_json, ndjson_line
 from services.firebase_service import firebase_service
+from config import Config
 
 
 bp = Blueprint("user", __name__, url_prefix="/api/user")
@@ -33,6 +34,36 @@ def stats():
 @bp.get("/progress")
 @auth_required
 def progress():
-	data = firebase_service.get_user_progress(g.user_id)
+	# ?limit=&cursor= pages newest first; ?fields=full adds answers to each item
+	limit = min(max(request.args.get("limit", Config.PROGRESS_PAGE_SIZE, type=int), 1), Config.PROGRESS_MAX_PAGE_SIZE)
+	full = request.args.get("fields") == "full"
+	data = firebase_service.get_user_progress(g.user_id, limit, request.args.get("cursor") or None, full)
 	return jsonify(data), 200
 
+
+@bp.get("/progress/export")
+@auth_required
+def export_progress():
+	# The whole history as NDJSON, read a page at a time as the client consumes it
+	lines = (ndjson_line(item) for item in firebase_service.iter_user_progress(g.user_id))
+	headers = {"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+	return Response(stream_with_context(lines), mimetype="application/x-ndjson", headers=headers)
+
+
+@bp.get("/friends")
+@auth_required
+def friends():
+	return jsonify({"friendIds": firebase_service.get_friend_ids(g.user_id)}), 200
+
+
+@bp.post("/friends")
+@auth_required
+def add_friend():
+	body = get_json(["friendId"])
+	return jsonify(firebase_service.add_friend(g.user_id, str(body["friendId"]))), 201
+
+
+@bp.delete("/friends/<friend_id>")
+@auth_required
+def remove_friend(friend_id: str):
+	return jsonify(firebase_service.remove_friend(g.user_id, friend_id)), 200
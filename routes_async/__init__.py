@@ -0,0 +1 @@
+# Async (ASGI) routes package
@@ -0,0 +1,59 @@
+from quart import Blueprint, jsonify, request
+from utils.async_helpers import get_json
+from services.async_firebase_service import async_firebase_service
+from config import Config
+from utils.demo_data import DEMO_PASSWORDS, get_demo_user_by_email
+
+
+bp = Blueprint("auth", __name__, url_prefix="/api/auth")
+
+
+@bp.post("/signup")
+async def signup():
+	body = await get_json(["email", "password", "username"])
+	if Config.DEMO_MODE:
+		demo = get_demo_user_by_email(body["email"]) or {
+			"userId": f"uid-{body['username']}",
+			"email": body["email"],
+			"username": body["username"],
+			"avatar": "🧠",
+			"currentStreak": 0,
+			"longestStreak": 0,
+			"totalPoints": 0,
+			"level": 1,
+		}
+		return jsonify({"userId": demo["userId"], "token": f"demo-{demo['userId']}", "user": demo}), 201
+	user = await async_firebase_service.create_auth_user(
+		email=body["email"], password=body["password"], username=body["username"]
+	)
+	return jsonify(user), 201
+
+
+@bp.post("/login")
+async def login():
+	body = await get_json(["email", "password"])
+	if Config.DEMO_MODE:
+		pw = DEMO_PASSWORDS.get(body["email"]) or ""
+		if pw and pw == body["password"]:
+			demo = get_demo_user_by_email(body["email"]) or {}
+			return jsonify({"userId": demo.get("userId"), "token": f"demo-{demo.get('userId')}", "user": demo}), 200
+		return jsonify({"error": "Invalid credentials"}), 401
+	result = await async_firebase_service.login_with_password(
+		body["email"], body["password"]
+	)
+	return jsonify(result), 200
+
+
+@bp.get("/verify")
+async def verify():
+	body = await async_firebase_service.verify_bearer_token(request.headers.get("Authorization", ""))
+	return jsonify({"valid": bool(body.get("uid"))}), 200
+
+
+@bp.post("/logout")
+async def logout():
+	body = await async_firebase_service.verify_bearer_token(request.headers.get("Authorization", ""), optional=True)
+	uid = body.get("uid")
+	if uid:
+		await async_firebase_service.revoke_refresh_tokens(uid)
+	return jsonify({"success": True}), 200
@@ -0,0 +1,50 @@
+from quart import Blueprint, jsonify, g, request
+from utils.async_decorators import auth_required
+from services.async_firebase_service import async_firebase_service
+from config import Config
+
+
+bp = Blueprint("leaderboard", __name__, url_prefix="/api/leaderboard")
+
+
+async def _public_leaderboard(period: str):
+	# Identical for every caller, so let browsers and CDNs revalidate via ETag
+	response = jsonify(await async_firebase_service.get_leaderboard(period))
+	await response.add_etag()
+	response.cache_control.public = True
+	response.cache_control.max_age = Config.LEADERBOARD_CACHE_TTL_SECONDS
+	return await response.make_conditional(request)
+
+
+@bp.get("/daily")
+async def daily():
+	return await _public_leaderboard("daily")
+
+
+@bp.get("/weekly")
+async def weekly():
+	return await _public_leaderboard("weekly")
+
+
+@bp.get("/all-time")
+async def all_time():
+	return await _public_leaderboard("all-time")
+
+
+@bp.get("/friends")
+@auth_required
+async def friends():
+	return jsonify(await async_firebase_service.get_friends_leaderboard(g.user_id)), 200
+
+
+@bp.get("/rank")
+@auth_required
+async def rank():
+	return jsonify(await async_firebase_service.get_user_rank(g.user_id)), 200
+
+
+@bp.get("/around")
+@auth_required
+async def around():
+	k = min(max(request.args.get("k", 5, type=int), 0), 50)
+	return jsonify(await async_firebase_service.get_rank_window(g.user_id, k)), 200
@@ -0,0 +1,78 @@
+from quart import Blueprint, jsonify, g
+from utils.async_decorators import auth_required
+from utils.async_helpers import get_json
+from utils.errors import APIError
+from utils.helpers import sse_event
+from services.ai_service import ai_service
+from services.async_firebase_service import async_firebase_service
+from services.scoring_service import scoring_service
+
+
+bp = Blueprint("quiz", __name__, url_prefix="/api/quiz")
+
+
+@bp.post("/generate")
+@auth_required
+async def generate_quiz():
+	ai_service.admission.limit(g.user_id)
+	body = await get_json(["subject", "difficulty", "lastScore"])
+	quiz = await ai_service.generate_quiz_async(
+		subject=body["subject"],
+		difficulty=int(body["difficulty"]),
+		last_score=float(body["lastScore"]),
+	)
+	quiz_doc = await async_firebase_service.save_quiz(user_id=g.user_id, quiz=quiz, meta={
+		"subject": body["subject"],
+		"difficulty": int(body["difficulty"]),
+	})
+	return jsonify({"quizId": quiz_doc["id"], **quiz_doc["data"]}), 201
+
+
+@bp.post("/generate/stream")
+@auth_required
+async def generate_quiz_stream():
+	# Limited up front; a full model queue surfaces as an in-stream "error"
+	ai_service.admission.limit(g.user_id)
+	body = await get_json(["subject", "difficulty", "lastScore"])
+	user_id = g.user_id
+	meta = {"subject": body["subject"], "difficulty": int(body["difficulty"])}
+
+	async def events():
+		questions = []
+		try:
+			async for question in ai_service.stream_quiz_async(
+				subject=body["subject"],
+				difficulty=meta["difficulty"],
+				last_score=float(body["lastScore"]),
+			):
+				yield sse_event("question", {"index": len(questions), **question})
+				questions.append(question)
+			quiz_doc = await async_firebase_service.save_quiz(user_id=user_id, quiz={"questions": questions}, meta=meta)
+			yield sse_event("done", {"quizId": quiz_doc["id"], "totalQuestions": len(questions)})
+		except APIError as e:
+			yield sse_event("error", {"error": e.message, "status": e.status_code})
+
+	headers = {"Content-Type": "text/event-stream", "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+	return events(), 200, headers
+
+
+@bp.post("/submit")
+@auth_required
+async def submit_quiz():
+	body = await get_json(["quizId", "answers"])
+	key = await async_firebase_service.get_answer_key(body["quizId"])
+	grading = scoring_service.grade(key["answerKey"], body["answers"])
+	update = await async_firebase_service.store_quiz_result(
+		user_id=g.user_id,
+		quiz_id=body["quizId"],
+		grading=grading,
+		subject=key["subject"],
+	)
+	return jsonify(update), 200
+
+
+@bp.get("/<quiz_id>")
+@auth_required
+async def get_quiz(quiz_id: str):
+	data = await async_firebase_service.get_quiz(quiz_id)
+	return jsonify(data), 200
@@ -0,0 +1,27 @@
+from quart import Blueprint, jsonify, g
+from utils.async_decorators import auth_required, scheduler_required
+from services.async_firebase_service import async_firebase_service
+from services.streak_reset import missed_day_cutoff
+
+
+bp = Blueprint("streak", __name__, url_prefix="/api/streak")
+
+
+@bp.get("/status")
+@auth_required
+async def status():
+	return jsonify(await async_firebase_service.get_streak_status(g.user_id)), 200
+
+
+@bp.post("/freeze")
+@auth_required
+async def freeze():
+	return jsonify(await async_firebase_service.freeze_streak(g.user_id)), 200
+
+
+@bp.post("/daily-check")
+@scheduler_required
+async def daily_check():
+	# Scheduled shortly after midnight UTC; 409 while another run holds the checkpoint
+	summary = await async_firebase_service.daily_streak_check(cutoff=missed_day_cutoff())
+	return jsonify({"success": True, **summary}), 200
@@ -0,0 +1,73 @@
+from quart import Blueprint, jsonify, g, request
+from utils.async_decorators import auth_required
+from utils.async_helpers import get_json
+from utils.helpers import ndjson_line
+from services.async_firebase_service import async_firebase_service
+from config import Config
+
+
+bp = Blueprint("user", __name__, url_prefix="/api/user")
+
+
+@bp.get("/me")
+@auth_required
+async def me():
+	user = await async_firebase_service.get_user(g.user_id)
+	return jsonify(user), 200
+
+
+@bp.put("/me")
+@auth_required
+async def update_me():
+	body = await get_json()
+	updates = {k: v for k, v in body.items() if k in ("username", "avatar")}
+	user = await async_firebase_service.update_user(g.user_id, updates)
+	return jsonify(user), 200
+
+
+@bp.get("/stats")
+@auth_required
+async def stats():
+	data = await async_firebase_service.get_user_stats(g.user_id)
+	return jsonify(data), 200
+
+
+@bp.get("/progress")
+@auth_required
+async def progress():
+	limit = min(max(request.args.get("limit", Config.PROGRESS_PAGE_SIZE, type=int), 1), Config.PROGRESS_MAX_PAGE_SIZE)
+	full = request.args.get("fields") == "full"
+	data = await async_firebase_service.get_user_progress(g.user_id, limit, request.args.get("cursor") or None, full)
+	return jsonify(data), 200
+
+
+@bp.get("/progress/export")
+@auth_required
+async def export_progress():
+	user_id = g.user_id
+
+	async def lines():
+		async for item in async_firebase_service.iter_user_progress(user_id):
+			yield ndjson_line(item)
+
+	headers = {"Content-Type": "application/x-ndjson", "Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+	return lines(), 200, headers
+
+
+@bp.get("/friends")
+@auth_required
+async def friends():
+	return jsonify({"friendIds": await async_firebase_service.get_friend_ids(g.user_id)}), 200
+
+
+@bp.post("/friends")
+@auth_required
+async def add_friend():
+	body = await get_json(["friendId"])
+	return jsonify(await async_firebase_service.add_friend(g.user_id, str(body["friendId"]))), 201
+
+
+@bp.delete("/friends/<friend_id>")
+@auth_required
+async def remove_friend(friend_id: str):
+	return jsonify(await async_firebase_service.remove_friend(g.user_id, friend_id)), 200
@@ -1,10 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import json
 import os
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator
 from config import Config
+from utils.admission import AdmissionControl
 from utils.errors import APIError
+from utils.lazy_import import lazy_import
+from services.quiz_pool import QuizPool, pool_key
+from utils.singleflight import singleflight, async_singleflight
+from utils.json_stream import ArrayItemStream
+from utils.outbound import outbound
+from utils.tracing import instrument_gemini
+
+
+# The Gemini SDK takes ~0.4s to import; it loads with the first model call
+genai = lazy_import("google.generativeai")
+google_exceptions = lazy_import("google.api_core.exceptions")
 
 
 PROMPT_TEMPLATE = (
@@ -27,27 +42,68 @@ Requirements:
 - Make questions practical, not trivial
 
 Return ONLY valid JSON (no markdown, no extra text):
-{
+{{
   "questions": [
-    {
+    {{
       "question": "...",
       "options": ["A", "B", "C", "D"],
       "correctAnswer": "A",
       "explanation": "...",
       "difficulty": 2,
       "topic": "..."
-    }
+    }}
   ]
-}
+}}
 	"""
 )
 
 
+def _gemini_retryable(exc: BaseException) -> bool:
+	return isinstance(exc, (
+		TimeoutError,
+		google_exceptions.DeadlineExceeded,
+		google_exceptions.InternalServerError,
+		google_exceptions.ServiceUnavailable,
+		google_exceptions.TooManyRequests,
+	))
+
+
 class AIService:
 
 	def __init__(self):
 		self._api_key = os.getenv("GOOGLE_API_KEY", "")
 		self.model = None
+		self.pool = QuizPool(
+			self._generate_refill,
+			capacity=Config.QUIZ_POOL_CAPACITY,
+			low_water=Config.QUIZ_POOL_LOW_WATER,
+			max_age=Config.QUIZ_POOL_MAX_AGE_SECONDS,
+			max_keys=Config.QUIZ_POOL_MAX_KEYS,
+			min_misses=Config.QUIZ_POOL_REFILL_MIN_MISSES,
+			demand_window=Config.QUIZ_POOL_DEMAND_WINDOW_SECONDS,
+		)
+		self.upstream = outbound.upstream("gemini", deadline=Config.GEMINI_DEADLINE_SECONDS, retryable=_gemini_retryable)
+		# The SDK takes no per-call timeout, so sync calls run here and are
+		# abandoned at the deadline, still holding their thread until the model
+		# answers. Admission keeps at most GENERATE_MAX_ACTIVE calls live; the
+		# GEMINI_MAX_CONCURRENCY threads on top absorb abandoned ones, so a retry
+		# or the next admitted call starts at once instead of queueing behind them
+		self._calls = ThreadPoolExecutor(
+			max_workers=Config.GENERATE_MAX_ACTIVE + Config.GEMINI_MAX_CONCURRENCY,
+			thread_name_prefix="gemini",
+		)
+		# Request-path model calls wait here for a slot; pool refills take a
+		# global token and a free slot, or skip
+		self.admission = AdmissionControl(
+			"Quiz generation",
+			user_rate=Config.GENERATE_USER_RATE_PER_MINUTE / 60,
+			user_burst=Config.GENERATE_USER_BURST,
+			global_rate=Config.GENERATE_GLOBAL_RATE_PER_SECOND,
+			global_burst=Config.GENERATE_GLOBAL_BURST,
+			max_active=Config.GENERATE_MAX_ACTIVE,
+			max_queued=Config.GENERATE_MAX_QUEUED,
+			queue_timeout=Config.GENERATE_QUEUE_TIMEOUT_SECONDS,
+		)
 
 	def _ensure_model(self):
 		if not self.model:
@@ -55,8 +111,28 @@ class AIService:
 			if not api_key:
 				raise APIError("GOOGLE_API_KEY not configured", 500)
 			genai.configure(api_key=api_key)
+			instrument_gemini()
 			self.model = genai.GenerativeModel("gemini-pro")
 
+	def warm_up(self) -> None:
+		"""Import the SDK and build the model and its gRPC client ahead of traffic (``/ready``)."""
+		if Config.DEMO_MODE:
+			return
+		self._ensure_model()
+		if isinstance(self.model, genai.GenerativeModel):
+			# Created lazily by the first generate_content otherwise
+			from google.generativeai import client as genai_client
+			genai_client.get_default_generative_client()
+
+	async def warm_up_async(self) -> None:
+		"""``warm_up`` plus the async client, which must be created on the serving loop."""
+		if Config.DEMO_MODE:
+			return
+		await asyncio.to_thread(self.warm_up)
+		if isinstance(self.model, genai.GenerativeModel):
+			from google.generativeai import client as genai_client
+			genai_client.get_default_generative_async_client()
+
 	def generate_quiz(self, subject: str, difficulty: int, last_score: float) -> dict:
 		if Config.DEMO_MODE:
 			data = {
@@ -84,19 +160,149 @@ class AIService:
 			}
 			self._validate(data)
 			return data
+		if Config.QUIZ_POOL_ENABLED:
+			pooled = self.pool.take(subject, last_score)
+			if pooled is not None:
+				return pooled
+		# Identical concurrent requests share one model call
+		key = ("generate_quiz", *pool_key(subject, last_score))
+		return singleflight.do(key, self._generate_admitted, subject, difficulty, last_score)
+
+	async def generate_quiz_async(self, subject: str, difficulty: int, last_score: float) -> dict:
+		if Config.DEMO_MODE:
+			return self.generate_quiz(subject, difficulty, last_score)
+		if Config.QUIZ_POOL_ENABLED:
+			# take() never blocks; refills run on the pool's worker thread
+			pooled = self.pool.take(subject, last_score)
+			if pooled is not None:
+				return pooled
+		key = ("generate_quiz", *pool_key(subject, last_score))
+		return await async_singleflight.do(key, self._generate_admitted_async, subject, difficulty, last_score)
+
+	def stream_quiz(self, subject: str, difficulty: int, last_score: float) -> Iterator[dict]:
+		"""Yield validated questions as the model produces them."""
+		ready = self._ready_quiz(subject, difficulty, last_score)
+		if ready is not None:
+			yield from ready["questions"]
+			return
+		self._ensure_model()
+		prompt = PROMPT_TEMPLATE.format(subject=subject, difficulty=difficulty, lastScore=last_score)
+		parser = ArrayItemStream("questions")
+		count = 0
+		with self.admission.slot():
+			# Questions may already be sent, so a stream is never retried; it
+			# only honours and feeds the breaker
+			self.upstream.admit()
+			try:
+				for chunk in self.model.generate_content(prompt, stream=True):
+					for question in parser.feed(chunk.text or ""):
+						count = self._accept_streamed(question, count)
+						yield question
+			except APIError:
+				raise
+			except Exception as e:
+				self.upstream.record(False)
+				raise APIError("AI generation failed", 502) from e
+			self.upstream.record(True)
+		self._finish_stream(count)
+
+	async def stream_quiz_async(self, subject: str, difficulty: int, last_score: float) -> AsyncIterator[dict]:
+		ready = self._ready_quiz(subject, difficulty, last_score)
+		if ready is not None:
+			for question in ready["questions"]:
+				yield question
+			return
+		self._ensure_model()
+		prompt = PROMPT_TEMPLATE.format(subject=subject, difficulty=difficulty, lastScore=last_score)
+		parser = ArrayItemStream("questions")
+		count = 0
+		async with self.admission.slot_async():
+			self.upstream.admit()
+			try:
+				async for chunk in await self.model.generate_content_async(prompt, stream=True):
+					for question in parser.feed(chunk.text or ""):
+						count = self._accept_streamed(question, count)
+						yield question
+			except APIError:
+				raise
+			except Exception as e:
+				self.upstream.record(False)
+				raise APIError("AI generation failed", 502) from e
+			self.upstream.record(True)
+		self._finish_stream(count)
+
+	def _ready_quiz(self, subject: str, difficulty: int, last_score: float) -> dict | None:
+		# Demo and pooled quizzes are complete already; stream them as-is
+		if Config.DEMO_MODE:
+			return self.generate_quiz(subject, difficulty, last_score)
+		if Config.QUIZ_POOL_ENABLED:
+			return self.pool.take(subject, last_score)
+		return None
+
+	def _accept_streamed(self, question: dict, count: int) -> int:
+		self._validate_question(question)
+		if count >= 5:
+			raise APIError("AI must return exactly 5 questions", 502)
+		return count + 1
+
+	def _finish_stream(self, count: int) -> None:
+		if count != 5:
+			raise APIError("AI must return exactly 5 questions", 502)
+
+	def _generate_admitted(self, subject: str, difficulty: int, last_score: float) -> dict:
+		with self.admission.slot():
+			return self._generate_live(subject, difficulty, last_score)
+
+	async def _generate_admitted_async(self, subject: str, difficulty: int, last_score: float) -> dict:
+		async with self.admission.slot_async():
+			return await self._generate_live_async(subject, difficulty, last_score)
+
+	def _generate_refill(self, subject: str, difficulty: int, last_score: float) -> dict:
+		# Charged to the global budget only, and never queued ahead of a request
+		self.admission.limit(None)
+		with self.admission.slot(wait=False):
+			return self._generate_live(subject, difficulty, last_score)
+
+	def _generate_live(self, subject: str, difficulty: int, last_score: float) -> dict:
 		self._ensure_model()
 		prompt = PROMPT_TEMPLATE.format(subject=subject, difficulty=difficulty, lastScore=last_score)
 		try:
-			resp = self.model.generate_content(prompt)
-			text = resp.text or "{}"
-			data = self._parse_json(text)
-			self._validate(data)
-			return data
+			resp = self.upstream.call(lambda timeout: self._call_model(prompt, timeout))
+			return self._parse_response(resp)
 		except APIError:
 			raise
 		except Exception as e:
 			raise APIError("AI generation failed", 502) from e
 
+	def _call_model(self, prompt: str, timeout: float):
+		# Copy the context so the call's span still lands on this request
+		try:
+			future = self._calls.submit(contextvars.copy_context().run, self.model.generate_content, prompt)
+		except RuntimeError:
+			# Interpreter shutdown; a late pool refill just calls inline
+			return self.model.generate_content(prompt)
+		try:
+			return future.result(timeout)
+		except TimeoutError:
+			future.cancel()
+			raise
+
+	async def _generate_live_async(self, subject: str, difficulty: int, last_score: float) -> dict:
+		self._ensure_model()
+		prompt = PROMPT_TEMPLATE.format(subject=subject, difficulty=difficulty, lastScore=last_score)
+		try:
+			resp = await self.upstream.call_async(lambda timeout: self.model.generate_content_async(prompt))
+			return self._parse_response(resp)
+		except APIError:
+			raise
+		except Exception as e:
+			raise APIError("AI generation failed", 502) from e
+
+	def _parse_response(self, resp) -> dict:
+		data = self._parse_json(resp.text or "{}")
+		self._validate(data)
+		return data
+
 	def _parse_json(self, text: str) -> dict:
 		try:
 			return json.loads(text)
@@ -114,10 +320,13 @@ class AIService:
 		if len(data["questions"]) != 5:
 			raise APIError("AI must return exactly 5 questions", 502)
 		for q in data["questions"]:
-			if not all(k in q for k in ("question", "options", "correctAnswer", "explanation")):
-				raise APIError("Invalid question format", 502)
-			if not isinstance(q["options"], list) or len(q["options"]) != 4:
-				raise APIError("Each question must have 4 options", 502)
+			self._validate_question(q)
+
+	def _validate_question(self, q: dict) -> None:
+		if not isinstance(q, dict) or not all(k in q for k in ("question", "options", "correctAnswer", "explanation")):
+			raise APIError("Invalid question format", 502)
+		if not isinstance(q["options"], list) or len(q["options"]) != 4:
+			raise APIError("Each question must have 4 options", 502)
 
 
 ai_service = AIService()
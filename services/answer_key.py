@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+import struct
+from dataclasses import dataclass
+
+
+_VERSION = 1
+_HEADER = struct.Struct(">BBB")  # version, difficulty, question count
+_ENTRY = struct.Struct(">B4s")  # correct option index, digest of its text
+_NO_INDEX = 0xFF
+
+
+def _digest(answer: str) -> bytes:
+	return hashlib.blake2b(answer.encode("utf-8"), digest_size=4).digest()
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+	"""What grading needs from a quiz, in a few bytes per question.
+
+	Each question keeps its correct option index and a 4-byte digest of the
+	correct option's text, so answers can be graded whether the client sends
+	indices or option strings without reading the questions themselves.
+	"""
+
+	difficulty: int
+	indices: tuple[int, ...]
+	digests: tuple[bytes, ...]
+
+	@classmethod
+	def from_questions(cls, questions: list[dict], difficulty) -> "AnswerKey":
+		indices = []
+		digests = []
+		for q in questions:
+			correct = q.get("correctAnswer")
+			options = q.get("options") or []
+			indices.append(options.index(correct) if correct in options else _NO_INDEX)
+			digests.append(_digest(correct) if isinstance(correct, str) else b"\0\0\0\0")
+		# A stored 0 stays 0: only a missing difficulty means the default
+		return cls(3 if difficulty is None else int(difficulty), tuple(indices), tuple(digests))
+
+	def pack(self) -> bytes:
+		"""Raises ValueError when the difficulty or question count does not fit a byte."""
+		for name, value in (("difficulty", self.difficulty), ("question count", len(self.indices))):
+			if not 0 <= value <= 255:
+				raise ValueError(f"Answer key {name} out of range: {value}")
+		body = b"".join(_ENTRY.pack(i, d) for i, d in zip(self.indices, self.digests))
+		return _HEADER.pack(_VERSION, self.difficulty, len(self.indices)) + body
+
+	@classmethod
+	def unpack(cls, data: bytes) -> "AnswerKey":
+		version, difficulty, count = _HEADER.unpack_from(data)
+		if version != _VERSION or len(data) != _HEADER.size + count * _ENTRY.size:
+			raise ValueError("Unsupported answer key")
+		entries = [_ENTRY.unpack_from(data, _HEADER.size + n * _ENTRY.size) for n in range(count)]
+		return cls(difficulty, tuple(e[0] for e in entries), tuple(e[1] for e in entries))
+
+	def __len__(self) -> int:
+		return len(self.indices)
+
+	def is_correct(self, position: int, answer) -> bool:
+		if isinstance(answer, bool):
+			return False
+		if isinstance(answer, int):
+			return answer == self.indices[position] != _NO_INDEX
+		if isinstance(answer, str):
+			return _digest(answer) == self.digests[position]
+		return False
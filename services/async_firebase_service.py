@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator
+
+from utils.errors import APIError
+from utils.lazy_import import lazy_import
+from utils.token_cache import token_cache
+from utils.singleflight import async_coalesced
+from utils.tracing import instrument_firestore, trace_methods
+from utils.outbound import outbound, upstream_errors
+from config import Config
+from services.firebase_service import (
+	AGGREGATES_VERSION,
+	FirebaseService,
+	_FRIEND_ROW_FIELDS,
+	_ANSWER_KEY_FIELDS,
+	_PROFILE_FIELDS,
+	_Collections,
+	_answer_key,
+	_befriend,
+	_board_id,
+	_board_users,
+	_friend_rows,
+	_leaderboard_rows,
+	_profile_refs,
+	_progress_after,
+	_progress_item,
+	_progress_page,
+	_progress_query,
+	_public_quiz,
+	_quiz_doc,
+	_result_summary,
+	_stage_friendship,
+	_stage_leaderboard_profile,
+	_stage_quiz_result,
+	_stored_quiz,
+	_user_record,
+	decode_progress_cursor,
+	firebase_service,
+)
+
+
+firestore = lazy_import("firebase_admin.firestore")
+firestore_async = lazy_import("firebase_admin.firestore_async")
+fb_auth = lazy_import("firebase_admin.auth")
+api_exceptions = lazy_import("google.api_core.exceptions")
+
+
+@trace_methods("firebase")
+class AsyncFirebaseService:
+	"""Non-blocking Firestore/identitytoolkit access for the ASGI app.
+
+	Hot paths await the async Firestore client; rare admin-SDK calls (user
+	creation, token revocation, aggregate reconciliation, rank index rebuilds)
+	run the sync service on a worker thread. The leaderboard cache and rank
+	index are shared with ``firebase_service``, and demo mode is delegated to it.
+	"""
+
+	def __init__(self, sync: FirebaseService):
+		self.sync = sync
+		self.db = None
+
+	def _ensure_init(self):
+		if self.db is None:
+			self.sync._init_admin()
+			instrument_firestore()
+			self.db = firestore_async.client()
+
+	async def aclose(self) -> None:
+		await outbound.aclose()
+
+	async def warm_up(self) -> None:
+		"""Build the async client and open its channel on the serving loop (``/ready``)."""
+		if Config.DEMO_MODE:
+			return
+		# Also the sync client: the journal and admin paths use it
+		await asyncio.to_thread(self.sync.warm_up)
+		self._ensure_init()
+		await self.db.collection(_Collections.LEADERBOARD).document("all-time").get()
+
+	# ---------- Auth ----------
+	async def create_auth_user(self, email: str, password: str, username: str) -> dict:
+		# The admin SDK has no async user management
+		return await asyncio.to_thread(self.sync.create_auth_user, email, password, username)
+
+	async def login_with_password(self, email: str, password: str) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.login_with_password(email, password)
+		api_key = self.sync._firebase_web_api_key
+		if not api_key:
+			raise APIError("Login not configured on server. Use client SDK or set FIREBASE_WEB_API_KEY.", 501)
+		endpoint = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={api_key}"
+		try:
+			resp = await outbound.request_async("identitytoolkit", "POST", endpoint, json={"email": email, "password": password, "returnSecureToken": True})
+		except upstream_errors() as e:
+			raise APIError("Authentication service unavailable", 502) from e
+		if resp.status_code != 200:
+			raise APIError("Invalid credentials", 401)
+		data = resp.json()
+		user = await self.get_user(data.get("localId"))
+		return {"userId": data.get("localId"), "token": data.get("idToken"), "user": user}
+
+	async def verify_bearer_token(self, header: str, optional: bool = False) -> dict:
+		if Config.DEMO_MODE:
+			if header.startswith("Bearer demo-"):
+				return {"uid": header.split("demo-", 1)[1]}
+			if optional:
+				return {}
+			raise APIError("Unauthorized", 401)
+		self._ensure_init()
+		if not header.startswith("Bearer "):
+			if optional:
+				return {}
+			raise APIError("Missing or invalid Authorization header", 401)
+		token = header.split(" ", 1)[1].strip()
+		try:
+			return await token_cache.verify_async(token, fb_auth.verify_id_token)
+		except Exception:
+			raise APIError("Unauthorized", 401)
+
+	async def revoke_refresh_tokens(self, uid: str) -> None:
+		await asyncio.to_thread(self.sync.revoke_refresh_tokens, uid)
+
+	# ---------- Users ----------
+	@async_coalesced
+	async def get_user(self, user_id: str) -> dict:
+		return await self._fetch_user(user_id)
+
+	async def _fetch_user(self, user_id: str) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.get_user(user_id)
+		self._ensure_init()
+		# Same request memo and process cache as the sync service
+		token, record = self.sync._cached_user(user_id)
+		if record is None:
+			record = _user_record(user_id, await self.db.collection(_Collections.USERS).document(user_id).get())
+			self.sync._keep_user(user_id, token, record)
+		# Pending write-behind submissions: an indexed read of a local file
+		return self.sync._with_pending(dict(record))
+
+	async def update_user(self, user_id: str, updates: dict) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.update_user(user_id, updates)
+		self._ensure_init()
+		batch = self.db.batch()
+		batch.update(self.db.collection(_Collections.USERS).document(user_id), updates)
+		profile = {k: updates[k] for k in ("username", "avatar") if k in updates}
+		if profile:
+			_stage_leaderboard_profile(self.db, batch, user_id, profile)
+		await batch.commit()
+		updated = self.sync._user_after_update(user_id, updates)
+		self.sync._apply_profile_locally(user_id, profile)
+		if updated is not None:
+			return self.sync._with_pending(dict(updated))
+		# Bypass coalescing so the read observes this write
+		return await self._fetch_user(user_id)
+
+	@async_coalesced
+	async def get_user_stats(self, user_id: str) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.get_user_stats(user_id)
+		user = await self.get_user(user_id)
+		if user.get("aggregatesVersion") != AGGREGATES_VERSION:
+			# One-off per user; the sync reconciler streams the progress history
+			aggregates = await asyncio.to_thread(self.sync.reconcile_user_aggregates, user_id)
+		else:
+			aggregates = user
+		completed = aggregates.get("quizzesCompleted", 0)
+		return {
+			"streak": user.get("currentStreak", 0),
+			"longestStreak": max(user.get("longestStreak", 0), aggregates.get("longestStreak", 0)),
+			"totalPoints": user.get("totalPoints", 0),
+			"level": user.get("level", 1),
+			"quizzesCompleted": completed,
+			"avgScore": round(aggregates.get("scoreSum", 0) / max(1, completed), 2),
+			"bestScore": aggregates.get("bestScore", 0),
+			"subjectCounts": aggregates.get("subjectCounts", {}),
+		}
+
+	@async_coalesced
+	async def get_user_progress(self, user_id: str, limit: int = 20, cursor: str | None = None, full: bool = False) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.get_user_progress(user_id, limit, cursor, full)
+		self._ensure_init()
+		query = _progress_query(self.db, user_id, full).limit(limit + 1)
+		if cursor:
+			query = query.start_after(decode_progress_cursor(cursor))
+		return _progress_page(await query.get(), limit)
+
+	async def iter_user_progress(self, user_id: str, page_size: int | None = None) -> AsyncIterator[dict]:
+		if Config.DEMO_MODE:
+			for item in self.sync.iter_user_progress(user_id):
+				yield item
+			return
+		self._ensure_init()
+		page_size = page_size or Config.PROGRESS_EXPORT_PAGE_SIZE
+		query = _progress_query(self.db, user_id, full=True).limit(page_size)
+		after = None
+		while True:
+			page = await (query.start_after(after) if after else query).get()
+			for snap in page:
+				yield _progress_item(snap)
+			if len(page) < page_size:
+				return
+			after = _progress_after(page[-1])
+
+	# ---------- Quizzes ----------
+	async def save_quiz(self, user_id: str, quiz: dict, meta: dict) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.save_quiz(user_id, quiz, meta)
+		self._ensure_init()
+		data = _quiz_doc(user_id, quiz, meta)
+		doc_ref = self.db.collection(_Collections.QUIZZES).document()
+		await doc_ref.set(_stored_quiz(data))
+		return {"id": doc_ref.id, "data": data}
+
+	@async_coalesced
+	async def get_quiz(self, quiz_id: str) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.get_quiz(quiz_id)
+		self._ensure_init()
+		doc = await self.db.collection(_Collections.QUIZZES).document(quiz_id).get()
+		if not doc.exists:
+			raise APIError("Quiz not found", 404)
+		return _public_quiz(quiz_id, doc.to_dict() or {})
+
+	@async_coalesced
+	async def get_answer_key(self, quiz_id: str) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.get_answer_key(quiz_id)
+		self._ensure_init()
+		doc = await self.db.collection(_Collections.QUIZZES).document(quiz_id).get(field_paths=_ANSWER_KEY_FIELDS)
+		if not doc.exists:
+			raise APIError("Quiz not found", 404)
+		data = doc.to_dict() or {}
+		if "answerKey" not in data:
+			return await asyncio.to_thread(self.sync.get_answer_key, quiz_id)
+		return _answer_key(quiz_id, data)
+
+	async def store_quiz_result(self, user_id: str, quiz_id: str, grading: dict, subject: str | None = None) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.store_quiz_result(user_id, quiz_id, grading, subject)
+		if Config.SUBMIT_WRITE_BEHIND:
+			# The journal commit waits on fsync
+			await asyncio.to_thread(self.sync._journal_result, user_id, quiz_id, grading, subject)
+			return _result_summary(grading)
+		self._ensure_init()
+		batch = self.db.batch()
+		_stage_quiz_result(self.db, batch, user_id, quiz_id, grading, subject)
+		try:
+			await batch.commit()
+		except api_exceptions.AlreadyExists as e:
+			raise APIError("Quiz already submitted", 409) from e
+		self.sync._apply_result_locally(user_id, grading)
+		return _result_summary(grading)
+
+	# ---------- Leaderboards ----------
+	@async_coalesced
+	async def get_leaderboard(self, period: str) -> list[dict]:
+		if Config.DEMO_MODE:
+			return self.sync.get_leaderboard(period)
+		board_id = _board_id(period)
+		cached = self.sync.leaderboard_cache.get(board_id)
+		if cached is not None:
+			return cached
+		self._ensure_init()
+		users_ref = _board_users(self.db, board_id)
+		snaps = await users_ref.order_by("points", direction=firestore.Query.DESCENDING).limit(10).get()
+		refs = _profile_refs(self.db, board_id, snaps)
+		profiles = [snap async for snap in self.db.get_all(refs, field_paths=_PROFILE_FIELDS)] if refs else []
+		items = _leaderboard_rows(snaps, profiles)
+		self.sync.leaderboard_cache.set(board_id, items)
+		return items
+
+	async def get_friends_leaderboard(self, user_id: str) -> list[dict]:
+		if Config.DEMO_MODE:
+			return self.sync.get_friends_leaderboard(user_id)
+		cached = self.sync.friends_cache.get(user_id)
+		if cached is not None:
+			return cached
+		members = [user_id, *await self.get_friend_ids(user_id)]
+		users_ref = self.db.collection(_Collections.LEADERBOARD).document("all-time").collection("users")
+		snaps = [snap async for snap in self.db.get_all([users_ref.document(uid) for uid in members], field_paths=_FRIEND_ROW_FIELDS)]
+		items = _friend_rows(user_id, snaps)
+		self.sync.friends_cache.set(user_id, items, tags=members)
+		return items
+
+	async def get_user_rank(self, user_id: str) -> dict:
+		if not Config.DEMO_MODE:
+			await self._ensure_rank_index()
+		return self.sync.get_user_rank(user_id)
+
+	async def get_rank_window(self, user_id: str, k: int = 5) -> list[dict]:
+		if not Config.DEMO_MODE:
+			await self._ensure_rank_index()
+		return self.sync.get_rank_window(user_id, k)
+
+	async def _ensure_rank_index(self) -> None:
+		if self.sync.rank_index.loaded:
+			# A stale index is refreshed on a background thread; this never blocks
+			self.sync._ensure_rank_index()
+		else:
+			# The first build streams the whole board, so keep it off the event loop
+			await asyncio.to_thread(self.sync._ensure_rank_index)
+
+	# ---------- Friends ----------
+	async def get_friend_ids(self, user_id: str) -> list[str]:
+		if Config.DEMO_MODE:
+			return self.sync.get_friend_ids(user_id)
+		self._ensure_init()
+		snap = await self.db.collection(_Collections.FRIENDS).document(user_id).get()
+		return list((snap.to_dict() or {}).get("ids", [])) if snap.exists else []
+
+	async def add_friend(self, user_id: str, friend_id: str) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.add_friend(user_id, friend_id)
+		if friend_id == user_id:
+			raise APIError("Cannot add yourself as a friend", 400)
+		self._ensure_init()
+		if not (await self.db.collection(_Collections.USERS).document(friend_id).get()).exists:
+			raise APIError("User not found", 404)
+		refs = [self.db.collection(_Collections.FRIENDS).document(uid) for uid in (user_id, friend_id)]
+
+		@firestore_async.async_transactional
+		async def befriend(transaction):
+			friend_ids = {uid: [] for uid in (user_id, friend_id)}
+			async for snap in self.db.get_all(refs, transaction=transaction):
+				if snap.exists:
+					friend_ids[snap.id] = list((snap.to_dict() or {}).get("ids", []))
+			added = _befriend(friend_ids, user_id, friend_id)
+			if added is not None:
+				_stage_friendship(self.db, transaction, user_id, friend_id, add=True)
+			return added, friend_ids[user_id]
+
+		added, current = await befriend(self.db.transaction())
+		if added is None:
+			return {"friendIds": current}
+		self.sync._apply_friendship_locally(user_id, friend_id)
+		return {"friendIds": added}
+
+	async def remove_friend(self, user_id: str, friend_id: str) -> dict:
+		if Config.DEMO_MODE:
+			return self.sync.remove_friend(user_id, friend_id)
+		friend_ids = await self.get_friend_ids(user_id)
+		if friend_id not in friend_ids:
+			return {"friendIds": friend_ids}
+		batch = self.db.batch()
+		_stage_friendship(self.db, batch, user_id, friend_id, add=False)
+		await batch.commit()
+		self.sync._apply_friendship_locally(user_id, friend_id)
+		return {"friendIds": [uid for uid in friend_ids if uid != friend_id]}
+
+	# ---------- Streaks ----------
+	@async_coalesced
+	async def get_streak_status(self, user_id: str) -> dict:
+		user = await self.get_user(user_id)
+		last = user.get("lastQuizDate")
+		return {
+			"currentStreak": user.get("currentStreak", 0),
+			"longestStreak": user.get("longestStreak", 0),
+			"lastCompletedDate": str(last) if last else None,
+			"daysUntilBreak": 1,  # simplified for demo
+		}
+
+	async def freeze_streak(self, user_id: str) -> dict:
+		user = await self.get_user(user_id)
+		points = user.get("totalPoints", 0)
+		if points < 50:
+			raise APIError("Not enough points", 400)
+		await self.update_user(user_id, {"totalPoints": firestore.Increment(-50), "streakFrozen": True})
+		return {"success": True, "pointsUsed": 50}
+
+	async def daily_streak_check(self, cutoff=None) -> dict:
+		# Long-running batch job with its own worker pool
+		return await asyncio.to_thread(self.sync.daily_streak_check, cutoff)
+
+
+async_firebase_service = AsyncFirebaseService(firebase_service)
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
+import base64
 import json
+import logging
 import os
-import requests
+import threading
+import time
 from dataclasses import dataclass
-from datetime import timedelta
-
-import firebase_admin
-from firebase_admin import credentials, firestore, auth as fb_auth
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
 
 from utils.errors import APIError
-from utils.helpers import utc_now
+from utils.lazy_import import lazy_import, load
+from utils.helpers import utc_now, field_key
 from config import Config
+from services.rank_index import RankIndex
+from services.answer_key import AnswerKey
+from services.leaderboard_touch import LeaderboardTouch
+from utils.token_cache import token_cache
+from utils.singleflight import coalesced, generations
+from utils.cache import TTLCache, TaggedTTLCache, VersionedTTLCache
+from utils import request_memo
+from utils.tracing import instrument_firestore, trace_methods
+from utils.outbound import outbound, upstream_errors
 from utils.demo_data import (
 	DEMO_USERS_BY_ID,
 	DEMO_USERS_BY_EMAIL,
@@ -22,20 +33,357 @@ from utils.demo_data import (
 )
 
 
+# The admin SDK and Firestore client load on first use, not at start-up
+firebase_admin = lazy_import("firebase_admin")
+credentials = lazy_import("firebase_admin.credentials")
+firestore = lazy_import("firebase_admin.firestore")
+fb_auth = lazy_import("firebase_admin.auth")
+api_exceptions = lazy_import("google.api_core.exceptions")
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batches with more than 500 writes
+BATCH_WRITE_LIMIT = 500
+
+# Bump to force get_user_stats to reconcile stored aggregates once more
+# (2: longestStreak recovered from history, after resets that dropped it)
+AGGREGATES_VERSION = 2
+
+
 @dataclass
 class _Collections:
 	USERS: str = "users"
 	QUIZZES: str = "quizzes"
 	PROGRESS: str = "progress"
 	LEADERBOARD: str = "leaderboard"
+	FRIENDS: str = "friends"
+	# Markers of journaled submissions already applied, so a replay is a no-op
+	SUBMISSIONS: str = "submissions"
+
+
+# Snapshot and batch helpers shared by the sync and async services; they only
+# build references and payloads, so they work with either Firestore client.
+def _user_record(user_id: str, snap) -> dict:
+	if not snap.exists:
+		raise APIError("User not found", 404)
+	data = snap.to_dict() or {}
+	# Submits only increment currentStreak; longestStreak catches up here
+	data["longestStreak"] = max(data.get("longestStreak", 0), data.get("currentStreak", 0))
+	return {"userId": user_id, **data}
+
+
+# Plain values update_user can apply to a cached record without re-reading it
+_PLAIN_VALUES = (str, int, float, bool, datetime, list, dict, type(None))
+
+
+def _updated_record(record: dict, updates: dict) -> dict | None:
+	"""``record`` as ``update(updates)`` leaves it, or None when only Firestore knows."""
+	updated = dict(record)
+	for field, value in updates.items():
+		if "." in field:
+			return None
+		if isinstance(value, firestore.Increment):
+			updated[field] = (updated.get(field) or 0) + value.value
+		elif isinstance(value, _PLAIN_VALUES):
+			updated[field] = value
+		else:
+			# Other transforms and sentinels (server timestamps, deletes)
+			return None
+	updated["longestStreak"] = max(updated.get("longestStreak", 0), updated.get("currentStreak", 0))
+	return updated
+
+
+def _quiz_doc(user_id: str, quiz: dict, meta: dict) -> dict:
+	return {
+		"userId": user_id,
+		"questions": quiz["questions"],
+		"subject": meta.get("subject"),
+		"difficulty": meta.get("difficulty"),
+		"createdAt": utc_now(),
+		"expiresAt": utc_now() + timedelta(hours=24),
+	}
+
+
+# Fields submit reads from a quiz document instead of the whole thing
+_ANSWER_KEY_FIELDS = ["answerKey", "subject"]
+
+
+def _stored_quiz(data: dict) -> dict:
+	try:
+		packed = AnswerKey.from_questions(data["questions"], data.get("difficulty")).pack()
+	except ValueError:
+		# Outside the packed header's range; submits grade from the questions instead
+		return data
+	return {**data, "answerKey": packed}
+
+
+def _public_quiz(quiz_id: str, data: dict) -> dict:
+	data.pop("answerKey", None)
+	return {"quizId": quiz_id, **data}
+
+
+def _answer_key(quiz_id: str, data: dict) -> dict:
+	return {"quizId": quiz_id, "subject": data.get("subject"), "answerKey": AnswerKey.unpack(data["answerKey"])}
+
+
+def _result_summary(grading: dict) -> dict:
+	return {
+		"score": grading["score"],
+		"totalQuestions": grading["totalQuestions"],
+		"pointsEarned": grading["pointsEarned"],
+		"streakIncremented": grading["streakIncremented"],
+		"correct": grading["correct"],
+		"message": grading["message"],
+	}
+
+
+LEADERBOARD_PERIODS = ("daily", "weekly", "all-time")
+# Windowed boards keep one bucket per UTC day / ISO week, so a new window
+# starts empty and nothing has to reset the old one
+_BUCKETED_PERIODS = ("daily", "weekly")
+_BUCKET_SPANS = {"daily": timedelta(days=1), "weekly": timedelta(weeks=1)}
+# What bucket rows (points only) borrow from the all-time row
+_PROFILE_FIELDS = ["username", "avatar", "streak"]
+
+
+def period_key(period: str, at: datetime) -> str:
+	"""Bucket key of ``at``: ``2026-10-17`` for daily, ``2026-W42`` (ISO week) for weekly."""
+	at = at.astimezone(timezone.utc)
+	if period == "daily":
+		return at.strftime("%Y-%m-%d")
+	year, week, _ = at.isocalendar()
+	return f"{year}-W{week:02d}"
+
+
+def _board_id(period: str, at: datetime | None = None) -> str:
+	# leaderboard/{id}: "all-time", or the bucket holding ``at`` such as "daily-2026-10-17"
+	if period not in _BUCKETED_PERIODS:
+		return period
+	return f"{period}-{period_key(period, at or utc_now())}"
+
+
+def _board_users(db, board_id: str):
+	return db.collection(_Collections.LEADERBOARD).document(board_id).collection("users")
+
+
+def _profile_refs(db, board_id: str, snaps) -> list:
+	"""All-time rows naming a bucket's users; none for the all-time board itself."""
+	if board_id == "all-time":
+		return []
+	users_ref = _board_users(db, "all-time")
+	return [users_ref.document(s.id) for s in snaps]
+
+
+def _leaderboard_rows(snaps, profiles=()) -> list[dict]:
+	names = {p.id: p.to_dict() or {} for p in profiles if p.exists}
+	items = []
+	for idx, s in enumerate(snaps, start=1):
+		row = {**names.get(s.id, {}), **(s.to_dict() or {})}
+		items.append({
+			"rank": idx,
+			"username": row.get("username", ""),
+			"points": row.get("points", 0),
+			"streak": row.get("streak", 0),
+			"avatar": row.get("avatar", ""),
+		})
+	return items
+
+
+_FRIEND_ROW_FIELDS = ["username", "avatar", "points", "streak"]
+
+
+def _friend_rows(user_id: str, snaps) -> list[dict]:
+	"""Rank friends' all-time rows; ties share a rank like the global board."""
+	rows = []
+	for snap in snaps:
+		if not snap.exists:
+			continue
+		row = snap.to_dict() or {}
+		rows.append((int(row.get("points", 0) or 0), snap.id, row))
+	rows.sort(key=lambda r: (-r[0], r[2].get("username", ""), r[1]))
+	items = []
+	for idx, (points, uid, row) in enumerate(rows):
+		rank = items[-1]["rank"] if items and items[-1]["points"] == points else idx + 1
+		items.append({
+			"rank": rank,
+			"userId": uid,
+			"username": row.get("username", ""),
+			"points": points,
+			"streak": row.get("streak", 0),
+			"avatar": row.get("avatar", ""),
+			"isCurrentUser": uid == user_id,
+		})
+	return items
+
 
+def _befriend(friend_ids: dict[str, list[str]], user_id: str, friend_id: str) -> list[str] | None:
+	"""``user_id``'s list with ``friend_id`` added, None if already there; both lists are capped."""
+	if friend_id in friend_ids[user_id]:
+		return None
+	if len(friend_ids[user_id]) >= Config.FRIENDS_MAX:
+		raise APIError("Friend limit reached", 400)
+	if len(friend_ids[friend_id]) >= Config.FRIENDS_MAX:
+		raise APIError("That user has reached the friend limit", 400)
+	return [*friend_ids[user_id], friend_id]
 
+
+def _stage_friendship(db, batch, user_id: str, friend_id: str, add: bool) -> None:
+	# Friendships are mutual, so both adjacency lists change in one commit
+	op = firestore.ArrayUnion if add else firestore.ArrayRemove
+	for owner, other in ((user_id, friend_id), (friend_id, user_id)):
+		batch.set(db.collection(_Collections.FRIENDS).document(owner), {"ids": op([other])}, merge=True)
+
+
+def _stage_quiz_result(db, batch, user_id: str, quiz_id: str, grading: dict, subject: str | None, completed_at: datetime | None = None) -> None:
+	# One atomic commit: progress item, user totals and leaderboard rows.
+	# Server-side increments avoid the read-modify-write race on totals.
+	completed_at = completed_at or utc_now()
+	progress_root = db.collection(_Collections.PROGRESS).document(user_id)
+	progress_item = progress_root.collection("items").document(quiz_id)
+	payload = {
+		"score": grading["score"],
+		"pointsEarned": grading["pointsEarned"],
+		# Inputs of the points formula, so a rules change can be re-scored
+		"correctCount": grading["correctCount"],
+		"difficulty": grading["difficulty"],
+		"streakIncremented": grading["streakIncremented"],
+		"completedAt": completed_at,
+		"answers": grading["answers"],
+		"subject": subject,
+	}
+	# create, not set: a resubmitted quiz fails the whole commit with
+	# AlreadyExists rather than counting its points and aggregates twice
+	batch.create(progress_item, payload)
+
+	streak_delta = 1 if grading["streakIncremented"] else 0
+	user_ref = db.collection(_Collections.USERS).document(user_id)
+	user_update = {
+		"totalPoints": firestore.Increment(grading["pointsEarned"]),
+		"currentStreak": firestore.Increment(streak_delta),
+		"lastQuizDate": completed_at,
+		# Running aggregates behind get_user_stats
+		"quizzesCompleted": firestore.Increment(1),
+		"scoreSum": firestore.Increment(grading["score"]),
+		"bestScore": firestore.Maximum(grading["score"]),
+	}
+	if subject:
+		user_update[f"subjectCounts.{field_key(subject)}"] = firestore.Increment(1)
+	# longestStreak is not written here: readers take max(longest, current)
+	# and the streak reset job persists that max when it zeroes the streak
+	batch.update(user_ref, user_update)
+
+	_stage_leaderboard_increments(db, batch, user_id, grading["pointsEarned"], streak_delta, completed_at)
+
+
+# Progress fields listed unless the full items (with answers) are asked for
+PROGRESS_SUMMARY_FIELDS = ["score", "pointsEarned", "correctCount", "difficulty", "subject", "streakIncremented", "completedAt"]
+
+
+def encode_progress_cursor(completed_at: datetime, item_id: str) -> str:
+	raw = json.dumps([completed_at.isoformat(), item_id], separators=(",", ":")).encode()
+	return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_progress_cursor(cursor: str) -> dict:
+	"""The ``start_after`` values behind an opaque cursor from ``encode_progress_cursor``."""
+	try:
+		completed_at, item_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+		return {"completedAt": datetime.fromisoformat(completed_at), "__name__": str(item_id)}
+	except (ValueError, TypeError) as e:
+		raise APIError("Invalid cursor", 400) from e
+
+
+def _progress_query(db, user_id: str, full: bool):
+	# Newest first; the id breaks ties so a cursor never skips or repeats an item
+	query = (
+		db.collection(_Collections.PROGRESS).document(user_id).collection("items")
+		.order_by("completedAt", direction=firestore.Query.DESCENDING)
+		.order_by("__name__", direction=firestore.Query.DESCENDING)
+	)
+	return query if full else query.select(PROGRESS_SUMMARY_FIELDS)
+
+
+def _progress_item(snap) -> dict:
+	return {"quizId": snap.id, **(snap.to_dict() or {})}
+
+
+def _progress_page(snaps: list, limit: int) -> dict:
+	# Queried with limit + 1, so a next page is only offered when one exists
+	items = [_progress_item(s) for s in snaps[:limit]]
+	next_cursor = None
+	if len(snaps) > limit:
+		next_cursor = encode_progress_cursor(items[-1]["completedAt"], items[-1]["quizId"])
+	return {"items": items, "nextCursor": next_cursor}
+
+
+def _progress_after(snap) -> dict:
+	return {"completedAt": (snap.to_dict() or {}).get("completedAt"), "__name__": snap.id}
+
+
+def _overlay_pending(user: dict, pending: list[dict]) -> dict:
+	"""``user`` as it will read once journaled submissions are flushed (mirrors _stage_quiz_result)."""
+	if not pending:
+		return user
+	user = {**user, "subjectCounts": dict(user.get("subjectCounts") or {})}
+	for entry in pending:
+		grading = entry["grading"]
+		user["totalPoints"] = user.get("totalPoints", 0) + grading["pointsEarned"]
+		user["currentStreak"] = user.get("currentStreak", 0) + (1 if grading["streakIncremented"] else 0)
+		user["lastQuizDate"] = datetime.fromisoformat(entry["submittedAt"])
+		user["quizzesCompleted"] = user.get("quizzesCompleted", 0) + 1
+		user["scoreSum"] = user.get("scoreSum", 0) + grading["score"]
+		user["bestScore"] = max(user.get("bestScore", 0), grading["score"])
+		if entry.get("subject"):
+			key = field_key(entry["subject"])
+			user["subjectCounts"][key] = user["subjectCounts"].get(key, 0) + 1
+	user["longestStreak"] = max(user.get("longestStreak", 0), user["currentStreak"])
+	return user
+
+
+def _stage_leaderboard_increments(db, batch, user_id: str, points_delta: int, streak_delta: int, earned_at: datetime | None = None) -> None:
+	# Only the user's own rows: the shared leaderboard/{id} docs are
+	# touched by FirebaseService.leaderboard_touch, not by every submit
+	batch.set(_board_users(db, "all-time").document(user_id), {
+		"points": firestore.Increment(points_delta),
+		"streak": firestore.Increment(streak_delta),
+	}, merge=True)
+	if earned_at is None:
+		# Corrections to past scores (re-scoring) only move the all-time board
+		return
+	for period in _BUCKETED_PERIODS:
+		batch.set(_board_users(db, _board_id(period, earned_at)).document(user_id), {
+			"points": firestore.Increment(points_delta),
+		}, merge=True)
+
+
+def _stage_leaderboard_profile(db, batch, user_id: str, fields: dict) -> None:
+	# Bucket rows are named from the all-time row at read time
+	batch.set(_board_users(db, "all-time").document(user_id), fields, merge=True)
+
+
+@trace_methods("firebase")
 class FirebaseService:
 
 	def __init__(self):
 		self.db = None
 		self._initialized = False
 		self._firebase_web_api_key = os.getenv("FIREBASE_WEB_API_KEY", "")
+		self.rank_index = RankIndex()
+		self._rank_index_lock = threading.Lock()
+		self._rank_index_retry_at = 0.0
+		self.leaderboard_cache = TTLCache(max_entries=16, ttl=Config.LEADERBOARD_CACHE_TTL_SECONDS)
+		# Raw users/{uid} records (pending write-behind results are overlaid on
+		# read); every write path below invalidates, the request memo sits in front
+		self.user_cache = VersionedTTLCache(max_entries=Config.USER_CACHE_MAX_ENTRIES, ttl=Config.USER_CACHE_TTL_SECONDS)
+		# Keyed by user, tagged with every member so a score change drops each board it appears on
+		self.friends_cache = TaggedTTLCache(
+			max_entries=Config.FRIENDS_CACHE_MAX_ENTRIES,
+			ttl=Config.FRIENDS_CACHE_TTL_SECONDS,
+		)
+		self._journal = None
+		self._journal_lock = threading.Lock()
+		self.leaderboard_touch = LeaderboardTouch(self._touch_leaderboards, interval=Config.LEADERBOARD_TOUCH_SECONDS)
+		self._pruned_day: str | None = None
 
 	def _init_admin(self):
 		if not firebase_admin._apps:  # type: ignore[attr-defined]
@@ -49,9 +397,41 @@ class FirebaseService:
 	def _ensure_init(self):
 		if not self._initialized:
 			self._init_admin()
+			instrument_firestore()
 			self.db = firestore.client()
 			self._initialized = True
 
+	# ---------- Warm-up ----------
+	def warm_up(self) -> None:
+		"""Import the SDK, build the client and open its channel ahead of traffic (``/ready``)."""
+		if Config.DEMO_MODE:
+			return
+		load(firestore, api_exceptions)
+		self._ensure_init()
+		# One small read opens the gRPC channel and mints an access token
+		self.db.collection(_Collections.LEADERBOARD).document("all-time").get()
+		# Build the rank index now so no request waits on it
+		self._ensure_rank_index()
+
+	def warm_token_certs(self) -> None:
+		"""Fetch Google's ID-token signing certs before the first verify_id_token needs them."""
+		if Config.DEMO_MODE:
+			return
+		load(fb_auth)
+		get_client = getattr(fb_auth, "_get_client", None)
+		if get_client is None:
+			return  # a stand-in auth module
+		self._init_admin()
+		from firebase_admin import _token_gen
+		try:
+			verifier = get_client(None)._token_verifier
+		except AttributeError:
+			# SDK internals moved; the first verification fetches the certs instead
+			logger.warning("Cannot prefetch ID-token certs with this firebase_admin version")
+			return
+		# The verifier's own cache-control session, so verification reuses the response
+		verifier.request(_token_gen.ID_TOKEN_CERT_URI)
+
 	# ---------- Auth ----------
 	def create_auth_user(self, email: str, password: str, username: str) -> dict:
 		if Config.DEMO_MODE:
@@ -81,8 +461,18 @@ class FirebaseService:
 				"lastQuizDate": None,
 				"createdAt": utc_now(),
 				"streakFrozen": False,
+				"quizzesCompleted": 0,
+				"scoreSum": 0,
+				"bestScore": 0,
+				"subjectCounts": {},
+				"aggregatesVersion": AGGREGATES_VERSION,
 			}
-			self.db.collection(_Collections.USERS).document(user.uid).set(user_doc)
+			batch = self.db.batch()
+			batch.set(self.db.collection(_Collections.USERS).document(user.uid), user_doc)
+			# Seed leaderboard rows so later submits only need increments
+			_stage_leaderboard_profile(self.db, batch, user.uid, {"username": username, "avatar": "", "points": 0, "streak": 0})
+			batch.commit()
+			self._invalidate_users([user.uid])
 			# Issue a custom token for immediate login if needed
 			custom_token = fb_auth.create_custom_token(user.uid)
 			return {"userId": user.uid, "token": custom_token.decode(), "user": {"uid": user.uid, **user_doc}}
@@ -98,7 +488,10 @@ class FirebaseService:
 		if not self._firebase_web_api_key:
 			raise APIError("Login not configured on server. Use client SDK or set FIREBASE_WEB_API_KEY.", 501)
 		endpoint = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={self._firebase_web_api_key}"
-		resp = requests.post(endpoint, json={"email": email, "password": password, "returnSecureToken": True}, timeout=10)
+		try:
+			resp = outbound.request("identitytoolkit", "POST", endpoint, json={"email": email, "password": password, "returnSecureToken": True})
+		except upstream_errors() as e:
+			raise APIError("Authentication service unavailable", 502) from e
 		if resp.status_code != 200:
 			raise APIError("Invalid credentials", 401)
 		data = resp.json()
@@ -124,27 +517,70 @@ class FirebaseService:
 			raise APIError("Missing or invalid Authorization header", 401)
 		token = header.split(" ", 1)[1].strip()
 		try:
-			return fb_auth.verify_id_token(token)
+			return token_cache.verify(token, fb_auth.verify_id_token)
 		except Exception:
 			raise APIError("Unauthorized", 401)
 
 	def revoke_refresh_tokens(self, uid: str) -> None:
 		self._ensure_init()
 		fb_auth.revoke_refresh_tokens(uid)
+		token_cache.invalidate_uid(uid)
 
 	# ---------- Users ----------
+	@coalesced
 	def get_user(self, user_id: str) -> dict:
+		return self._fetch_user(user_id)
+
+	def _fetch_user(self, user_id: str) -> dict:
 		if Config.DEMO_MODE:
 			user = get_demo_user(user_id)
 			if not user:
 				raise APIError("User not found", 404)
 			return user
 		self._ensure_init()
-		doc = self.db.collection(_Collections.USERS).document(user_id).get()
-		if not doc.exists:
-			raise APIError("User not found", 404)
-		data = doc.to_dict() or {}
-		return {"userId": user_id, **data}
+		token, record = self._cached_user(user_id)
+		if record is None:
+			record = _user_record(user_id, self.db.collection(_Collections.USERS).document(user_id).get())
+			self._keep_user(user_id, token, record)
+		return self._with_pending(dict(record))
+
+	def _cached_user(self, user_id: str) -> tuple[int, dict | None]:
+		"""This request's earlier read, else the process cache; with the token a fill must pass."""
+		memo = request_memo.get(("users", user_id))
+		if memo is not None:
+			return memo
+		token = self.user_cache.token(user_id)
+		record = self.user_cache.get(user_id)
+		if record is not None:
+			request_memo.put(("users", user_id), (token, record))
+		return token, record
+
+	def _keep_user(self, user_id: str, token: int, record: dict) -> None:
+		self.user_cache.set(user_id, record, token)
+		request_memo.put(("users", user_id), (token, record))
+
+	def _invalidate_users(self, user_ids) -> None:
+		for user_id in user_ids:
+			self.user_cache.invalidate(user_id)
+			request_memo.invalidate(("users", user_id))
+			# Later reads start their own call instead of joining one from before the write
+			generations.bump(user_id)
+
+	def _user_after_update(self, user_id: str, updates: dict) -> dict | None:
+		"""Invalidate after a committed ``update``; the new record when it can be derived locally.
+
+		Only from a record read since the last invalidation in this process: a
+		concurrent write would otherwise be lost from the derived copy.
+		"""
+		token, record = request_memo.get(("users", user_id)) or (None, None)
+		current = self.user_cache.token(user_id)
+		self._invalidate_users([user_id])
+		if record is None or token != current:
+			return None
+		updated = _updated_record(record, updates)
+		if updated is not None:
+			self._keep_user(user_id, self.user_cache.token(user_id), updated)
+		return updated
 
 	def update_user(self, user_id: str, updates: dict) -> dict:
 		if Config.DEMO_MODE:
@@ -154,47 +590,160 @@ class FirebaseService:
 			user.update(updates)
 			return user
 		self._ensure_init()
-		self.db.collection(_Collections.USERS).document(user_id).update(updates)
-		return self.get_user(user_id)
+		batch = self.db.batch()
+		batch.update(self.db.collection(_Collections.USERS).document(user_id), updates)
+		profile = {k: updates[k] for k in ("username", "avatar") if k in updates}
+		if profile:
+			_stage_leaderboard_profile(self.db, batch, user_id, profile)
+		batch.commit()
+		updated = self._user_after_update(user_id, updates)
+		self._apply_profile_locally(user_id, profile)
+		if updated is not None:
+			return self._with_pending(dict(updated))
+		# Bypass coalescing so the read observes this write
+		return self._fetch_user(user_id)
 
+	@coalesced
 	def get_user_stats(self, user_id: str) -> dict:
 		user = self.get_user(user_id)
-		# Aggregate basics
+		if Config.DEMO_MODE:
+			aggregates = self._compute_aggregates(DEMO_PROGRESS.get(user_id, []))
+		elif user.get("aggregatesVersion") != AGGREGATES_VERSION:
+			# Users whose history predates the running aggregates
+			aggregates = self.reconcile_user_aggregates(user_id)
+		else:
+			aggregates = user
+		completed = aggregates.get("quizzesCompleted", 0)
 		return {
 			"streak": user.get("currentStreak", 0),
-			"longestStreak": user.get("longestStreak", 0),
+			"longestStreak": max(user.get("longestStreak", 0), aggregates.get("longestStreak", 0)),
 			"totalPoints": user.get("totalPoints", 0),
 			"level": user.get("level", 1),
-			"quizzesCompleted": len(DEMO_PROGRESS.get(user_id, [])) if Config.DEMO_MODE else self._count_user_quizzes(user_id),
-			"avgScore": (
-				(round(sum(i.get("score", 0) for i in DEMO_PROGRESS.get(user_id, [])) / max(1, len(DEMO_PROGRESS.get(user_id, []))), 2))
-				if Config.DEMO_MODE else self._avg_user_score(user_id)
-			),
+			"quizzesCompleted": completed,
+			"avgScore": round(aggregates.get("scoreSum", 0) / max(1, completed), 2),
+			"bestScore": aggregates.get("bestScore", 0),
+			"subjectCounts": aggregates.get("subjectCounts", {}),
 		}
 
-	def get_user_progress(self, user_id: str) -> dict:
+	@coalesced
+	def get_user_progress(self, user_id: str, limit: int = 20, cursor: str | None = None, full: bool = False) -> dict:
+		"""One page of a user's history, newest first; pass ``nextCursor`` back for the next."""
 		if Config.DEMO_MODE:
-			items = DEMO_PROGRESS.get(user_id, [])
-		else:
-			self._ensure_init()
-			progress_ref = self.db.collection(_Collections.PROGRESS).document(user_id).collection("items")
-			snaps = progress_ref.order_by("completedAt", direction=firestore.Query.DESCENDING).limit(50).get()
-			items = [s.to_dict() for s in snaps]
-		return {"items": items}
+			return {"items": DEMO_PROGRESS.get(user_id, [])[:limit], "nextCursor": None}
+		self._ensure_init()
+		query = _progress_query(self.db, user_id, full).limit(limit + 1)
+		if cursor:
+			query = query.start_after(decode_progress_cursor(cursor))
+		return _progress_page(query.get(), limit)
 
-	def _count_user_quizzes(self, user_id: str) -> int:
+	def iter_user_progress(self, user_id: str, page_size: int | None = None) -> Iterator[dict]:
+		"""Every full progress item of a user, newest first, reading one page at a time."""
+		if Config.DEMO_MODE:
+			yield from DEMO_PROGRESS.get(user_id, [])
+			return
 		self._ensure_init()
-		progress_ref = self.db.collection(_Collections.PROGRESS).document(user_id).collection("items")
-		return len(progress_ref.get())
+		page_size = page_size or Config.PROGRESS_EXPORT_PAGE_SIZE
+		query = _progress_query(self.db, user_id, full=True).limit(page_size)
+		after = None
+		while True:
+			page = (query.start_after(after) if after else query).get()
+			for snap in page:
+				yield _progress_item(snap)
+			if len(page) < page_size:
+				return
+			after = _progress_after(page[-1])
+
+	@staticmethod
+	def _compute_aggregates(items: list[dict]) -> dict:
+		subject_counts: dict[str, int] = {}
+		for item in items:
+			if item.get("subject"):
+				key = field_key(item["subject"])
+				subject_counts[key] = subject_counts.get(key, 0) + 1
+		scores = [item.get("score", 0) for item in items]
+		return {
+			"quizzesCompleted": len(scores),
+			"scoreSum": sum(scores),
+			"bestScore": max(scores, default=0),
+			"subjectCounts": subject_counts,
+		}
 
-	def _avg_user_score(self, user_id: str) -> float:
+	@staticmethod
+	def _longest_streak(items: list[dict]) -> int:
+		"""Longest run of passing quizzes with no missed UTC day between quizzes.
+
+		Freezes are not recorded per item, so this can fall short of the real
+		run, never exceed it.
+		"""
+		longest = run = 0
+		last_day = None
+		dated = [item for item in items if item.get("completedAt")]
+		for item in sorted(dated, key=lambda item: item["completedAt"]):
+			day = item["completedAt"].date()
+			if last_day is not None and (day - last_day).days > 1:
+				run = 0
+			if item.get("streakIncremented"):
+				run += 1
+				longest = max(longest, run)
+			last_day = day
+		return longest
+
+	def reconcile_user_aggregates(self, user_id: str) -> dict:
+		"""Recompute a user's running aggregates from their progress history.
+
+		Also copies their name and avatar onto their all-time leaderboard row.
+		"""
 		self._ensure_init()
 		progress_ref = self.db.collection(_Collections.PROGRESS).document(user_id).collection("items")
-		snaps = progress_ref.get()
-		if not snaps:
-			return 0.0
-		scores = [s.to_dict().get("score", 0) for s in snaps]
-		return round(sum(scores) / max(1, len(scores)), 2)
+		items = []
+		missing_subject = []
+		for snap in progress_ref.select(["score", "subject", "completedAt", "streakIncremented"]).stream():
+			item = snap.to_dict() or {}
+			items.append(item)
+			if not item.get("subject"):
+				missing_subject.append((snap.id, item))
+		# Older progress items predate the subject field; recover it from the quiz
+		for start in range(0, len(missing_subject), 100):
+			chunk = missing_subject[start:start + 100]
+			refs = [self.db.collection(_Collections.QUIZZES).document(quiz_id) for quiz_id, _ in chunk]
+			subjects = {snap.id: (snap.to_dict() or {}).get("subject") for snap in self.db.get_all(refs, field_paths=["subject"]) if snap.exists}
+			for quiz_id, item in chunk:
+				item["subject"] = subjects.get(quiz_id)
+		aggregates = self._compute_aggregates(items)
+		aggregates["aggregatesVersion"] = AGGREGATES_VERSION
+		aggregates["longestStreak"] = self._longest_streak(items)
+		user_ref = self.db.collection(_Collections.USERS).document(user_id)
+		data = user_ref.get(field_paths=["username", "avatar"]).to_dict() or {}
+		batch = self.db.batch()
+		# Server-side max: the stored value may include runs kept alive by freezes
+		batch.update(user_ref, {
+			**aggregates,
+			"longestStreak": firestore.Maximum(aggregates["longestStreak"]),
+		})
+		# Submits only increment the all-time row, so a user who signed up before
+		# it carried their name would show up nameless on every board
+		profile = {k: data[k] for k in ("username", "avatar") if k in data}
+		if profile:
+			_stage_leaderboard_profile(self.db, batch, user_id, profile)
+		batch.commit()
+		self._invalidate_users([user_id])
+		self._apply_profile_locally(user_id, profile)
+		return aggregates
+
+	def reconcile_all_aggregates(self, page_size: int = 200) -> int:
+		self._ensure_init()
+		users_ref = self.db.collection(_Collections.USERS)
+		query = users_ref.order_by("__name__").select([]).limit(page_size)
+		processed = 0
+		last = None
+		while True:
+			page = (query.start_after(last) if last is not None else query).get()
+			for snap in page:
+				self.reconcile_user_aggregates(snap.id)
+			processed += len(page)
+			if len(page) < page_size:
+				return processed
+			last = page[-1]
 
 	# ---------- Quizzes ----------
 	def save_quiz(self, user_id: str, quiz: dict, meta: dict) -> dict:
@@ -209,18 +758,12 @@ class FirebaseService:
 			}
 			return {"id": "demo-quiz", "data": data}
 		self._ensure_init()
-		data = {
-			"userId": user_id,
-			"questions": quiz["questions"],
-			"subject": meta.get("subject"),
-			"difficulty": meta.get("difficulty"),
-			"createdAt": utc_now(),
-			"expiresAt": utc_now() + timedelta(hours=24),
-		}
+		data = _quiz_doc(user_id, quiz, meta)
 		doc_ref = self.db.collection(_Collections.QUIZZES).document()
-		doc_ref.set(data)
+		doc_ref.set(_stored_quiz(data))
 		return {"id": doc_ref.id, "data": data}
 
+	@coalesced
 	def get_quiz(self, quiz_id: str) -> dict:
 		if Config.DEMO_MODE:
 			return {"quizId": quiz_id, "questions": []}
@@ -228,122 +771,317 @@ class FirebaseService:
 		doc = self.db.collection(_Collections.QUIZZES).document(quiz_id).get()
 		if not doc.exists:
 			raise APIError("Quiz not found", 404)
-		return {"quizId": quiz_id, **(doc.to_dict() or {})}
+		return _public_quiz(quiz_id, doc.to_dict() or {})
+
+	@coalesced
+	def get_answer_key(self, quiz_id: str) -> dict:
+		"""Subject and packed answer key only: a few dozen bytes instead of the full quiz."""
+		if Config.DEMO_MODE:
+			return {"quizId": quiz_id, "subject": None, "answerKey": AnswerKey.from_questions([], 3)}
+		self._ensure_init()
+		doc = self.db.collection(_Collections.QUIZZES).document(quiz_id).get(field_paths=_ANSWER_KEY_FIELDS)
+		if not doc.exists:
+			raise APIError("Quiz not found", 404)
+		data = doc.to_dict() or {}
+		if "answerKey" not in data:
+			# Saved before answer keys existed
+			quiz = self.get_quiz(quiz_id)
+			return {"quizId": quiz_id, "subject": quiz.get("subject"), "answerKey": AnswerKey.from_questions(quiz.get("questions", []), quiz.get("difficulty"))}
+		return _answer_key(quiz_id, data)
 
-	def store_quiz_result(self, user_id: str, quiz_id: str, grading: dict) -> dict:
+	def store_quiz_result(self, user_id: str, quiz_id: str, grading: dict, subject: str | None = None) -> dict:
 		if Config.DEMO_MODE:
 			user = get_demo_user(user_id)
 			if user:
 				user["totalPoints"] = user.get("totalPoints", 0) + grading["pointsEarned"]
 				if grading["streakIncremented"]:
 					user["currentStreak"] = user.get("currentStreak", 0) + 1
-			return {
-				"score": grading["score"],
-				"totalQuestions": grading["totalQuestions"],
-				"pointsEarned": grading["pointsEarned"],
-				"streakIncremented": grading["streakIncremented"],
-				"correct": grading["correct"],
-				"message": grading["message"],
-			}
+			return _result_summary(grading)
+		if Config.SUBMIT_WRITE_BEHIND:
+			self._journal_result(user_id, quiz_id, grading, subject)
+			return _result_summary(grading)
 		self._ensure_init()
-		# Save progress
-		progress_root = self.db.collection(_Collections.PROGRESS).document(user_id)
-		progress_item = progress_root.collection("items").document(quiz_id)
-		payload = {
-			"score": grading["score"],
-			"pointsEarned": grading["pointsEarned"],
-			"streakIncremented": grading["streakIncremented"],
-			"completedAt": utc_now(),
-			"answers": grading["answers"],
-		}
-		progress_item.set(payload)
+		batch = self.db.batch()
+		_stage_quiz_result(self.db, batch, user_id, quiz_id, grading, subject)
+		try:
+			batch.commit()
+		except api_exceptions.AlreadyExists as e:
+			raise APIError("Quiz already submitted", 409) from e
+		self._apply_result_locally(user_id, grading)
+		return _result_summary(grading)
 
-		# Update user totals
-		user_ref = self.db.collection(_Collections.USERS).document(user_id)
-		user = user_ref.get().to_dict() or {}
-		current_streak = user.get("currentStreak", 0)
-		longest = user.get("longestStreak", 0)
-		if grading["streakIncremented"]:
-			current_streak += 1
-			longest = max(longest, current_streak)
-		user_update = {
-			"totalPoints": user.get("totalPoints", 0) + grading["pointsEarned"],
-			"currentStreak": current_streak,
-			"longestStreak": longest,
-			"lastQuizDate": utc_now(),
-		}
-		user_ref.update(user_update)
+	# ---------- Write-behind submissions ----------
+	def submission_journal(self):
+		"""The write-behind journal; opening it replays entries a previous process left."""
+		if self._journal is None:
+			from services.submission_journal import SubmissionJournal
+			with self._journal_lock:
+				if self._journal is None:
+					self._journal = SubmissionJournal(
+						Config.SUBMIT_JOURNAL_PATH,
+						self._flush_submissions,
+						batch_size=Config.SUBMIT_JOURNAL_BATCH,
+						interval=Config.SUBMIT_JOURNAL_FLUSH_SECONDS,
+						max_attempts=Config.SUBMIT_JOURNAL_MAX_ATTEMPTS,
+					)
+		return self._journal
 
-		# Leaderboard
-		self._update_leaderboards(user_id, user.get("username", ""), user.get("avatar", ""), user_update)
+	def _journal_result(self, user_id: str, quiz_id: str, grading: dict, subject: str | None) -> None:
+		journal = self.submission_journal()
+		# Already committed duplicates are dropped at flush; this catches the
+		# common double submit before it is acknowledged and overlaid
+		if any(entry["quizId"] == quiz_id for entry in journal.pending(user_id)):
+			raise APIError("Quiz already submitted", 409)
+		journal.append(user_id, {
+			"quizId": quiz_id,
+			"grading": grading,
+			"subject": subject,
+			"submittedAt": utc_now().isoformat(),
+		})
 
-		return {
-			"score": grading["score"],
-			"totalQuestions": grading["totalQuestions"],
-			"pointsEarned": grading["pointsEarned"],
-			"streakIncremented": grading["streakIncremented"],
-			"correct": grading["correct"],
-			"message": grading["message"],
-		}
+	def _with_pending(self, user: dict) -> dict:
+		if not Config.SUBMIT_WRITE_BEHIND:
+			return user
+		return _overlay_pending(user, self.submission_journal().pending(user["userId"]))
 
-	# ---------- Leaderboards ----------
-	def _update_leaderboards(self, user_id: str, username: str, avatar: str, update: dict):
+	def _flush_submissions(self, entries: list[dict]) -> None:
 		self._ensure_init()
-		for period in ("daily", "weekly", "all-time"):
-			lb_ref = self.db.collection(_Collections.LEADERBOARD).document(period)
-			lb_ref.set({"updatedAt": utc_now()}, merge=True)
-			lb_ref.collection("users").document(user_id).set({
-				"username": username,
-				"avatar": avatar,
-				"points": update.get("totalPoints", 0),
-				"streak": update.get("currentStreak", 0),
+		batch = self.db.batch()
+		for entry in entries:
+			# Created in the same commit: a replayed entry fails the batch instead of double-counting
+			batch.create(self.db.collection(_Collections.SUBMISSIONS).document(entry["id"]), {
+				"userId": entry["userId"],
+				"quizId": entry["quizId"],
+				"appliedAt": utc_now(),
+				"expiresAt": utc_now() + timedelta(days=7),
 			})
+			submitted_at = datetime.fromisoformat(entry["submittedAt"])
+			_stage_quiz_result(self.db, batch, entry["userId"], entry["quizId"], entry["grading"], entry["subject"], submitted_at)
+		try:
+			batch.commit()
+		except api_exceptions.AlreadyExists:
+			if len(entries) > 1:
+				raise  # the journal retries one by one
+			# Replayed, or a quiz already submitted: it counted once already
+			return
+		for entry in entries:
+			self._apply_result_locally(entry["userId"], entry["grading"])
+
+	def journal_stats(self) -> dict:
+		if not Config.SUBMIT_WRITE_BEHIND:
+			return {"enabled": False}
+		return {"enabled": True, **self.submission_journal().stats()}
+
+	def _apply_result_locally(self, user_id: str, grading: dict) -> None:
+		# In-process views of the user and leaderboards, updated once the batch commits
+		self._invalidate_users([user_id])
+		self.leaderboard_cache.clear()
+		self.friends_cache.invalidate_tag(user_id)
+		self.leaderboard_touch.mark()
+		if self.rank_index.tracking:
+			streak_delta = 1 if grading["streakIncremented"] else 0
+			self.rank_index.increment(user_id, grading["pointsEarned"], streak_delta=streak_delta)
+
+	def _apply_profile_locally(self, user_id: str, profile: dict) -> None:
+		if not profile:
+			return
+		self.leaderboard_cache.clear()
+		self.friends_cache.invalidate_tag(user_id)
+		if self.rank_index.tracking:
+			self.rank_index.update_row(user_id, profile)
+
+	# ---------- Leaderboards ----------
+	def _touch_leaderboards(self, changed_at: datetime) -> None:
+		self._ensure_init()
+		batch = self.db.batch()
+		for period in LEADERBOARD_PERIODS:
+			board = {"updatedAt": changed_at}
+			if period in _BUCKETED_PERIODS:
+				board.update(period=period, key=period_key(period, changed_at))
+			batch.set(self.db.collection(_Collections.LEADERBOARD).document(_board_id(period, changed_at)), board, merge=True)
+		batch.commit()
+		# Once per day per process, on the same background thread
+		day = period_key("daily", changed_at)
+		if day != self._pruned_day:
+			self.prune_leaderboards(changed_at)
+			self._pruned_day = day
 
+	@coalesced
 	def get_leaderboard(self, period: str) -> list[dict]:
 		if Config.DEMO_MODE:
 			return DEMO_LEADERBOARD_DAILY
+		board_id = _board_id(period)
+		cached = self.leaderboard_cache.get(board_id)
+		if cached is not None:
+			return cached
 		self._ensure_init()
-		users_ref = self.db.collection(_Collections.LEADERBOARD).document(period).collection("users")
+		users_ref = _board_users(self.db, board_id)
 		snaps = users_ref.order_by("points", direction=firestore.Query.DESCENDING).limit(10).get()
-		items = []
-		for idx, s in enumerate(snaps, start=1):
-			row = s.to_dict() or {}
-			items.append({
-				"rank": idx,
-				"username": row.get("username", ""),
-				"points": row.get("points", 0),
-				"streak": row.get("streak", 0),
-				"avatar": row.get("avatar", ""),
-			})
+		refs = _profile_refs(self.db, board_id, snaps)
+		profiles = self.db.get_all(refs, field_paths=_PROFILE_FIELDS) if refs else []
+		items = _leaderboard_rows(snaps, profiles)
+		self.leaderboard_cache.set(board_id, items)
 		return items
 
+	def prune_leaderboards(self, now: datetime | None = None) -> dict:
+		"""Delete daily/weekly buckets past retention, and the pre-bucket boards."""
+		if Config.DEMO_MODE:
+			return {"skipped": True}
+		self._ensure_init()
+		now = now or utc_now()
+		keep = {"daily": Config.LEADERBOARD_KEEP_DAYS, "weekly": Config.LEADERBOARD_KEEP_WEEKS}
+		oldest = {p: period_key(p, now - _BUCKET_SPANS[p] * max(0, keep[p] - 1)) for p in _BUCKETED_PERIODS}
+		summary = {"boards": 0, "rows": 0}
+		for board_ref in self.db.collection(_Collections.LEADERBOARD).list_documents():
+			for period in _BUCKETED_PERIODS:
+				prefix = f"{period}-"
+				# Bucket keys sort chronologically; a bare "daily"/"weekly" is the old lifetime board
+				if board_ref.id == period or (board_ref.id.startswith(prefix) and board_ref.id[len(prefix):] < oldest[period]):
+					summary["rows"] += self._delete_board(board_ref)
+					summary["boards"] += 1
+		if summary["boards"]:
+			logger.info("Pruned leaderboard buckets: %s", summary)
+		return summary
+
+	def _delete_board(self, board_ref) -> int:
+		users_ref = board_ref.collection("users")
+		deleted = 0
+		while True:
+			page = users_ref.select([]).limit(BATCH_WRITE_LIMIT).get()
+			if not page:
+				break
+			batch = self.db.batch()
+			for snap in page:
+				batch.delete(snap.reference)
+			batch.commit()
+			deleted += len(page)
+		board_ref.delete()
+		return deleted
+
 	def get_friends_leaderboard(self, user_id: str) -> list[dict]:
-		# Placeholder: return only current user's rank
-		return self.get_user_rank(user_id)
+		if Config.DEMO_MODE:
+			return DEMO_LEADERBOARD_DAILY
+		cached = self.friends_cache.get(user_id)
+		if cached is not None:
+			return cached
+		members = [user_id, *self.get_friend_ids(user_id)]
+		users_ref = self.db.collection(_Collections.LEADERBOARD).document("all-time").collection("users")
+		# One batched read for every friend's row instead of a get per friend
+		snaps = self.db.get_all([users_ref.document(uid) for uid in members], field_paths=_FRIEND_ROW_FIELDS)
+		items = _friend_rows(user_id, snaps)
+		self.friends_cache.set(user_id, items, tags=members)
+		return items
 
 	def get_user_rank(self, user_id: str) -> dict:
 		if Config.DEMO_MODE:
 			items = DEMO_LEADERBOARD_DAILY
 			rank = next((r["rank"] for r in items if r["username"] == (get_demo_user(user_id) or {}).get("username")), 3)
 			return {"currentRank": rank, "totalUsers": 2847, "pointsToNextRank": 100}
+		self._ensure_rank_index()
+		return self.rank_index.rank(user_id)
+
+	def get_rank_window(self, user_id: str, k: int = 5) -> list[dict]:
+		if Config.DEMO_MODE:
+			return DEMO_LEADERBOARD_DAILY
+		self._ensure_rank_index()
+		return self.rank_index.around(user_id, k)
+
+	def _rank_index_stale(self) -> bool:
+		refresh = Config.RANK_INDEX_REFRESH_SECONDS
+		loaded_at = self.rank_index.loaded_at
+		return loaded_at is None or (refresh > 0 and time.monotonic() - loaded_at >= refresh)
+
+	# ---------- Friends ----------
+	def get_friend_ids(self, user_id: str) -> list[str]:
+		if Config.DEMO_MODE:
+			return [uid for uid in DEMO_USERS_BY_ID if uid != user_id]
+		self._ensure_init()
+		snap = self.db.collection(_Collections.FRIENDS).document(user_id).get()
+		return list((snap.to_dict() or {}).get("ids", [])) if snap.exists else []
+
+	def add_friend(self, user_id: str, friend_id: str) -> dict:
+		if friend_id == user_id:
+			raise APIError("Cannot add yourself as a friend", 400)
+		if Config.DEMO_MODE:
+			return {"friendIds": self.get_friend_ids(user_id)}
+		self._ensure_init()
+		if not self.db.collection(_Collections.USERS).document(friend_id).get().exists:
+			raise APIError("User not found", 404)
+		refs = [self.db.collection(_Collections.FRIENDS).document(uid) for uid in (user_id, friend_id)]
+
+		# Both lists are read and capped in the transaction, so concurrent adds
+		# cannot push either side past FRIENDS_MAX
+		@firestore.transactional
+		def befriend(transaction):
+			snaps = self.db.get_all(refs, transaction=transaction)
+			friend_ids = {uid: [] for uid in (user_id, friend_id)}
+			friend_ids.update({snap.id: list((snap.to_dict() or {}).get("ids", [])) for snap in snaps if snap.exists})
+			added = _befriend(friend_ids, user_id, friend_id)
+			if added is not None:
+				_stage_friendship(self.db, transaction, user_id, friend_id, add=True)
+			return added, friend_ids[user_id]
+
+		added, current = befriend(self.db.transaction())
+		if added is None:
+			return {"friendIds": current}
+		self._apply_friendship_locally(user_id, friend_id)
+		return {"friendIds": added}
+
+	def remove_friend(self, user_id: str, friend_id: str) -> dict:
+		friend_ids = self.get_friend_ids(user_id)
+		if Config.DEMO_MODE or friend_id not in friend_ids:
+			return {"friendIds": friend_ids}
+		batch = self.db.batch()
+		_stage_friendship(self.db, batch, user_id, friend_id, add=False)
+		batch.commit()
+		self._apply_friendship_locally(user_id, friend_id)
+		return {"friendIds": [uid for uid in friend_ids if uid != friend_id]}
+
+	def _apply_friendship_locally(self, user_id: str, friend_id: str) -> None:
+		self.friends_cache.invalidate(user_id)
+		self.friends_cache.invalidate(friend_id)
+
+	def _ensure_rank_index(self) -> None:
+		"""Build the index if there is none; if it is stale, refresh it in the background."""
+		if self.rank_index.loaded:
+			if self._rank_index_stale():
+				self._refresh_rank_index()
+			return
+		with self._rank_index_lock:
+			# Another thread may have built it while we waited for the lock
+			if not self.rank_index.loaded:
+				self._rebuild_rank_index()
+
+	def _refresh_rank_index(self) -> None:
+		# Requests keep reading the current index while the new one streams in
+		if time.monotonic() < self._rank_index_retry_at or not self._rank_index_lock.acquire(blocking=False):
+			return
+
+		def refresh():
+			try:
+				self._rebuild_rank_index()
+			except Exception:
+				logger.exception("Rank index refresh failed; serving the previous index")
+				self._rank_index_retry_at = time.monotonic() + max(Config.RANK_INDEX_REFRESH_SECONDS, 1) / 10
+			finally:
+				self._rank_index_lock.release()
+
+		threading.Thread(target=refresh, name="rank-index-refresh", daemon=True).start()
+
+	def _rebuild_rank_index(self) -> None:
 		self._ensure_init()
 		users_ref = self.db.collection(_Collections.LEADERBOARD).document("all-time").collection("users")
-		snaps = users_ref.order_by("points", direction=firestore.Query.DESCENDING).get()
-		rank = None
-		for idx, s in enumerate(snaps, start=1):
-			if s.id == user_id:
-				rank = idx
-				points = s.to_dict().get("points", 0)
-				break
-			
-		total = len(snaps)
-		points_to_next = 0
-		if rank and rank > 1:
-			prev = snaps[rank - 2].to_dict()
-			points_to_next = max(0, prev.get("points", 0) - points)
-		return {"currentRank": rank or total, "totalUsers": total, "pointsToNextRank": points_to_next}
+		# Changes committed while the board streams are replayed onto the new index
+		self.rank_index.begin_load()
+		try:
+			snaps = users_ref.select(["username", "avatar", "points", "streak"]).stream()
+			self.rank_index.load((s.id, s.to_dict() or {}) for s in snaps)
+		except BaseException:
+			self.rank_index.abort_load()
+			raise
 
 	# ---------- Streaks ----------
+	@coalesced
 	def get_streak_status(self, user_id: str) -> dict:
 		self._ensure_init()
 		user = self.get_user(user_id)
@@ -361,12 +1099,59 @@ class FirebaseService:
 		points = user.get("totalPoints", 0)
 		if points < 50:
 			raise APIError("Not enough points", 400)
-		self.update_user(user_id, {"totalPoints": points - 50, "streakFrozen": True})
+		self.update_user(user_id, {"totalPoints": firestore.Increment(-50), "streakFrozen": True})
 		return {"success": True, "pointsUsed": 50}
 
-	def daily_streak_check(self) -> None:
-		# Placeholder: would iterate users and reset if missed
-		pass
+	def daily_streak_check(self, cutoff=None, page_size: int | None = None, shards: int | None = None) -> dict:
+		"""Reset streaks of users with no quiz since ``cutoff`` (default: start of yesterday, UTC)."""
+		if Config.DEMO_MODE:
+			return {"skipped": True}
+		from services.streak_reset import StreakResetJob
+		self._ensure_init()
+		job = StreakResetJob(
+			self.db,
+			page_size=page_size or Config.STREAK_RESET_PAGE_SIZE,
+			shards=shards or Config.STREAK_RESET_SHARDS,
+			on_reset=self._apply_streak_resets_locally,
+			on_thaw=self._invalidate_users,
+			lease=Config.STREAK_RESET_LEASE_SECONDS,
+		)
+		return job.run(cutoff)
+
+	def rescore_all(self, rules=None, page_size: int | None = None, dry_run: bool = False) -> dict:
+		"""Re-score every historical submission under ``rules`` (default: the live rules)."""
+		if Config.DEMO_MODE:
+			return {"skipped": True}
+		from services.rescore import RescoreJob
+		from services.scoring_service import scoring_service
+		self._ensure_init()
+		job = RescoreJob(
+			self.db,
+			rules or scoring_service.rules,
+			page_size=page_size or Config.RESCORE_PAGE_SIZE,
+			dry_run=dry_run,
+			on_change=self._apply_rescore_locally,
+		)
+		return job.run()
+
+	def _apply_rescore_locally(self, user_deltas: dict[str, int]) -> None:
+		self._invalidate_users(user_deltas)
+		self.leaderboard_cache.clear()
+		self.leaderboard_touch.mark()
+		for user_id, delta in user_deltas.items():
+			self.friends_cache.invalidate_tag(user_id)
+			if self.rank_index.tracking:
+				self.rank_index.increment(user_id, delta)
+
+	def _apply_streak_resets_locally(self, user_ids: list[str]) -> None:
+		self._invalidate_users(user_ids)
+		self.leaderboard_cache.clear()
+		self.leaderboard_touch.mark()
+		for user_id in user_ids:
+			self.friends_cache.invalidate_tag(user_id)
+		if self.rank_index.tracking:
+			for user_id in user_ids:
+				self.rank_index.update_row(user_id, {"streak": 0})
 
 
 firebase_service = FirebaseService()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable
+
+from utils.helpers import utc_now
+
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderboardTouch:
+	"""Keeps ``updatedAt`` of the leaderboard/{period} documents off the submit path.
+
+	Setting it in every submit's batch made all submissions write the same
+	three documents, past Firestore's sustained per-document write rate. A
+	commit now only calls ``mark``; one daemon thread passes the newest change
+	time to ``write`` at most once per ``interval``, so each process touches
+	those documents once per interval however busy submits are. The value is
+	advisory (nothing orders by it) and lags by up to ``interval``.
+	"""
+
+	def __init__(self, write: Callable[[datetime], None], interval: float = 10.0):
+		self.write = write
+		self.interval = interval
+		self._lock = threading.Lock()
+		self._changed_at: datetime | None = None
+		self._thread: threading.Thread | None = None
+		self.marks = 0
+		self.flushes = 0
+
+	def mark(self) -> None:
+		with self._lock:
+			self._changed_at = utc_now()
+			self.marks += 1
+			if self._thread is None:
+				self._thread = threading.Thread(target=self._run, name="leaderboard-touch", daemon=True)
+				self._thread.start()
+
+	def flush(self) -> bool:
+		"""Write the pending change time now; False when nothing changed."""
+		with self._lock:
+			changed_at, self._changed_at = self._changed_at, None
+		if changed_at is None:
+			return False
+		try:
+			self.write(changed_at)
+		except Exception:
+			with self._lock:
+				# Retried next interval unless a newer mark already replaced it
+				self._changed_at = self._changed_at or changed_at
+			raise
+		with self._lock:
+			self.flushes += 1
+		return True
+
+	def _run(self) -> None:
+		while True:
+			time.sleep(self.interval)
+			try:
+				self.flush()
+			except Exception:
+				logger.exception("Touching leaderboard updatedAt failed")
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable
+
+from utils.admission import RejectedError
+
+
+logger = logging.getLogger(__name__)
+
+# Generation parameters used to pre-build quizzes for each band
+BAND_PARAMS = {
+	"easy": {"difficulty": 2, "last_score": 50.0},
+	"moderate": {"difficulty": 3, "last_score": 70.0},
+	"hard": {"difficulty": 4, "last_score": 90.0},
+}
+
+
+def difficulty_band(last_score: float) -> str:
+	# Mirrors the bands in PROMPT_TEMPLATE
+	if last_score < 60:
+		return "easy"
+	if last_score <= 80:
+		return "moderate"
+	return "hard"
+
+
+def normalize_subject(subject: str) -> str:
+	return " ".join(str(subject).lower().split())
+
+
+def pool_key(subject: str, last_score: float) -> tuple[str, str]:
+	return normalize_subject(subject), difficulty_band(last_score)
+
+
+class QuizPool:
+	"""Per-(subject, band) stock of validated quizzes with a background refill worker.
+
+	A key is only stocked once it shows repeat demand: ``min_misses`` misses
+	within ``demand_window`` seconds. A one-off subject costs one live
+	generation, not ``capacity`` more. The generator may raise
+	``RejectedError`` when admission control has no room; the refill is then
+	dropped until the next request for the key.
+	"""
+
+	def __init__(
+		self,
+		generator: Callable[[str, int, float], dict],
+		capacity: int = 3,
+		low_water: int = 1,
+		max_age: int = 3600,
+		max_keys: int = 200,
+		min_misses: int = 2,
+		demand_window: float = 600.0,
+	):
+		self._generator = generator
+		self.capacity = capacity
+		self.low_water = low_water
+		self.max_age = max_age
+		self.max_keys = max_keys
+		self.min_misses = max(1, min_misses)
+		self.demand_window = demand_window
+		self._lock = threading.Lock()
+		self._pools: OrderedDict[tuple[str, str], deque[tuple[float, dict]]] = OrderedDict()
+		self._subjects: dict[tuple[str, str], str] = {}
+		self._misses: dict[tuple[str, str], deque[float]] = {}
+		self._pending: set[tuple[str, str]] = set()
+		self._queue: queue.Queue[tuple[str, str]] = queue.Queue()
+		self._worker: threading.Thread | None = None
+		self.hits = 0
+		self.misses = 0
+		self.refill_errors = 0
+		self.refills_deferred = 0
+
+	def take(self, subject: str, last_score: float) -> dict | None:
+		key = pool_key(subject, last_score)
+		with self._lock:
+			self._subjects.setdefault(key, str(subject).strip())
+			pool = self._touch(key)
+			self._evict_stale(pool)
+			quiz = pool.popleft()[1] if pool else None
+			if quiz is None:
+				self.misses += 1
+				needs_refill = self._record_miss(key)
+			else:
+				self.hits += 1
+				needs_refill = len(pool) < self.low_water
+		if needs_refill:
+			self.request_refill(key)
+		return quiz
+
+	def put(self, key: tuple[str, str], quiz: dict) -> bool:
+		with self._lock:
+			pool = self._touch(key)
+			if len(pool) >= self.capacity:
+				return False
+			pool.append((time.monotonic(), quiz))
+			return True
+
+	def request_refill(self, key: tuple[str, str]) -> None:
+		with self._lock:
+			if key in self._pending:
+				return
+			self._pending.add(key)
+		self._ensure_worker()
+		self._queue.put(key)
+
+	def stats(self) -> dict:
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				"keys": len(self._pools),
+				"quizzes": sum(len(p) for p in self._pools.values()),
+				"hits": self.hits,
+				"misses": self.misses,
+				"hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+				"refillErrors": self.refill_errors,
+				"refillsDeferred": self.refills_deferred,
+			}
+
+	def _touch(self, key: tuple[str, str]) -> deque:
+		pool = self._pools.get(key)
+		if pool is None:
+			pool = self._pools[key] = deque()
+			while len(self._pools) > self.max_keys:
+				old_key, _ = self._pools.popitem(last=False)
+				self._subjects.pop(old_key, None)
+				self._misses.pop(old_key, None)
+		else:
+			self._pools.move_to_end(key)
+		return pool
+
+	def _record_miss(self, key: tuple[str, str]) -> bool:
+		"""Note a miss on ``key``; True once it has been missed often enough to stock."""
+		now = time.monotonic()
+		misses = self._misses.setdefault(key, deque(maxlen=self.min_misses))
+		misses.append(now)
+		return len(misses) >= self.min_misses and now - misses[0] <= self.demand_window
+
+	def _evict_stale(self, pool: deque) -> None:
+		cutoff = time.monotonic() - self.max_age
+		while pool and pool[0][0] < cutoff:
+			pool.popleft()
+
+	def _ensure_worker(self) -> None:
+		if self._worker is not None and self._worker.is_alive():
+			return
+		with self._lock:
+			if self._worker is None or not self._worker.is_alive():
+				self._worker = threading.Thread(target=self._run, name="quiz-pool-refill", daemon=True)
+				self._worker.start()
+
+	def _run(self) -> None:
+		while True:
+			key = self._queue.get()
+			try:
+				self._refill(key)
+			finally:
+				with self._lock:
+					self._pending.discard(key)
+
+	def _refill(self, key: tuple[str, str]) -> None:
+		params = BAND_PARAMS[key[1]]
+		while True:
+			with self._lock:
+				if key not in self._pools:
+					return
+				pool = self._pools[key]
+				self._evict_stale(pool)
+				if len(pool) >= self.capacity:
+					return
+				subject = self._subjects.get(key, key[0])
+			try:
+				quiz = self._generator(subject, params["difficulty"], params["last_score"])
+			except RejectedError:
+				with self._lock:
+					self.refills_deferred += 1
+				return
+			except Exception:
+				self.refill_errors += 1
+				logger.exception("Quiz pool refill failed for %s", key)
+				return
+			if not self.put(key, quiz):
+				return
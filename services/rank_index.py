@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Iterable, Iterator
+
+
+_MAX_LEVELS = 24  # comfortably indexes ~16M users
+
+
+class _Node:
+
+	__slots__ = ("key", "next", "width")
+
+	def __init__(self, key, levels: int):
+		self.key = key
+		self.next: list[_Node | None] = [None] * levels
+		self.width: list[int] = [1] * levels
+
+
+class _IndexableSkipList:
+	"""Sorted skip list whose links carry widths, so positional lookups are O(log n)."""
+
+	def __init__(self):
+		self.size = 0
+		self.head = _Node(None, _MAX_LEVELS)
+
+	@staticmethod
+	def _random_levels() -> int:
+		levels = 1
+		while levels < _MAX_LEVELS and random.random() < 0.5:
+			levels += 1
+		return levels
+
+	def insert(self, key) -> None:
+		chain: list[_Node] = [self.head] * _MAX_LEVELS
+		steps_at_level = [0] * _MAX_LEVELS
+		node = self.head
+		for level in reversed(range(_MAX_LEVELS)):
+			nxt = node.next[level]
+			while nxt is not None and nxt.key <= key:
+				steps_at_level[level] += node.width[level]
+				node = nxt
+				nxt = node.next[level]
+			chain[level] = node
+		levels = self._random_levels()
+		new = _Node(key, levels)
+		steps = 0
+		for level in range(levels):
+			prev = chain[level]
+			new.next[level] = prev.next[level]
+			prev.next[level] = new
+			new.width[level] = prev.width[level] - steps
+			prev.width[level] = steps + 1
+			steps += steps_at_level[level]
+		for level in range(levels, _MAX_LEVELS):
+			chain[level].width[level] += 1
+		self.size += 1
+
+	def remove(self, key) -> None:
+		chain: list[_Node] = [self.head] * _MAX_LEVELS
+		node = self.head
+		for level in reversed(range(_MAX_LEVELS)):
+			nxt = node.next[level]
+			while nxt is not None and nxt.key < key:
+				node = nxt
+				nxt = node.next[level]
+			chain[level] = node
+		target = chain[0].next[0]
+		if target is None or target.key != key:
+			raise KeyError(key)
+		for level in range(len(target.next)):
+			prev = chain[level]
+			prev.width[level] += target.width[level] - 1
+			prev.next[level] = target.next[level]
+		for level in range(len(target.next), _MAX_LEVELS):
+			chain[level].width[level] -= 1
+		self.size -= 1
+
+	def count_less(self, key) -> int:
+		pos = 0
+		node = self.head
+		for level in reversed(range(_MAX_LEVELS)):
+			nxt = node.next[level]
+			while nxt is not None and nxt.key < key:
+				pos += node.width[level]
+				node = nxt
+				nxt = node.next[level]
+		return pos
+
+	def _node_at(self, index: int) -> _Node:
+		if not 0 <= index < self.size:
+			raise IndexError(index)
+		node = self.head
+		remaining = index + 1
+		for level in reversed(range(_MAX_LEVELS)):
+			while node.width[level] <= remaining and node.next[level] is not None:
+				remaining -= node.width[level]
+				node = node.next[level]
+				if remaining == 0:
+					return node
+		return node
+
+	def __getitem__(self, index: int):
+		return self._node_at(index).key
+
+	def iter_from(self, index: int) -> Iterator:
+		if index >= self.size:
+			return
+		node: _Node | None = self._node_at(index)
+		while node is not None:
+			yield node.key
+			node = node.next[0]
+
+
+class RankIndex:
+	"""In-memory order-statistic index over the all-time leaderboard.
+
+	Keys are ``(-points, user_id)`` so ascending order is the leaderboard order.
+	Ties share a rank: a user's rank is one plus the number of users with strictly
+	more points.
+
+	A rebuild calls ``begin_load`` before it starts reading the board; changes
+	made while the rows stream in go to the current index and are also
+	recorded, then replayed onto the new one when ``load`` swaps it in. A
+	change committed just before the rebuild's read can therefore count twice
+	until the next rebuild.
+	"""
+
+	def __init__(self):
+		self._lock = threading.RLock()
+		self._list = _IndexableSkipList()
+		self._entries: dict[str, tuple[int, dict]] = {}
+		self.loaded_at: float | None = None
+		self._replay: list[tuple[str, tuple]] | None = None
+
+	@property
+	def loaded(self) -> bool:
+		return self.loaded_at is not None
+
+	@property
+	def tracking(self) -> bool:
+		"""Whether changes should be applied: the index is loaded or being built."""
+		return self.loaded_at is not None or self._replay is not None
+
+	@property
+	def total(self) -> int:
+		return self._list.size
+
+	def begin_load(self) -> None:
+		with self._lock:
+			self._replay = []
+
+	def abort_load(self) -> None:
+		with self._lock:
+			self._replay = None
+
+	def _record(self, op: str, *args) -> None:
+		if self._replay is not None:
+			self._replay.append((op, args))
+
+	def load(self, rows: Iterable[tuple[str, dict]]) -> None:
+		skiplist = _IndexableSkipList()
+		entries: dict[str, tuple[int, dict]] = {}
+		for user_id, row in rows:
+			points = int(row.get("points", 0) or 0)
+			if user_id in entries:
+				skiplist.remove((-entries[user_id][0], user_id))
+			entries[user_id] = (points, dict(row))
+			skiplist.insert((-points, user_id))
+		with self._lock:
+			replay, self._replay = self._replay or [], None
+			self._list = skiplist
+			self._entries = entries
+			for op, args in replay:
+				getattr(self, op)(*args)
+			self.loaded_at = time.monotonic()
+
+	def set(self, user_id: str, points: int, row: dict | None = None) -> None:
+		with self._lock:
+			self._record("set", user_id, points, row)
+			self._set(user_id, points, row)
+
+	def _set(self, user_id: str, points: int, row: dict | None) -> None:
+		with self._lock:
+			previous = self._entries.get(user_id)
+			if previous is not None:
+				self._list.remove((-previous[0], user_id))
+				merged = {**previous[1], **(row or {})}
+			else:
+				merged = dict(row or {})
+			merged["points"] = int(points)
+			self._entries[user_id] = (int(points), merged)
+			self._list.insert((-int(points), user_id))
+
+	def increment(self, user_id: str, delta: int, row: dict | None = None, streak_delta: int = 0) -> None:
+		with self._lock:
+			self._record("increment", user_id, delta, row, streak_delta)
+			previous = self._entries.get(user_id)
+			row = dict(row or {})
+			if streak_delta:
+				row["streak"] = (previous[1].get("streak", 0) if previous else 0) + streak_delta
+			self._set(user_id, (previous[0] if previous else 0) + int(delta), row)
+
+	def update_row(self, user_id: str, fields: dict) -> None:
+		with self._lock:
+			self._record("update_row", user_id, dict(fields))
+			entry = self._entries.get(user_id)
+			if entry is not None:
+				entry[1].update(fields)
+
+	def remove(self, user_id: str) -> None:
+		with self._lock:
+			self._record("remove", user_id)
+			previous = self._entries.pop(user_id, None)
+			if previous is not None:
+				self._list.remove((-previous[0], user_id))
+
+	def rank(self, user_id: str) -> dict:
+		with self._lock:
+			total = self._list.size
+			entry = self._entries.get(user_id)
+			if entry is None:
+				return {"currentRank": total, "totalUsers": total, "pointsToNextRank": 0}
+			points = entry[0]
+			ahead = self._list.count_less((-points, ""))
+			points_to_next = 0
+			if ahead:
+				points_to_next = max(0, -self._list[ahead - 1][0] - points)
+			return {"currentRank": ahead + 1, "totalUsers": total, "pointsToNextRank": points_to_next}
+
+	def around(self, user_id: str, k: int) -> list[dict]:
+		with self._lock:
+			entry = self._entries.get(user_id)
+			if entry is None:
+				return []
+			pos = self._list.count_less((-entry[0], user_id))
+			start = max(0, pos - k)
+			items = []
+			rank = 0
+			prev_points = None
+			for offset, (neg_points, uid) in enumerate(self._list.iter_from(start)):
+				index = start + offset
+				if index > pos + k:
+					break
+				points = -neg_points
+				if prev_points is None:
+					rank = self._list.count_less((neg_points, "")) + 1
+				elif points != prev_points:
+					rank = index + 1
+				prev_points = points
+				row = self._entries[uid][1]
+				items.append({
+					"rank": rank,
+					"username": row.get("username", ""),
+					"points": points,
+					"streak": row.get("streak", 0),
+					"avatar": row.get("avatar", ""),
+					"isCurrentUser": uid == user_id,
+				})
+			return items
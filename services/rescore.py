@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import heapq
+import logging
+from typing import Callable
+
+import numpy as np
+from firebase_admin import firestore
+
+from services.answer_key import AnswerKey
+from services.firebase_service import _Collections, _stage_leaderboard_increments
+from services.scoring_service import ScoringRules
+from utils.helpers import utc_now
+
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batches with more than 500 writes
+BATCH_WRITE_LIMIT = 500
+# Per user group: totals, plus the all-time row (re-scoring leaves period buckets alone)
+_GROUP_OVERHEAD = 1 + 1
+_ITEM_FIELDS = ["pointsEarned", "correctCount", "difficulty", "score", "answers"]
+_REPORT_TOP = 10
+
+
+def rescore_points(correct: np.ndarray, difficulty: np.ndarray, rules: ScoringRules) -> np.ndarray:
+	"""``ScoringService.grade`` points for whole arrays, bit-for-bit the same float math."""
+	factor = 1 + (difficulty - 1) * (rules.difficulty_multiplier - 1)
+	return np.trunc(correct * rules.base_points_per_correct * factor).astype(np.int64)
+
+
+class RescoreJob:
+	"""Recomputes ``pointsEarned`` of every progress item under ``rules``.
+
+	Items are read with a collection-group scan ordered by path, so a user's
+	items arrive together and memory stays at one page. Points for a page are
+	computed in one NumPy pass, and each item's corrected value is written in
+	the same batch as its user's ``Increment`` of the difference. A page that
+	was already applied therefore yields no difference, which makes re-runs
+	idempotent; the cursor is checkpointed so a resumed run also skips the
+	reads. Items saved before ``correctCount``/``difficulty`` were recorded are
+	resolved from their quiz's answer key and backfilled.
+	"""
+
+	def __init__(
+		self,
+		db,
+		rules: ScoringRules,
+		page_size: int = 1000,
+		dry_run: bool = False,
+		checkpoint_path: tuple[str, str] = ("jobs", "rescore"),
+		on_change: Callable[[dict[str, int]], None] | None = None,
+	):
+		self.db = db
+		self.rules = rules
+		self.page_size = page_size
+		self.dry_run = dry_run
+		self.checkpoint_ref = db.collection(checkpoint_path[0]).document(checkpoint_path[1])
+		self.on_change = on_change
+		self._progress: dict = {}
+		self._largest: list[tuple[int, str, int]] = []
+		self._open_user: tuple[str, int] | None = None
+
+	def run(self) -> dict:
+		rules = {"basePointsPerCorrect": self.rules.base_points_per_correct, "difficultyMultiplier": self.rules.difficulty_multiplier}
+		after = None
+		resumed = False
+		if not self.dry_run:
+			checkpoint = self.checkpoint_ref.get().to_dict() or {}
+			resumed = checkpoint.get("status") == "running" and checkpoint.get("rules") == rules
+			after = checkpoint.get("after") if resumed else None
+			if not resumed:
+				self.checkpoint_ref.set({"status": "running", "rules": rules, "startedAt": utc_now(), "after": None})
+
+		self._progress = {"scanned": 0, "changed": 0, "backfilled": 0, "unresolved": 0, "usersAffected": 0, "pointsDelta": 0, "pages": 0}
+		self._largest = []
+		self._open_user = None
+		query = (
+			self.db.collection_group("items")
+			.order_by("__name__")
+			.select(_ITEM_FIELDS)
+			.limit(self.page_size)
+		)
+		while True:
+			page_query = query.start_after({"__name__": self._item_ref(*after)}) if after else query
+			# Other subcollections named "items" are not progress
+			page = page_query.get()
+			items = [snap for snap in page if snap.reference.parent.parent.parent.id == _Collections.PROGRESS]
+			if page:
+				last = page[-1].reference
+				after = [last.parent.parent.parent.id, last.parent.parent.id, last.id]
+			done = len(page) < self.page_size
+			self._apply_page(items, {"after": after, "status": "done" if done else "running"})
+			self._progress["pages"] += 1
+			logger.info("Rescore: %s", self._progress)
+			if done:
+				break
+		self._close_user(None, 0)
+
+		summary = {"dryRun": self.dry_run, "resumed": resumed, "rules": rules, **self._progress}
+		summary["largestChanges"] = [{"userId": uid, "pointsDelta": delta} for _, uid, delta in sorted(self._largest, reverse=True)]
+		logger.info("Rescore finished: %s", summary)
+		return summary
+
+	def _item_ref(self, root: str, user_id: str, item_id: str):
+		return self.db.collection(root).document(user_id).collection("items").document(item_id)
+
+	def _apply_page(self, snaps: list, checkpoint: dict) -> None:
+		rows = [snap.to_dict() or {} for snap in snaps]
+		user_ids = np.array([snap.reference.parent.parent.id for snap in snaps], dtype=object)
+		legacy = [i for i, row in enumerate(rows) if row.get("correctCount") is None or row.get("difficulty") is None]
+		resolved = self._resolve_legacy([snaps[i].id for i in legacy], [rows[i] for i in legacy])
+		for i, fields in zip(legacy, resolved):
+			if fields:
+				rows[i].update(fields)
+
+		known = np.array([row.get("correctCount") is not None and row.get("difficulty") is not None for row in rows], dtype=bool)
+		correct = np.array([row.get("correctCount") or 0 for row in rows], dtype=np.int64)
+		difficulty = np.array([row.get("difficulty") or 0 for row in rows], dtype=np.int64)
+		old = np.array([int(row.get("pointsEarned") or 0) for row in rows], dtype=np.int64)
+		new = np.where(known, rescore_points(correct, difficulty, self.rules), old)
+		delta = new - old
+		changed = delta != 0
+		backfill = np.zeros(len(rows), dtype=bool)
+		backfill[[i for i, fields in zip(legacy, resolved) if fields]] = True
+
+		self._progress["scanned"] += len(rows)
+		self._progress["unresolved"] += int((~known).sum())
+		self._progress["changed"] += int(changed.sum())
+		self._progress["backfilled"] += int(backfill.sum())
+		self._progress["pointsDelta"] += int(delta.sum())
+
+		# Per-user totals for the page in one pass; ids keep scan (path) order
+		users, first, inverse = np.unique(user_ids, return_index=True, return_inverse=True)
+		sums = np.bincount(inverse, weights=delta, minlength=len(users)).astype(np.int64)
+		for n in np.argsort(first):
+			self._close_user(users[n], int(sums[n]))
+
+		if self.dry_run:
+			return
+		touched = np.nonzero(changed | backfill)[0]
+		touched = touched[np.argsort(inverse[touched], kind="stable")]
+		groups = [
+			(users[inverse[members[0]]], members)
+			for members in np.split(touched, np.flatnonzero(np.diff(inverse[touched])) + 1)
+			if len(members)
+		]
+		self._commit(snaps, rows, new, groups, checkpoint)
+		user_deltas = {users[n]: int(sums[n]) for n in range(len(users)) if sums[n]}
+		if user_deltas and self.on_change:
+			self.on_change(user_deltas)
+
+	def _resolve_legacy(self, quiz_ids: list[str], rows: list[dict]) -> list[dict | None]:
+		if not quiz_ids:
+			return []
+		refs = [self.db.collection(_Collections.QUIZZES).document(quiz_id) for quiz_id in dict.fromkeys(quiz_ids)]
+		quizzes = {snap.id: snap.to_dict() or {} for snap in self.db.get_all(refs, field_paths=["answerKey", "difficulty"]) if snap.exists}
+		resolved = []
+		for quiz_id, row in zip(quiz_ids, rows):
+			quiz = quizzes.get(quiz_id)
+			if quiz is None:
+				# The quiz expired before answer keys were recorded on the item
+				resolved.append(None)
+				continue
+			key = AnswerKey.unpack(quiz["answerKey"]) if quiz.get("answerKey") else None
+			total = len(key) if key is not None else len(row.get("answers") or [])
+			diff = key.difficulty if key is not None else int(quiz.get("difficulty") or 3)
+			# score is round(100 * correct / total), which is invertible for any quiz length we generate
+			resolved.append({"correctCount": int(round((row.get("score") or 0) * total / 100)), "difficulty": diff})
+		return resolved
+
+	def _close_user(self, user_id: str | None, delta: int) -> None:
+		# Items are path-ordered, so a user's total is final once the next user starts
+		if self._open_user is not None and self._open_user[0] == user_id:
+			self._open_user = (user_id, self._open_user[1] + delta)
+			return
+		if self._open_user is not None and self._open_user[1]:
+			uid, total = self._open_user
+			self._progress["usersAffected"] += 1
+			entry = (abs(total), uid, total)
+			if len(self._largest) < _REPORT_TOP:
+				heapq.heappush(self._largest, entry)
+			else:
+				heapq.heappushpop(self._largest, entry)
+		self._open_user = (user_id, delta) if user_id is not None else None
+
+	def _commit(self, snaps: list, rows: list[dict], new: np.ndarray, groups: list, checkpoint: dict) -> None:
+		limit = BATCH_WRITE_LIMIT - 1  # room for the checkpoint update
+		chunk = limit - _GROUP_OVERHEAD
+		batch = self.db.batch()
+		pending = 0
+		for user_id, members in groups:
+			# A user's items and their total move together, split only past one batch
+			for start in range(0, len(members), chunk):
+				part = members[start:start + chunk]
+				part_delta = int(sum(int(new[i]) - int(rows[i].get("pointsEarned") or 0) for i in part))
+				if pending + len(part) + _GROUP_OVERHEAD > limit:
+					batch.commit()
+					batch, pending = self.db.batch(), 0
+				for i in part:
+					batch.update(snaps[i].reference, {
+						"pointsEarned": int(new[i]),
+						"correctCount": int(rows[i]["correctCount"]),
+						"difficulty": int(rows[i]["difficulty"]),
+					})
+				pending += len(part)
+				if part_delta:
+					batch.update(self.db.collection(_Collections.USERS).document(user_id), {"totalPoints": firestore.Increment(part_delta)})
+					_stage_leaderboard_increments(self.db, batch, user_id, part_delta, 0)
+					pending += _GROUP_OVERHEAD
+		batch.update(self.checkpoint_ref, checkpoint)
+		batch.commit()
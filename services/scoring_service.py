@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import List
 from utils.helpers import utc_now
+from services.answer_key import AnswerKey
 
 
 @dataclass
@@ -18,23 +19,28 @@ class ScoringService:
 		self.rules = rules or ScoringRules()
 
 	def grade_quiz(self, quiz: dict, answers: List[str]) -> dict:
-		questions = quiz.get("questions", [])
-		total = len(questions)
+		return self.grade(AnswerKey.from_questions(quiz.get("questions", []), quiz.get("difficulty", 3)), answers)
+
+	def grade(self, key: AnswerKey, answers: List) -> dict:
+		"""Grade option strings or option indices against a stored answer key."""
+		total = len(key)
 		correct_flags: List[bool] = []
 		correct_count = 0
-		for i, q in enumerate(questions):
-			correct = (answers[i] if i < len(answers) else None) == q.get("correctAnswer")
-			correct_flags.append(bool(correct))
+		for i in range(total):
+			correct = key.is_correct(i, answers[i] if i < len(answers) else None)
+			correct_flags.append(correct)
 			if correct:
 				correct_count += 1
 		score = int(round((correct_count / max(1, total)) * 100))
-		avg_difficulty = int(quiz.get("difficulty", 3))
+		avg_difficulty = key.difficulty
 		points = int(correct_count * self.rules.base_points_per_correct * (1 + (avg_difficulty - 1) * (self.rules.difficulty_multiplier - 1)))
 		streak_incremented = score >= 60
 		message = "Great job!" if streak_incremented else "Keep practicing!"
 		return {
 			"score": score,
 			"totalQuestions": total,
+			"correctCount": correct_count,
+			"difficulty": avg_difficulty,
 			"pointsEarned": points,
 			"streakIncremented": streak_incremented,
 			"correct": correct_flags,
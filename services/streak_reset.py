@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable
+
+from utils.errors import APIError
+from utils.helpers import utc_now
+from services.firebase_service import _Collections, firestore
+
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batches with more than 500 writes
+BATCH_WRITE_LIMIT = 500
+
+
+# A user is due for a check by their last quiz, or by the run that last used
+# their freeze when no quiz has followed it
+_SCANNED_FIELDS = ("lastQuizDate", "streakCheckedAt")
+_ROW_FIELDS = ["lastQuizDate", "streakCheckedAt", "currentStreak", "longestStreak", "streakFrozen"]
+
+
+def start_of_day(moment: datetime) -> datetime:
+	return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def missed_day_cutoff(now: datetime | None = None) -> datetime:
+	"""Start of yesterday (UTC): a last quiz before it means a whole missed day."""
+	return start_of_day(now or utc_now()) - timedelta(days=1)
+
+
+def _due_field(row: dict) -> str:
+	"""Which scan owns ``row``, so a user seen by both is handled once."""
+	checked, last_quiz = row.get("streakCheckedAt"), row.get("lastQuizDate")
+	if checked is not None and (last_quiz is None or checked > last_quiz):
+		return "streakCheckedAt"
+	return "lastQuizDate"
+
+
+class StreakResetJob:
+	"""Resets the streaks of users whose last quiz falls before ``cutoff``.
+
+	Only users whose ``lastQuizDate`` lies in ``[since, cutoff)`` can have
+	broken their streak since the previous run, so the job range-scans that
+	window (single-field index) instead of the whole collection. A used freeze
+	stamps ``streakCheckedAt`` with the run's cutoff, and a second scan over
+	that field brings the user back the next day if no quiz followed. Each
+	window is split into time slices that run in parallel, each paging with a
+	``(field, __name__)`` cursor. Cursors are checkpointed after every page so
+	an interrupted run resumes where it stopped; the checkpoint also carries a
+	lease, so only one run works at a time.
+	"""
+
+	def __init__(
+		self,
+		db,
+		page_size: int = 500,
+		shards: int = 4,
+		checkpoint_path: tuple[str, str] = ("jobs", "streak-reset"),
+		on_reset: Callable[[list[str]], None] | None = None,
+		on_thaw: Callable[[list[str]], None] | None = None,
+		lease: float = 300.0,
+	):
+		self.db = db
+		self.page_size = page_size
+		self.shards = max(1, shards)
+		self.checkpoint_ref = db.collection(checkpoint_path[0]).document(checkpoint_path[1])
+		self.on_reset = on_reset
+		self.on_thaw = on_thaw
+		self.lease = lease
+		self._lock = threading.Lock()
+		self._progress: dict = {}
+		self._cutoff: datetime | None = None
+
+	def run(self, cutoff: datetime | None = None) -> dict:
+		cutoff = cutoff or missed_day_cutoff()
+		claim = self._claim(cutoff)
+		if claim is None:
+			return {"cutoff": cutoff.isoformat(), "skipped": True}
+		since, shard_count, shard_states, resumed = claim
+		self._cutoff = cutoff
+		bounds = [(field, lo, hi) for field in _SCANNED_FIELDS for lo, hi in self._slice(since, cutoff, shard_count)]
+		self._progress = {"scanned": 0, "reset": 0, "freezesUsed": 0, "pages": 0}
+		try:
+			with ThreadPoolExecutor(max_workers=len(bounds), thread_name_prefix="streak-reset") as pool:
+				futures = [
+					pool.submit(self._run_shard, idx, field, lo, hi, shard_states.get(idx) or {})
+					for idx, (field, lo, hi) in enumerate(bounds)
+				]
+				for future in futures:
+					future.result()
+		except Exception:
+			# Give the lease up so a retry resumes at once instead of waiting it out
+			self.checkpoint_ref.update({"leaseUntil": utc_now()})
+			raise
+
+		self.checkpoint_ref.update({
+			"status": "done",
+			"finishedAt": utc_now(),
+			"lastCompletedCutoff": cutoff,
+		})
+		summary = {"cutoff": cutoff.isoformat(), "since": since.isoformat(), "resumed": resumed, "shards": len(bounds), **self._progress}
+		logger.info("Streak reset finished: %s", summary)
+		return summary
+
+	def _earliest(self, cutoff: datetime) -> datetime:
+		first = (
+			self.db.collection(_Collections.USERS)
+			.where("lastQuizDate", "<", cutoff)
+			.order_by("lastQuizDate")
+			.select(["lastQuizDate"])
+			.limit(1)
+			.get()
+		)
+		return (first[0].to_dict() or {})["lastQuizDate"] if first else cutoff
+
+	def _claim(self, cutoff: datetime) -> tuple[datetime, int, dict, bool] | None:
+		"""Take the checkpoint for this run: ``(since, shards, shard states, resumed)``.
+
+		Refuses with 409 while another run holds an unexpired lease; a lapsed
+		lease means that run died, and a run for the same cutoff resumes it.
+		"""
+
+		@firestore.transactional
+		def claim(transaction):
+			checkpoint = self.checkpoint_ref.get(transaction=transaction).to_dict() or {}
+			now = utc_now()
+			running = checkpoint.get("status") == "running"
+			if running and (checkpoint.get("leaseUntil") or now) > now:
+				raise APIError("A streak reset is already running", 409)
+			lease = {"leaseUntil": now + timedelta(seconds=self.lease)}
+			if running and checkpoint.get("cutoff") == cutoff:
+				transaction.update(self.checkpoint_ref, lease)
+				shard_states = {int(k): v for k, v in (checkpoint.get("shards") or {}).items()}
+				return checkpoint["since"], checkpoint.get("shardCount") or self.shards, shard_states, True
+			# Catch up from the last completed run so a skipped day is not missed;
+			# the first run has no such mark and starts from the oldest last quiz
+			since = checkpoint.get("lastCompletedCutoff") or self._earliest(cutoff)
+			if since >= cutoff:
+				return None
+			transaction.set(self.checkpoint_ref, {
+				"status": "running",
+				"since": since,
+				"cutoff": cutoff,
+				"startedAt": now,
+				"shardCount": self.shards,
+				"shards": {},
+				"lastCompletedCutoff": checkpoint.get("lastCompletedCutoff"),
+				**lease,
+			})
+			return since, self.shards, {}, False
+
+		return claim(self.db.transaction())
+
+	@staticmethod
+	def _slice(since: datetime, cutoff: datetime, shards: int) -> list[tuple[datetime, datetime]]:
+		step = (cutoff - since) / shards
+		edges = [since + step * i for i in range(shards)] + [cutoff]
+		return list(zip(edges[:-1], edges[1:]))
+
+	def _run_shard(self, idx: int, field: str, lo: datetime, hi: datetime, state: dict) -> None:
+		if state.get("done"):
+			return
+		query = (
+			self.db.collection(_Collections.USERS)
+			.where(field, ">=", lo)
+			.where(field, "<", hi)
+			.order_by(field)
+			.order_by("__name__")
+			.select(_ROW_FIELDS)
+			.limit(self.page_size)
+		)
+		after = state.get("after")
+		while True:
+			page_query = query.start_after({field: after["value"], "__name__": after["id"]}) if after else query
+			page = page_query.get()
+			if page:
+				last = page[-1]
+				after = {"value": (last.to_dict() or {}).get(field), "id": last.id}
+			done = len(page) < self.page_size
+			# The cursor commits with the page's last transaction, so a resumed run never
+			# re-applies a page (which would reset streaks whose freeze it just used)
+			cursor = {f"shards.{idx}": {"field": field, "after": after, "done": done, "lo": lo, "hi": hi}}
+			reset, freezes = self._apply([snap for snap in page if _due_field(snap.to_dict() or {}) == field], cursor)
+			with self._lock:
+				self._progress["scanned"] += len(page)
+				self._progress["reset"] += len(reset)
+				self._progress["freezesUsed"] += freezes
+				self._progress["pages"] += 1
+				logger.info("Streak reset shard %d: %s", idx, self._progress)
+			if done:
+				return
+
+	def _apply(self, page, cursor: dict) -> tuple[list[str], int]:
+		reset = []
+		thawed = []
+		# A reset writes the user and their all-time row; one write is left for the checkpoint
+		chunk = (BATCH_WRITE_LIMIT - 1) // 2
+		starts = list(range(0, len(page), chunk)) or [0]
+		for start in starts:
+			refs = [snap.reference for snap in page[start:start + chunk]]
+			chunk_reset, chunk_thawed = self._settle(refs, cursor if start == starts[-1] else None)
+			reset += chunk_reset
+			thawed += chunk_thawed
+		if reset and self.on_reset:
+			self.on_reset(reset)
+		if thawed and self.on_thaw:
+			self.on_thaw(thawed)
+		return reset, len(thawed)
+
+	def _settle(self, refs: list, cursor: dict | None) -> tuple[list[str], list[str]]:
+		"""Reset or thaw ``refs`` in a transaction that re-reads them first.
+
+		The page was read earlier; a submit since then moved ``lastQuizDate``
+		past the cutoff and incremented the streak, so that user is skipped
+		rather than written back to 0.
+		"""
+
+		@firestore.transactional
+		def settle(transaction):
+			reset = []
+			thawed = []
+			snaps = self.db.get_all(refs, field_paths=_ROW_FIELDS, transaction=transaction) if refs else []
+			for snap in snaps:
+				row = snap.to_dict() or {}
+				last_quiz = row.get("lastQuizDate")
+				if not snap.exists or (last_quiz is not None and last_quiz >= self._cutoff):
+					continue
+				if row.get("streakFrozen"):
+					# A freeze absorbs one missed day; the stamp brings the user back
+					# to the next run, which resets them unless they quiz meanwhile
+					transaction.update(snap.reference, {"streakFrozen": False, "streakCheckedAt": self._cutoff})
+					thawed.append(snap.id)
+				elif row.get("currentStreak", 0):
+					# Submits only increment currentStreak, so the longest streak is
+					# settled here, before the run it records is lost
+					longest = max(row.get("longestStreak", 0) or 0, row["currentStreak"])
+					transaction.update(snap.reference, {"currentStreak": 0, "longestStreak": longest})
+					# Period buckets read streaks from the all-time row
+					lb_row = self.db.collection(_Collections.LEADERBOARD).document("all-time").collection("users").document(snap.id)
+					transaction.set(lb_row, {"streak": 0}, merge=True)
+					reset.append(snap.id)
+			if cursor is not None:
+				# Every page renews the lease that keeps a second run out
+				transaction.update(self.checkpoint_ref, {**cursor, "leaseUntil": utc_now() + timedelta(seconds=self.lease)})
+			return reset, thawed
+
+		return settle(self.db.transaction())
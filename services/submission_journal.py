@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable
+
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+	seq INTEGER PRIMARY KEY AUTOINCREMENT,
+	id TEXT NOT NULL UNIQUE,
+	user_id TEXT NOT NULL,
+	entry TEXT NOT NULL,
+	created REAL NOT NULL,
+	attempts INTEGER NOT NULL DEFAULT 0,
+	lease_until REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS submissions_user ON submissions (user_id);
+CREATE TABLE IF NOT EXISTS dead_letters (
+	seq INTEGER PRIMARY KEY,
+	id TEXT NOT NULL UNIQUE,
+	user_id TEXT NOT NULL,
+	entry TEXT NOT NULL,
+	created REAL NOT NULL,
+	attempts INTEGER NOT NULL,
+	failed_at REAL NOT NULL,
+	error TEXT NOT NULL
+);
+"""
+
+
+class SubmissionJournal:
+	"""Durable write-behind queue of graded submissions (SQLite, WAL mode).
+
+	``append`` commits an entry to the local file and returns; a flusher
+	thread hands entries to ``flush`` in batches and deletes them once it
+	returns. Entries are claimed under a lease, so every worker process can
+	share one file and a crashed worker's claims are picked up again. A failed
+	batch is retried entry by entry, so one bad entry backs off alone; after
+	``max_attempts`` it moves to the ``dead_letters`` table for an operator
+	and stops counting as pending. ``flush`` may see an entry twice (a crash
+	between the remote commit and the local delete) and must be idempotent.
+	Until flushed, ``pending`` returns a user's entries for read-your-writes
+	overlays.
+	"""
+
+	def __init__(
+		self,
+		path: str,
+		flush: Callable[[list[dict]], None],
+		batch_size: int = 50,
+		interval: float = 0.5,
+		lease: float = 30.0,
+		max_backoff: float = 300.0,
+		max_attempts: int = 10,
+	):
+		self.path = path
+		self.flush = flush
+		self.batch_size = max(1, batch_size)
+		self.interval = interval
+		self.lease = lease
+		self.max_backoff = max_backoff
+		self.max_attempts = max(1, max_attempts)
+		self._local = threading.local()
+		self._wake = threading.Event()
+		self._stats_lock = threading.Lock()
+		self.flushed = 0
+		self.failures = 0
+		self.dead_lettered = 0
+		directory = os.path.dirname(os.path.abspath(path))
+		os.makedirs(directory, exist_ok=True)
+		self._conn().executescript(_SCHEMA)
+		self._thread = threading.Thread(target=self._run, name="submission-journal", daemon=True)
+		self._thread.start()
+
+	def _conn(self) -> sqlite3.Connection:
+		conn = getattr(self._local, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+			conn.execute("PRAGMA journal_mode=WAL")
+			# fsync each commit: an acknowledged submission survives a power loss
+			conn.execute("PRAGMA synchronous=FULL")
+			self._local.conn = conn
+		return conn
+
+	def append(self, user_id: str, entry: dict) -> str:
+		entry_id = uuid.uuid4().hex
+		self._conn().execute(
+			"INSERT INTO submissions (id, user_id, entry, created) VALUES (?, ?, ?, ?)",
+			(entry_id, user_id, json.dumps({**entry, "id": entry_id, "userId": user_id}), time.time()),
+		)
+		self._wake.set()
+		return entry_id
+
+	def pending(self, user_id: str) -> list[dict]:
+		rows = self._conn().execute("SELECT entry FROM submissions WHERE user_id = ? ORDER BY seq", (user_id,)).fetchall()
+		return [json.loads(row[0]) for row in rows]
+
+	def _claim(self) -> list[tuple[int, int, dict]]:
+		conn = self._conn()
+		now = time.time()
+		conn.execute("BEGIN IMMEDIATE")
+		try:
+			rows = conn.execute(
+				"SELECT seq, attempts, entry FROM submissions WHERE lease_until <= ? ORDER BY seq LIMIT ?",
+				(now, self.batch_size),
+			).fetchall()
+			conn.executemany("UPDATE submissions SET lease_until = ? WHERE seq = ?", [(now + self.lease, row[0]) for row in rows])
+			conn.execute("COMMIT")
+		except BaseException:
+			conn.execute("ROLLBACK")
+			raise
+		return [(seq, attempts, json.loads(entry)) for seq, attempts, entry in rows]
+
+	def drain(self) -> int:
+		"""Flush everything claimable now; returns the number of entries flushed."""
+		total = 0
+		while True:
+			claimed = self._claim()
+			if not claimed:
+				return total
+			try:
+				self.flush([entry for _, _, entry in claimed])
+				self._done([seq for seq, _, _ in claimed])
+				total += len(claimed)
+			except Exception as e:
+				if len(claimed) == 1:
+					self._failed(*claimed[0], e)
+					continue
+				for seq, attempts, entry in claimed:
+					try:
+						self.flush([entry])
+					except Exception as e:
+						self._failed(seq, attempts, entry, e)
+					else:
+						self._done([seq])
+						total += 1
+
+	def _done(self, seqs: list[int]) -> None:
+		self._conn().executemany("DELETE FROM submissions WHERE seq = ?", [(seq,) for seq in seqs])
+		with self._stats_lock:
+			self.flushed += len(seqs)
+
+	def _failed(self, seq: int, attempts: int, entry: dict, error: Exception) -> None:
+		if attempts + 1 >= self.max_attempts:
+			self._dead_letter(seq, attempts + 1, entry, error)
+			return
+		logger.exception("Flushing submission %s failed (attempt %d)", entry.get("id"), attempts + 1)
+		backoff = min(self.max_backoff, self.interval * (2 ** attempts))
+		self._conn().execute(
+			"UPDATE submissions SET attempts = attempts + 1, lease_until = ? WHERE seq = ?",
+			(time.time() + backoff, seq),
+		)
+		with self._stats_lock:
+			self.failures += 1
+
+	def _dead_letter(self, seq: int, attempts: int, entry: dict, error: Exception) -> None:
+		logger.error(
+			"Submission %s for user %s failed %d times; moved to dead_letters: %r",
+			entry.get("id"), entry.get("userId"), attempts, error,
+		)
+		conn = self._conn()
+		conn.execute("BEGIN IMMEDIATE")
+		try:
+			conn.execute(
+				"INSERT OR REPLACE INTO dead_letters (seq, id, user_id, entry, created, attempts, failed_at, error)"
+				" SELECT seq, id, user_id, entry, created, ?, ?, ? FROM submissions WHERE seq = ?",
+				(attempts, time.time(), repr(error), seq),
+			)
+			conn.execute("DELETE FROM submissions WHERE seq = ?", (seq,))
+			conn.execute("COMMIT")
+		except BaseException:
+			conn.execute("ROLLBACK")
+			raise
+		with self._stats_lock:
+			self.failures += 1
+			self.dead_lettered += 1
+
+	def dead_letters(self) -> list[dict]:
+		rows = self._conn().execute("SELECT entry, attempts, failed_at, error FROM dead_letters ORDER BY seq").fetchall()
+		return [{"entry": json.loads(entry), "attempts": attempts, "failedAt": failed_at, "error": error} for entry, attempts, failed_at, error in rows]
+
+	def _run(self) -> None:
+		while True:
+			self._wake.wait(self.interval)
+			self._wake.clear()
+			try:
+				self.drain()
+			except Exception:
+				logger.exception("Submission journal flush loop failed")
+
+	def stats(self) -> dict:
+		conn = self._conn()
+		count, oldest = conn.execute("SELECT COUNT(*), MIN(created) FROM submissions").fetchone()
+		(dead,) = conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()
+		with self._stats_lock:
+			return {
+				"pending": count,
+				"oldestAgeSeconds": round(time.time() - oldest, 3) if oldest else 0,
+				"flushed": self.flushed,
+				"failures": self.failures,
+				"deadLetters": dead,
+			}
@@ -0,0 +1,27 @@
+import pytest
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+	"""``benchmarks.fakes.install()``, with the service singletons restored afterwards."""
+	import services.firebase_service as firebase_module
+	import utils.decorators as decorators
+	from benchmarks import fakes
+	from services.ai_service import ai_service
+	from services.firebase_service import firebase_service
+	from utils.token_cache import token_cache
+
+	for target, name in (
+		(firebase_service, "db"),
+		(firebase_service, "_initialized"),
+		(firebase_service, "rank_index"),
+		(firebase_module, "fb_auth"),
+		(decorators, "fb_auth"),
+		(ai_service, "model"),
+	):
+		monkeypatch.setattr(target, name, getattr(target, name, None), raising=False)
+	yield fakes.install()
+	# Nothing read from the fakes may outlive them
+	firebase_service.leaderboard_cache.clear()
+	firebase_service.user_cache.clear()
+	token_cache.clear()
@@ -0,0 +1,42 @@
+def test_orjson_provider_and_compression():
+	import gzip
+	from datetime import datetime, timezone
+	from flask import Flask
+	from utils.compression import register_compression
+	from utils.json_provider import install_json_provider
+
+	class Stamp(datetime):
+		# Firestore returns a datetime subclass, which orjson does not encode itself
+		pass
+
+	app = Flask(__name__)
+	install_json_provider(app, "orjson")
+	register_compression(app)
+	at = Stamp(2026, 10, 17, 8, 30, tzinfo=timezone.utc)
+
+	@app.get("/small")
+	def small():
+		return {"at": at, 1: "x"}
+
+	@app.get("/large")
+	def large():
+		return {"items": [{"n": n, "at": at} for n in range(100)]}
+
+	client = app.test_client()
+	resp = client.get("/small", headers={"Accept-Encoding": "gzip"})
+	assert resp.headers.get("Content-Encoding") is None
+	assert resp.get_data() == b'{"at":"2026-10-17T08:30:00+00:00","1":"x"}'
+	resp = client.get("/large", headers={"Accept-Encoding": "gzip"})
+	assert resp.headers["Content-Encoding"] == "gzip" and "Accept-Encoding" in resp.headers["Vary"]
+	assert app.json.loads(gzip.decompress(resp.get_data()))["items"][99] == {"n": 99, "at": "2026-10-17T08:30:00+00:00"}
+	assert client.get("/large").headers.get("Content-Encoding") is None
+
+
+def test_sse_and_ndjson_encode_like_responses():
+	from datetime import datetime, timezone
+	from utils.helpers import ndjson_line, sse_event
+
+	record = {"at": datetime(2026, 10, 17, 8, 30, tzinfo=timezone.utc), "text": "two\nlines"}
+	encoded = '{"at":"2026-10-17T08:30:00+00:00","text":"two\\nlines"}'
+	assert sse_event("question", record) == f"event: question\ndata: {encoded}\n\n"
+	assert ndjson_line(record) == encoded + "\n"
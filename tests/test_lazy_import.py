@@ -0,0 +1,7 @@
+def test_app_import_defers_heavy_sdks():
+	import subprocess
+	import sys
+
+	probe = "import sys, app; print(sorted(m for m in ('firebase_admin', 'google.generativeai', 'httpx', 'requests') if m in sys.modules))"
+	out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+	assert out.stdout.strip().splitlines()[-1] == "[]"
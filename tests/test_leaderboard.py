@@ -0,0 +1,153 @@
+from services.leaderboard_touch import LeaderboardTouch
+from services.rank_index import RankIndex
+from utils.cache import TaggedTTLCache
+
+
+def _index(points: dict) -> RankIndex:
+	index = RankIndex()
+	index.load((uid, {"username": uid, "points": p}) for uid, p in points.items())
+	return index
+
+
+def test_rank_counts_strictly_higher_scores():
+	index = _index({"a": 300, "b": 200, "c": 200, "d": 100})
+	assert index.rank("a") == {"currentRank": 1, "totalUsers": 4, "pointsToNextRank": 0}
+	assert index.rank("c") == {"currentRank": 2, "totalUsers": 4, "pointsToNextRank": 100}
+	assert index.rank("d")["currentRank"] == 4
+	assert index.rank("missing")["currentRank"] == 4
+
+
+def test_updates_move_users():
+	index = _index({"a": 300, "b": 200})
+	index.increment("b", 150)
+	index.set("c", 10, {"username": "c"})
+	assert index.rank("b")["currentRank"] == 1
+	assert index.rank("a") == {"currentRank": 2, "totalUsers": 3, "pointsToNextRank": 50}
+	index.remove("b")
+	assert index.rank("a")["currentRank"] == 1
+
+
+def test_around_returns_window():
+	index = _index({f"u{i}": i * 10 for i in range(20)})
+	window = index.around("u10", 2)
+	assert [row["username"] for row in window] == ["u12", "u11", "u10", "u9", "u8"]
+	assert [row["rank"] for row in window] == [8, 9, 10, 11, 12]
+	assert [row["isCurrentUser"] for row in window] == [False, False, True, False, False]
+
+
+def test_changes_during_a_rebuild_are_kept_on_both_indexes():
+	index = _index({"a": 300, "b": 200})
+	index.begin_load()
+	assert index.tracking
+	index.increment("b", 150)
+	assert index.rank("b")["currentRank"] == 1  # the old index keeps serving
+	index.load([("a", {"points": 300}), ("b", {"points": 200}), ("c", {"points": 50})])
+	assert index.rank("b") == {"currentRank": 1, "totalUsers": 3, "pointsToNextRank": 0}
+	index.begin_load()
+	index.abort_load()
+	index.increment("c", 10)
+	index.load([("c", {"points": 50})])
+	assert index.rank("c")["totalUsers"] == 1 and index.around("c", 0)[0]["points"] == 50
+
+
+def test_tagged_cache_drops_every_board_a_member_is_on():
+	cache = TaggedTTLCache(max_entries=10, ttl=60)
+	cache.set("a", ["board-a"], tags=["a", "b"])
+	cache.set("c", ["board-c"], tags=["c", "b"])
+	cache.set("d", ["board-d"], tags=["d"])
+	cache.invalidate_tag("b")
+	assert cache.get("a") is None and cache.get("c") is None
+	assert cache.get("d") == ["board-d"]
+	cache.invalidate("d")
+	cache.invalidate_tag("d")
+	assert cache.get("d") is None
+
+
+def test_friend_limit_holds_on_both_sides(monkeypatch):
+	import pytest
+	from benchmarks.fakes import FakeFirestore
+	from config import Config
+	from services.firebase_service import FirebaseService
+	from utils.errors import APIError
+
+	db = FakeFirestore()
+	service = FirebaseService()
+	service.db, service._initialized = db, True
+	for uid in ("u1", "u2", "u3", "u4"):
+		db.collection("users").document(uid).set({"username": uid})
+	monkeypatch.setattr(Config, "FRIENDS_MAX", 1)
+	assert service.add_friend("u2", "u3") == {"friendIds": ["u3"]}
+	with pytest.raises(APIError, match="That user has reached the friend limit"):
+		service.add_friend("u1", "u2")
+	assert service.get_friend_ids("u2") == ["u3"] and service.get_friend_ids("u1") == []
+	assert service.add_friend("u1", "u4") == {"friendIds": ["u4"]}
+	assert service.add_friend("u4", "u1") == {"friendIds": ["u1"]}
+	with pytest.raises(APIError, match="Friend limit reached"):
+		service.add_friend("u1", "u3")
+
+
+def test_leaderboard_touch_coalesces_marks_into_one_write():
+	written = []
+	fail = [True]
+
+	def write(changed_at):
+		if fail[0]:
+			raise RuntimeError("unavailable")
+		written.append(changed_at)
+
+	touch = LeaderboardTouch(write, interval=3600)
+	for _ in range(100):
+		touch.mark()
+	try:
+		touch.flush()
+	except RuntimeError:
+		pass
+	fail[0] = False
+	assert touch.flush() is True
+	assert touch.flush() is False
+	assert len(written) == 1 and touch.marks == 100 and touch.flushes == 1
+
+
+def test_period_keys_bucket_by_utc_day_and_iso_week():
+	from datetime import datetime, timedelta, timezone
+	from services.firebase_service import _board_id, period_key
+
+	late_evening = datetime(2026, 10, 17, 23, 30, tzinfo=timezone(timedelta(hours=-5)))
+	assert period_key("daily", late_evening) == "2026-10-18"
+	assert period_key("weekly", datetime(2026, 10, 17, tzinfo=timezone.utc)) == "2026-W42"
+	# ISO weeks can belong to the neighbouring year
+	assert period_key("weekly", datetime(2027, 1, 1, tzinfo=timezone.utc)) == "2026-W53"
+	assert _board_id("daily", late_evening) == "daily-2026-10-18"
+	assert _board_id("all-time", late_evening) == "all-time"
+
+
+def test_public_leaderboard_revalidates_until_a_submit(monkeypatch, fake_backend):
+	from app import create_app
+	from benchmarks.fakes import fake_quiz
+	from config import Config
+	from services.firebase_service import firebase_service
+
+	client = create_app().test_client()
+	uid = client.post("/api/auth/signup", json={"email": "ada@example.com", "password": "secret123", "username": "ada"}).get_json()["userId"]
+	first = client.get("/api/leaderboard/daily")
+	etag = first.headers["ETag"]
+	assert first.status_code == 200 and first.get_json() == []
+	assert first.cache_control.public and first.cache_control.max_age == Config.LEADERBOARD_CACHE_TTL_SECONDS
+	repeat = client.get("/api/leaderboard/daily", headers={"If-None-Match": etag})
+	assert repeat.status_code == 304 and repeat.headers["ETag"] == etag and not repeat.get_data()
+
+	# A compressed body carries a weak ETag, which If-None-Match still matches
+	monkeypatch.setattr(Config, "COMPRESS_MIN_BYTES", 1)
+	gzipped = client.get("/api/leaderboard/daily", headers={"Accept-Encoding": "gzip"})
+	assert gzipped.headers["Content-Encoding"] == "gzip" and gzipped.headers["ETag"] == f"W/{etag}"
+	revalidated = client.get("/api/leaderboard/daily", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"]})
+	assert revalidated.status_code == 304
+
+	# The submit drops the cached board, so the same ETag no longer matches
+	quiz = firebase_service.save_quiz(uid, fake_quiz(), {"subject": "python", "difficulty": 3})
+	answers = [q["correctAnswer"] for q in fake_quiz()["questions"]]
+	headers = {"Authorization": f"Bearer fake-{uid}"}
+	assert client.post("/api/quiz/submit", json={"quizId": quiz["id"], "answers": answers}, headers=headers).status_code == 200
+	after = client.get("/api/leaderboard/daily", headers={"If-None-Match": etag})
+	assert after.status_code == 200 and after.headers["ETag"] != etag
+	assert [row["username"] for row in after.get_json()] == ["ada"]
@@ -0,0 +1,52 @@
+def test_upstream_retries_then_opens_circuit():
+	import pytest
+	import requests
+	from utils.outbound import CircuitBreaker, CircuitOpenError, Upstream, _http_retryable
+
+	flaky = iter([requests.ConnectionError(), requests.ConnectionError(), "ok"])
+
+	def send(timeout):
+		outcome = next(flaky)
+		if isinstance(outcome, Exception):
+			raise outcome
+		return outcome
+
+	upstream = Upstream("idp", deadline=5, attempts=3, backoff_base=0, retryable=_http_retryable, breaker=CircuitBreaker(threshold=2, reset_seconds=60))
+	assert upstream.call(send) == "ok"
+	assert upstream.stats()["retries"] == 2
+
+	calls = []
+
+	def down(timeout):
+		calls.append(timeout)
+		raise requests.Timeout()
+
+	for _ in range(2):
+		with pytest.raises(requests.Timeout):
+			upstream.call(down)
+	assert upstream.stats()["state"] == "open"
+	attempted = len(calls)
+	with pytest.raises(CircuitOpenError):
+		upstream.call(down)
+	assert len(calls) == attempted
+	assert upstream.stats()["shortCircuited"] == 1
+
+
+def test_a_timed_out_gemini_call_leaves_a_thread_for_the_next(monkeypatch):
+	import pytest
+	from benchmarks.fakes import FakeModel
+	from config import Config
+	from services.ai_service import AIService
+	from utils.errors import APIError
+	from utils.outbound import CircuitBreaker, Upstream
+
+	monkeypatch.setattr(Config, "GENERATE_MAX_ACTIVE", 1)
+	monkeypatch.setattr(Config, "GEMINI_MAX_CONCURRENCY", 1)
+	service = AIService()
+	service.upstream = Upstream("gemini", deadline=0.1, attempts=1, breaker=CircuitBreaker(threshold=5, reset_seconds=60))
+	service.model = FakeModel(latency=0.5)
+	with pytest.raises(APIError):
+		service._generate_live("python", 3, 50)
+	# The abandoned call still holds its thread; the next one must not wait for it
+	service.model = FakeModel()
+	assert len(service._generate_live("python", 3, 50)["questions"]) == 5
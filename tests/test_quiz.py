@@ -1,3 +1,191 @@
 def test_quiz_placeholder():
 	assert True
 
+
+def test_quiz_pool_serves_prefilled_sets():
+	import time
+	from services.quiz_pool import QuizPool, pool_key
+
+	calls = []
+
+	def generator(subject, difficulty, last_score):
+		calls.append((subject, difficulty))
+		return {"questions": [], "n": len(calls)}
+
+	pool = QuizPool(generator, capacity=2, low_water=1, min_misses=2)
+	assert pool.take("Python ", 90) is None
+	time.sleep(0.05)
+	assert calls == []  # a single miss is not demand worth stocking
+	assert pool.take("python", 95) is None
+	deadline = time.time() + 2
+	while pool.stats()["quizzes"] < 2 and time.time() < deadline:
+		time.sleep(0.01)
+	assert calls[0] == ("Python", 4)
+	assert pool.take("python", 85) is not None
+	assert pool_key("  PYTHON  ", 50) == ("python", "easy")
+	assert pool.stats()["hits"] == 1
+
+
+def test_quiz_pool_refills_are_charged_to_admission():
+	import time
+	from services.quiz_pool import QuizPool
+	from utils.admission import AdmissionControl, RejectedError
+
+	admission = AdmissionControl("Quiz generation", global_rate=0.001, global_burst=1, max_active=1, max_queued=4)
+	calls = []
+
+	def generator(subject, difficulty, last_score):
+		admission.limit(None)
+		with admission.slot(wait=False):
+			calls.append(subject)
+			return {"questions": []}
+
+	pool = QuizPool(generator, capacity=3, low_water=1, min_misses=1)
+	pool.take("python", 90)
+	deadline = time.time() + 2
+	while pool.stats()["refillsDeferred"] < 1 and time.time() < deadline:
+		time.sleep(0.01)
+	# One global token: one quiz is stocked, then the refill stops without an error
+	assert calls == ["python"]
+	assert pool.stats()["refillErrors"] == 0
+	assert admission.stats()["globalLimited"] == 1
+
+	admission = AdmissionControl("Quiz generation", max_active=1, max_queued=4)
+	with admission.slot():
+		try:
+			with admission.slot(wait=False):
+				raise AssertionError("a busy slot must refuse background work")
+		except RejectedError as e:
+			assert e.status_code == 503
+	assert admission.stats()["noSlot"] == 1 and admission.stats()["waiting"] == 0
+
+
+def test_resubmitting_a_quiz_is_refused_and_counted_once():
+	import pytest
+	from benchmarks.fakes import FakeFirestore
+	from services.firebase_service import FirebaseService
+	from utils.errors import APIError
+
+	db = FakeFirestore()
+	service = FirebaseService()
+	service.db, service._initialized = db, True
+	db.collection("users").document("u1").set({"username": "u1", "totalPoints": 0, "quizzesCompleted": 0})
+	grading = {"score": 80, "pointsEarned": 40, "correctCount": 4, "difficulty": 3, "streakIncremented": True, "answers": [], "totalQuestions": 5, "correct": [], "message": ""}
+	service.store_quiz_result("u1", "q1", grading, "python")
+	with pytest.raises(APIError) as excinfo:
+		service.store_quiz_result("u1", "q1", grading, "python")
+	assert excinfo.value.status_code == 409
+	user = db.collection("users").document("u1").get().to_dict()
+	assert (user["totalPoints"], user["quizzesCompleted"], user["currentStreak"]) == (40, 1, 1)
+
+def test_array_item_stream_emits_completed_objects():
+	from utils.json_stream import ArrayItemStream
+
+	text = '```json\n{"questions": [{"question": "a {b}?", "options": ["}"]}, {"question": "say \\"]\\""}]}\n```'
+	parser = ArrayItemStream("questions")
+	items = []
+	for i in range(0, len(text), 3):
+		items.extend(parser.feed(text[i:i + 3]))
+	assert items == [{"question": "a {b}?", "options": ["}"]}, {"question": 'say "]"'}]
+	assert parser.closed
+
+
+def test_answer_key_grades_like_the_full_quiz():
+	import pytest
+	from services.answer_key import AnswerKey
+	from services.firebase_service import _stored_quiz
+	from services.scoring_service import ScoringService
+
+	questions = [
+		{"question": f"q{i}", "options": ["A", "B", "C", "D"], "correctAnswer": "ABCD"[i % 4]}
+		for i in range(5)
+	]
+	quiz = {"questions": questions, "difficulty": 4}
+	packed = AnswerKey.from_questions(questions, 4).pack()
+	assert len(packed) == 3 + 5 * 5
+	key = AnswerKey.unpack(packed)
+	scoring = ScoringService()
+	answers = ["A", "C", "C", "D", None]
+	full, compact = scoring.grade_quiz(quiz, answers), scoring.grade(key, answers)
+	for field in ("score", "pointsEarned", "correct", "streakIncremented"):
+		assert full[field] == compact[field]
+	assert scoring.grade(key, [0, 1, 2, 3, 0])["correct"] == [True] * 5
+	assert scoring.grade(key, [True, "1", None])["correct"] == [False] * 5
+
+	# A stored difficulty of 0 is graded as 0, not as the default of 3
+	easy = scoring.grade_quiz({"questions": questions, "difficulty": 0}, answers)
+	assert (easy["difficulty"], easy["pointsEarned"]) == (0, 7)  # 3 correct x 5 points x 0.5
+	assert AnswerKey.from_questions(questions, None).difficulty == 3
+	for bad in (-1, 256):
+		with pytest.raises(ValueError):
+			AnswerKey.from_questions(questions, bad).pack()
+	assert "answerKey" not in _stored_quiz({"questions": questions, "difficulty": 256})
+
+
+def test_vectorized_rescore_matches_grading():
+	import numpy as np
+	from services.answer_key import AnswerKey
+	from services.rescore import rescore_points
+	from services.scoring_service import ScoringRules, ScoringService
+
+	rules = ScoringRules(base_points_per_correct=7, difficulty_multiplier=1.3)
+	correct, difficulty = np.meshgrid(np.arange(6), np.arange(1, 6))
+	points = rescore_points(correct.ravel(), difficulty.ravel(), rules)
+	scoring = ScoringService(rules)
+	for c, d, p in zip(correct.ravel(), difficulty.ravel(), points):
+		key = AnswerKey(int(d), (0,) * 5, (b"\0" * 4,) * 5)
+		assert scoring.grade(key, [0] * int(c))["pointsEarned"] == p
+
+
+def test_admission_limits_rate_and_bounds_the_queue():
+	import asyncio
+	import threading
+	import pytest
+	from utils.admission import AdmissionControl, RejectedError
+
+	gate = AdmissionControl("gen", user_rate=1.0, user_burst=2, max_active=1, max_queued=1, queue_timeout=0.05)
+	gate.limit("u1")
+	gate.limit("u1")
+	with pytest.raises(RejectedError) as err:
+		gate.limit("u1")
+	assert err.value.status_code == 429 and err.value.headers == {"Retry-After": "1"}
+	gate.limit("u2")
+
+	release, order = threading.Event(), []
+
+	def queued():
+		with gate.slot():
+			order.append("queued")
+
+	with gate.slot():
+		waiter = threading.Thread(target=queued)
+		waiter.start()
+		while gate.stats()["waiting"] == 0:
+			release.wait(0.001)
+		# One active, one queued: the next caller is refused at once
+		with pytest.raises(RejectedError) as err:
+			with gate.slot():
+				pass
+		assert err.value.status_code == 503
+	waiter.join()
+	assert order == ["queued"] and gate.stats()["active"] == 0
+
+	async def timed_out():
+		async with gate.slot_async():
+			with pytest.raises(RejectedError):
+				async with gate.slot_async():
+					pass
+
+	asyncio.run(timed_out())
+	stats = gate.stats()
+	assert (stats["queueFull"], stats["timedOut"], stats["active"], stats["waiting"]) == (1, 1, 0, 0)
+
+
+def test_rescore_overrides_only_preview(fake_backend):
+	from app import create_app
+
+	runner = create_app().test_cli_runner()
+	result = runner.invoke(args=["rescore", "--base-points", "20"])
+	assert result.exit_code == 2 and "--dry-run" in result.output
+	result = runner.invoke(args=["rescore", "--base-points", "20", "--dry-run"])
+	assert result.exit_code == 0, result.output
@@ -0,0 +1,31 @@
+def test_readiness_retries_failed_steps_only():
+	from utils.readiness import Readiness
+
+	calls = {"db": 0, "model": 0}
+
+	def db():
+		calls["db"] += 1
+
+	def model():
+		calls["model"] += 1
+		if calls["model"] == 1:
+			raise RuntimeError("not yet")
+
+	readiness = Readiness({"db": db, "model": model})
+	ok, steps = readiness.check()
+	assert not ok and steps["db"]["ok"] and steps["model"]["error"] == "not yet"
+	ok, steps = readiness.check()
+	assert ok and calls == {"db": 1, "model": 2}
+
+
+def test_health_is_bare_and_stats_need_the_scheduler_secret(monkeypatch):
+	from app import create_app
+	from config import Config
+
+	client = create_app().test_client()
+	assert client.get("/health").get_json() == {"status": "ok"}
+	assert client.get("/stats").status_code == 403
+	monkeypatch.setattr(Config, "STREAK_JOB_SECRET", "s3cret")
+	assert client.get("/stats").status_code == 401
+	stats = client.get("/stats", headers={"X-Scheduler-Secret": "s3cret"}).get_json()
+	assert {"tokenCache", "singleFlight", "outbound"} <= set(stats)
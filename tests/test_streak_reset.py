@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+
+CUTOFF = datetime(2026, 10, 17, tzinfo=timezone.utc)
+
+
+def _db(users: dict):
+	from benchmarks.fakes import FakeFirestore
+
+	db = FakeFirestore()
+	for uid, fields in users.items():
+		db.collection("users").document(uid).set(fields)
+	return db
+
+
+def test_reset_keeps_the_longest_streak():
+	from services.streak_reset import StreakResetJob
+
+	yesterday = CUTOFF - timedelta(hours=6)
+	db = _db({
+		"record": {"lastQuizDate": yesterday, "currentStreak": 9, "longestStreak": 4},
+		"past-best": {"lastQuizDate": yesterday, "currentStreak": 2, "longestStreak": 7},
+		"today": {"lastQuizDate": CUTOFF + timedelta(hours=1), "currentStreak": 3, "longestStreak": 3},
+		# Older than a day: only caught because a first run scans from the oldest quiz
+		"long-gone": {"lastQuizDate": CUTOFF - timedelta(days=40), "currentStreak": 3},
+		"never": {"lastQuizDate": None, "currentStreak": 0},
+	})
+	summary = StreakResetJob(db, page_size=1, shards=2).run(CUTOFF)
+	assert summary["reset"] == 3
+	users = {s.id: s.to_dict() for s in db.collection("users").get()}
+	assert (users["record"]["currentStreak"], users["record"]["longestStreak"]) == (0, 9)
+	assert (users["past-best"]["currentStreak"], users["past-best"]["longestStreak"]) == (0, 7)
+	assert users["today"]["currentStreak"] == 3
+	assert (users["long-gone"]["currentStreak"], users["long-gone"]["longestStreak"]) == (0, 3)
+
+
+def test_a_submit_after_the_scan_keeps_its_streak(monkeypatch):
+	from benchmarks.fakes import FakeQuery
+	from services.firebase_service import firestore
+	from services.streak_reset import StreakResetJob
+
+	db = _db({
+		"early-bird": {"lastQuizDate": CUTOFF - timedelta(hours=6), "currentStreak": 4, "longestStreak": 4},
+		"idle": {"lastQuizDate": CUTOFF - timedelta(hours=6), "currentStreak": 2},
+	})
+	read = FakeQuery.get
+
+	def read_then_submit(query):
+		page = read(query)
+		# The first quiz after midnight lands while the job holds the page
+		if any(snap.id == "early-bird" and "currentStreak" in snap.to_dict() for snap in page):
+			db.collection("users").document("early-bird").update({
+				"lastQuizDate": CUTOFF + timedelta(days=1, minutes=5),
+				"currentStreak": firestore.Increment(1),
+			})
+		return page
+
+	monkeypatch.setattr(FakeQuery, "get", read_then_submit)
+	summary = StreakResetJob(db, page_size=10, shards=1).run(CUTOFF)
+	assert summary["reset"] == 1
+	users = {s.id: s.to_dict() for s in db.collection("users").get()}
+	assert (users["early-bird"]["currentStreak"], users["idle"]["currentStreak"]) == (5, 0)
+
+
+def test_a_used_freeze_is_checked_again_the_next_day():
+	from services.streak_reset import StreakResetJob
+
+	db = _db({
+		"idle": {"lastQuizDate": CUTOFF - timedelta(hours=6), "currentStreak": 5, "streakFrozen": True},
+		"back": {"lastQuizDate": CUTOFF - timedelta(hours=6), "currentStreak": 5, "streakFrozen": True},
+	})
+	job = StreakResetJob(db, page_size=1, shards=2)
+	assert job.run(CUTOFF)["freezesUsed"] == 2
+	db.collection("users").document("back").update({"lastQuizDate": CUTOFF + timedelta(days=1, hours=3), "currentStreak": 6})
+	summary = job.run(CUTOFF + timedelta(days=1))
+	assert (summary["reset"], summary["freezesUsed"]) == (1, 0)
+	users = {s.id: s.to_dict() for s in db.collection("users").get()}
+	assert (users["idle"]["currentStreak"], users["idle"]["streakFrozen"]) == (0, False)
+	assert users["idle"]["streakCheckedAt"] == CUTOFF
+	assert users["back"]["currentStreak"] == 6
+
+
+def test_a_second_run_is_refused_while_the_first_holds_the_lease():
+	import pytest
+	from services.streak_reset import StreakResetJob
+	from utils.errors import APIError
+
+	db = _db({"u1": {"lastQuizDate": CUTOFF - timedelta(hours=6), "currentStreak": 2}})
+	checkpoint = db.collection("jobs").document("streak-reset")
+	held = {"status": "running", "cutoff": CUTOFF, "since": CUTOFF - timedelta(days=1), "shardCount": 1, "shards": {}}
+	checkpoint.set({**held, "leaseUntil": datetime.now(timezone.utc) + timedelta(minutes=5)})
+	with pytest.raises(APIError) as excinfo:
+		StreakResetJob(db).run(CUTOFF)
+	assert excinfo.value.status_code == 409
+	# A lapsed lease means the holder died: the same cutoff resumes its checkpoint
+	checkpoint.update({"leaseUntil": datetime.now(timezone.utc) - timedelta(seconds=1)})
+	summary = StreakResetJob(db).run(CUTOFF)
+	assert (summary["resumed"], summary["reset"]) == (True, 1)
+	assert checkpoint.get().to_dict()["status"] == "done"
+
+
+def test_daily_check_needs_the_scheduler_secret(monkeypatch, fake_backend):
+	from app import create_app
+	from config import Config
+
+	client = create_app().test_client()
+	assert client.get("/api/streak/daily-check").status_code == 405
+	assert client.post("/api/streak/daily-check").status_code == 403
+	monkeypatch.setattr(Config, "STREAK_JOB_SECRET", "s3cret")
+	assert client.post("/api/streak/daily-check", headers={"X-Scheduler-Secret": "guess"}).status_code == 401
+	resp = client.post("/api/streak/daily-check", headers={"X-Scheduler-Secret": "s3cret"})
+	assert resp.status_code == 200 and resp.get_json()["success"] is True
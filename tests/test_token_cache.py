@@ -0,0 +1,27 @@
+def test_token_cache_skips_repeat_verification():
+	import time
+	from utils.token_cache import TokenCache
+
+	calls = []
+
+	def verifier(token):
+		calls.append(token)
+		return {"uid": "u1", "exp": time.time() + 60}
+
+	cache = TokenCache(max_entries=2)
+	assert cache.verify("t1", verifier)["uid"] == "u1"
+	assert cache.verify("t1", verifier)["uid"] == "u1"
+	assert calls == ["t1"]
+	assert cache.stats()["hits"] == 1
+	cache.invalidate_uid("u1")
+	cache.verify("t1", verifier)
+	assert calls == ["t1", "t1"]
+
+
+def test_token_cache_respects_exp():
+	import time
+	from utils.token_cache import TokenCache
+
+	cache = TokenCache()
+	cache.put("expired", {"uid": "u1", "exp": time.time() - 1})
+	assert cache.get("expired") is None
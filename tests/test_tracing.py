@@ -0,0 +1,25 @@
+def test_tracer_reports_server_timing_and_histograms():
+	from utils.tracing import Tracer
+
+	tracer = Tracer()
+	tracer.start_request()
+	tracer.record("firestore.get", 0.002)
+	tracer.record("firestore.get", 0.003)
+	timing = tracer.finish_request("GET", "/api/user/me", 200, 0.01)
+	assert timing == 'firestore.get;dur=5.0;desc="x2", total;dur=10.0'
+	metrics = tracer.render()
+	assert 'webnova_backend_call_seconds_bucket{call="firestore.get",le="0.0025"} 1' in metrics
+	assert 'webnova_backend_call_seconds_count{call="firestore.get"} 2' in metrics
+	assert 'webnova_http_request_seconds_count{method="GET",route="/api/user/me",status="200"} 1' in metrics
+
+
+def test_metrics_need_the_scheduler_secret(monkeypatch):
+	from app import create_app
+	from config import Config
+
+	client = create_app().test_client()
+	assert client.get("/metrics").status_code == 403
+	monkeypatch.setattr(Config, "STREAK_JOB_SECRET", "s3cret")
+	assert client.get("/metrics", headers={"X-Scheduler-Secret": "guess"}).status_code == 401
+	resp = client.get("/metrics", headers={"X-Scheduler-Secret": "s3cret"})
+	assert resp.status_code == 200 and resp.mimetype == "text/plain"
@@ -1,3 +1,267 @@
 def test_user_placeholder():
 	assert True
 
+
+def test_singleflight_coalesces_concurrent_calls():
+	import threading
+	from utils.singleflight import SingleFlight
+
+	flight = SingleFlight()
+	release = threading.Event()
+	calls = []
+
+	def load():
+		calls.append(1)
+		release.wait(2)
+		return {"uid": "u1"}
+
+	results = []
+	threads = [threading.Thread(target=lambda: results.append(flight.do("k", load))) for _ in range(5)]
+	for t in threads:
+		t.start()
+	while flight.stats()["coalesced"] < 4:
+		pass
+	release.set()
+	for t in threads:
+		t.join()
+	assert calls == [1]
+	assert results == [{"uid": "u1"}] * 5
+	assert flight.stats() == {"executed": 1, "coalesced": 4, "inFlight": 0}
+
+
+def test_async_singleflight_shares_one_task():
+	import asyncio
+	from utils.singleflight import AsyncSingleFlight
+
+	flight = AsyncSingleFlight()
+	calls = []
+
+	async def load():
+		calls.append(1)
+		await asyncio.sleep(0.01)
+		return {"uid": "u1"}
+
+	async def main():
+		return await asyncio.gather(*(flight.do("k", load) for _ in range(5)))
+
+	results = asyncio.run(main())
+	assert calls == [1]
+	assert results == [{"uid": "u1"}] * 5
+	assert flight.stats() == {"executed": 1, "coalesced": 4, "inFlight": 0}
+
+
+def test_coalesced_results_are_private_and_writes_start_a_new_call():
+	import asyncio
+	import threading
+	from utils.singleflight import AsyncSingleFlight, coalesced, generations, singleflight
+
+	flight = AsyncSingleFlight()
+
+	async def load():
+		await asyncio.sleep(0.01)
+		return {"uid": "u1"}
+
+	async def lead():
+		user = await flight.do("k", load)
+		# The leader resumes first; a handler decorating its dict must not reach the waiter
+		user["isCurrentUser"] = True
+		return user
+
+	async def main():
+		return await asyncio.gather(lead(), flight.do("k", load))
+
+	assert asyncio.run(main()) == [{"uid": "u1", "isCurrentUser": True}, {"uid": "u1"}]
+
+	release = threading.Event()
+	calls = []
+
+	class Service:
+		@coalesced
+		def get_user(self, user_id):
+			calls.append(user_id)
+			release.wait(2)
+			return {"uid": user_id}
+
+	before = singleflight.stats()["executed"]
+	first = threading.Thread(target=Service().get_user, args=("u1",))
+	first.start()
+	while singleflight.stats()["executed"] == before:
+		pass
+	# A write lands while the first read is in flight; the next read must not reuse it
+	generations.bump("u1")
+	second = threading.Thread(target=Service().get_user, args=("u1",))
+	second.start()
+	while len(calls) < 2:
+		pass
+	release.set()
+	first.join()
+	second.join()
+	assert calls == ["u1", "u1"]
+
+
+def test_submission_journal_flushes_and_isolates_failures(tmp_path):
+	import time
+	from services.submission_journal import SubmissionJournal
+
+	flushed = []
+
+	def flush(entries):
+		if any(e["quizId"] == "bad" for e in entries):
+			raise RuntimeError("rejected")
+		flushed.extend(e["quizId"] for e in entries)
+
+	journal = SubmissionJournal(str(tmp_path / "journal.db"), flush, interval=60)
+	for quiz_id in ("q1", "bad", "q2"):
+		journal.append("u1", {"quizId": quiz_id})
+	deadline = time.time() + 2
+	while sorted(flushed) != ["q1", "q2"] and time.time() < deadline:
+		journal.drain()
+		time.sleep(0.01)
+	assert sorted(flushed) == ["q1", "q2"]
+	assert [e["quizId"] for e in journal.pending("u1")] == ["bad"]
+	assert journal.stats()["failures"] >= 1
+
+
+def test_submission_journal_dead_letters_after_max_attempts(tmp_path):
+	from services.submission_journal import SubmissionJournal
+
+	def flush(entries):
+		raise RuntimeError("rejected")
+
+	journal = SubmissionJournal(str(tmp_path / "journal.db"), flush, interval=60, max_attempts=3)
+	journal.append("u1", {"quizId": "bad"})
+	for _ in range(3):
+		journal._conn().execute("UPDATE submissions SET lease_until = 0")
+		journal.drain()
+	assert journal.pending("u1") == []
+	(dead,) = journal.dead_letters()
+	assert (dead["entry"]["quizId"], dead["attempts"]) == ("bad", 3) and "rejected" in dead["error"]
+	assert journal.stats()["deadLetters"] == 1 and journal.stats()["pending"] == 0
+
+
+def test_progress_cursor_round_trips_and_rejects_garbage():
+	import pytest
+	from datetime import datetime, timezone
+	from services.firebase_service import decode_progress_cursor, encode_progress_cursor
+	from utils.errors import APIError
+
+	at = datetime(2026, 10, 17, 8, 30, 15, 123456, tzinfo=timezone.utc)
+	cursor = encode_progress_cursor(at, "quiz-42")
+	assert "=" not in cursor
+	assert decode_progress_cursor(cursor) == {"completedAt": at, "__name__": "quiz-42"}
+	for bad in ("", "not a cursor", encode_progress_cursor(at, "x")[:-3]):
+		with pytest.raises(APIError) as err:
+			decode_progress_cursor(bad)
+		assert err.value.status_code == 400
+
+
+def test_user_cache_drops_fills_that_raced_a_write():
+	from services.firebase_service import _updated_record, firestore
+	from utils import request_memo
+	from utils.cache import VersionedTTLCache
+
+	cache = VersionedTTLCache(ttl=60)
+	token = cache.token("u1")
+	# A write commits while the read is in flight
+	cache.invalidate("u1")
+	cache.set("u1", {"totalPoints": 1}, token)
+	assert cache.get("u1") is None
+	cache.set("u1", {"totalPoints": 2}, cache.token("u1"))
+	assert cache.get("u1") == {"totalPoints": 2}
+
+	record = {"userId": "u1", "totalPoints": 120, "currentStreak": 3, "longestStreak": 2}
+	updated = _updated_record(record, {"totalPoints": firestore.Increment(-50), "streakFrozen": True})
+	assert updated == {"userId": "u1", "totalPoints": 70, "currentStreak": 3, "longestStreak": 3, "streakFrozen": True}
+	assert _updated_record(record, {"subjectCounts.python": firestore.Increment(1)}) is None
+	assert _updated_record(record, {"bestScore": firestore.Maximum(90)}) is None
+
+	request_memo.put("k", 1)
+	assert request_memo.get("k") is None
+	request_memo.start()
+	request_memo.put("k", 1)
+	assert request_memo.get("k") == 1
+	request_memo.invalidate("k")
+	assert request_memo.get("k") is None
+	request_memo.finish()
+
+
+def test_reconcile_recovers_the_longest_streak_from_history():
+	from datetime import datetime, timedelta, timezone
+	from benchmarks.fakes import FakeFirestore
+	from services.firebase_service import AGGREGATES_VERSION, FirebaseService
+
+	db = FakeFirestore()
+	service = FirebaseService()
+	service.db, service._initialized = db, True
+	day = datetime(2026, 10, 1, 9, tzinfo=timezone.utc)
+	# Passing quizzes on days 0, 1, 1, a fail on day 2, a pass on 3; then a gap
+	history = [(0, 80), (1, 90), (1, 70), (2, 40), (3, 65), (6, 100)]
+	db.collection("users").document("u1").set({"currentStreak": 1, "longestStreak": 2, "aggregatesVersion": 1})
+	items = db.collection("progress").document("u1").collection("items")
+	for n, (offset, score) in enumerate(history):
+		items.document(f"q{n}").set({"score": score, "streakIncremented": score >= 60, "completedAt": day + timedelta(days=offset)})
+	stats = service.get_user_stats("u1")
+	assert stats["longestStreak"] == 4 and stats["quizzesCompleted"] == 6
+	user = db.collection("users").document("u1").get().to_dict()
+	assert (user["longestStreak"], user["aggregatesVersion"]) == (4, AGGREGATES_VERSION)
+	# A longer stored run (kept alive by freezes) is never lowered
+	db.collection("users").document("u1").update({"longestStreak": 9})
+	service.reconcile_user_aggregates("u1")
+	assert db.collection("users").document("u1").get().to_dict()["longestStreak"] == 9
+
+
+def test_submit_commits_progress_totals_and_boards_together():
+	import pytest
+	from benchmarks.fakes import FakeFirestore
+	from services.firebase_service import FirebaseService, _board_id
+
+	db = FakeFirestore()
+	service = FirebaseService()
+	service.db, service._initialized = db, True
+	grading = {"score": 80, "pointsEarned": 40, "correctCount": 4, "difficulty": 3, "streakIncremented": True, "answers": [], "totalQuestions": 5, "correct": [], "message": ""}
+	board_rows = [db.collection("leaderboard").document(_board_id(p)).collection("users") for p in ("all-time", "daily", "weekly")]
+
+	# No user document: the user update fails, and with it the whole commit
+	with pytest.raises(KeyError):  # the fake's NotFound
+		service.store_quiz_result("ghost", "q1", grading, "python")
+	assert not db.collection("progress").document("ghost").collection("items").document("q1").get().exists
+	assert not any(rows.document("ghost").get().exists for rows in board_rows)
+
+	# A user from before all-time rows carried names; reconciling copies theirs over
+	db.collection("users").document("u1").set({"username": "ada", "avatar": "a.png", "totalPoints": 0})
+	service.reconcile_all_aggregates()
+	commits = db.round_trips.totals["commit"]
+	service.store_quiz_result("u1", "q1", grading, "python")
+	assert db.round_trips.totals["commit"] == commits + 1
+	assert db.collection("progress").document("u1").collection("items").document("q1").get().exists
+	assert db.collection("users").document("u1").get().to_dict()["totalPoints"] == 40
+	assert [rows.document("u1").get().to_dict()["points"] for rows in board_rows] == [40, 40, 40]
+	assert service.get_leaderboard("daily")[0] == {"rank": 1, "username": "ada", "points": 40, "streak": 1, "avatar": "a.png"}
+
+
+def test_synthetic_dataset_is_seeded_and_consistent():
+	from collections import defaultdict
+	from datetime import datetime, timezone
+	from benchmarks import dataset
+	from benchmarks.fakes import FakeFirestore
+	from services.firebase_service import FirebaseService
+
+	spec = dataset.DatasetSpec(users=300, now=datetime(2026, 10, 17, 15, tzinfo=timezone.utc))
+	docs = list(dataset.generate(spec))
+	assert docs == list(dataset.generate(spec))
+	db = FakeFirestore()
+	assert dataset.load_fake(db, docs) == len(docs)
+
+	history = defaultdict(list)
+	for path, data in docs:
+		if path[0] == "progress":
+			history[path[1]].append(data)
+	for snap in db.collection("users").get():
+		user, items = snap.to_dict(), history[snap.id]
+		# Totals and aggregates as if every item had gone through submit
+		assert {k: user[k] for k in ("quizzesCompleted", "scoreSum", "bestScore", "subjectCounts")} == FirebaseService._compute_aggregates(items)
+		assert user["totalPoints"] == sum(item["pointsEarned"] for item in items)
+		assert user["currentStreak"] <= user["longestStreak"]
+		assert len(db.collection("progress").document(snap.id).collection("items").get()) == len(items)
+	top = db.collection("leaderboard").document("all-time").collection("users").order_by("points", "DESCENDING").limit(1).get()
+	assert top[0].to_dict()["points"] == max(sum(i["pointsEarned"] for i in items) for items in history.values())
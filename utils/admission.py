@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Hashable, Iterator
+
+from utils.errors import APIError
+
+
+class RejectedError(APIError):
+	"""Refused by admission control; ``Retry-After`` says when to try again."""
+
+	status_code = 503
+
+	def __init__(self, message: str, status_code: int | None = None, retry_after: float = 1.0):
+		super().__init__(message, status_code)
+		self.retry_after = retry_after
+
+	@property
+	def headers(self) -> dict[str, str]:
+		return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class TokenBucket:
+	"""``rate`` tokens per second, holding at most ``burst``."""
+
+	__slots__ = ("rate", "burst", "tokens", "stamp")
+
+	def __init__(self, rate: float, burst: int, now: float):
+		self.rate = rate
+		self.burst = max(1, burst)
+		self.tokens = float(self.burst)
+		self.stamp = now
+
+	def wait(self, now: float) -> float:
+		"""Seconds until a token is available (0 when one is)."""
+		self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+		self.stamp = now
+		return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+def _resolve(future: asyncio.Future) -> None:
+	if not future.done():
+		future.set_result(True)
+
+
+class AdmissionControl:
+	"""Rate limits and a bounded queue in front of an expensive call.
+
+	``limit(key)`` takes a token from the caller's bucket and the global one:
+	an empty caller bucket is a 429 and an empty global one a 503, both with
+	the wait for the next token as ``Retry-After``. ``slot()`` (``slot_async()``
+	on the ASGI app) holds one of ``max_active`` slots around the call itself;
+	up to ``max_queued`` callers wait for one, first come first served, for at
+	most ``queue_timeout``, and any more are refused at once. A spike therefore
+	ties up a bounded number of workers and cheap endpoints keep the rest.
+	Background work passes ``wait=False``: it takes a free slot or is refused,
+	and never holds a place in the queue a request could use.
+	"""
+
+	def __init__(
+		self,
+		name: str,
+		user_rate: float = 0.0,
+		user_burst: int = 1,
+		global_rate: float = 0.0,
+		global_burst: int = 1,
+		max_active: int = 8,
+		max_queued: int = 8,
+		queue_timeout: float = 5.0,
+		max_keys: int = 10000,
+	):
+		self.name = name
+		self.user_rate = user_rate
+		self.user_burst = user_burst
+		self.max_active = max(1, max_active)
+		self.max_queued = max(0, max_queued)
+		self.queue_timeout = queue_timeout
+		self.max_keys = max_keys
+		self._lock = threading.Lock()
+		self._global = TokenBucket(global_rate, global_burst, time.monotonic()) if global_rate > 0 else None
+		self._users: OrderedDict[Hashable, TokenBucket] = OrderedDict()
+		# threading.Event for sync callers, asyncio.Future for async ones
+		self._waiters: deque = deque()
+		self._hold: float | None = None
+		self.active = 0
+		self.counts = {"admitted": 0, "queued": 0, "userLimited": 0, "globalLimited": 0, "queueFull": 0, "timedOut": 0, "noSlot": 0}
+
+	def _user_bucket(self, key: Hashable, now: float) -> TokenBucket | None:
+		if self.user_rate <= 0 or key is None:
+			return None
+		bucket = self._users.get(key)
+		if bucket is None:
+			bucket = self._users[key] = TokenBucket(self.user_rate, self.user_burst, now)
+			if len(self._users) > self.max_keys:
+				# The least recent caller's bucket has refilled by now in practice
+				self._users.popitem(last=False)
+		else:
+			self._users.move_to_end(key)
+		return bucket
+
+	def limit(self, key: Hashable | None) -> None:
+		"""Charge one request to ``key`` and the global budget, or raise ``RejectedError``."""
+		with self._lock:
+			now = time.monotonic()
+			user = self._user_bucket(key, now)
+			# Check both before taking either, so a refusal costs the caller nothing
+			wait = user.wait(now) if user is not None else 0.0
+			if wait:
+				self.counts["userLimited"] += 1
+				raise RejectedError("Too many requests, slow down", 429, retry_after=wait)
+			wait = self._global.wait(now) if self._global is not None else 0.0
+			if wait:
+				self.counts["globalLimited"] += 1
+				raise RejectedError(f"{self.name} is busy, try again shortly", 503, retry_after=wait)
+			for bucket in (user, self._global):
+				if bucket is not None:
+					bucket.tokens -= 1
+
+	def _busy(self) -> RejectedError:
+		# Roughly when the queue ahead would have drained, from the mean hold time
+		hold = self._hold or 1.0
+		retry_after = hold * (len(self._waiters) + 1) / self.max_active
+		return RejectedError(f"{self.name} is busy, try again shortly", 503, retry_after=retry_after)
+
+	def _enter(self, waiter) -> bool:
+		"""True with a slot taken; False when ``waiter`` was queued for one.
+
+		A ``None`` waiter is never queued: no free slot is a refusal.
+		"""
+		with self._lock:
+			if self.active < self.max_active and not self._waiters:
+				self.active += 1
+				self.counts["admitted"] += 1
+				return True
+			if waiter is None:
+				self.counts["noSlot"] += 1
+				raise self._busy()
+			if len(self._waiters) >= self.max_queued:
+				self.counts["queueFull"] += 1
+				raise self._busy()
+			self._waiters.append(waiter)
+			self.counts["queued"] += 1
+			return False
+
+	def _leave(self, held: float | None) -> None:
+		with self._lock:
+			if held is not None:
+				self._hold = held if self._hold is None else 0.8 * self._hold + 0.2 * held
+			# The slot passes straight to the next waiter, so none can jump the queue
+			while self._waiters:
+				waiter = self._waiters.popleft()
+				if isinstance(waiter, threading.Event):
+					waiter.set()
+				else:
+					try:
+						waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+					except RuntimeError:
+						# Its loop is gone; nobody is waiting there any more
+						continue
+				self.counts["admitted"] += 1
+				return
+			self.active -= 1
+
+	def _abandon(self, waiter) -> bool:
+		"""Drop a waiter that gave up; False when a slot was already handed to it."""
+		with self._lock:
+			try:
+				self._waiters.remove(waiter)
+			except ValueError:
+				return False
+			return True
+
+	def _timed_out(self) -> RejectedError:
+		with self._lock:
+			self.counts["timedOut"] += 1
+			return self._busy()
+
+	@contextmanager
+	def slot(self, wait: bool = True) -> Iterator[None]:
+		waiter = threading.Event() if wait else None
+		if not self._enter(waiter):
+			if not waiter.wait(self.queue_timeout) and self._abandon(waiter):
+				raise self._timed_out()
+		start = time.monotonic()
+		try:
+			yield
+		finally:
+			self._leave(time.monotonic() - start)
+
+	@asynccontextmanager
+	async def slot_async(self) -> AsyncIterator[None]:
+		waiter = asyncio.get_running_loop().create_future()
+		if not self._enter(waiter):
+			try:
+				await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+			except asyncio.TimeoutError:
+				if self._abandon(waiter):
+					raise self._timed_out() from None
+				# Handed a slot just as the wait expired: use it
+			except BaseException:
+				if not self._abandon(waiter):
+					self._leave(None)
+				raise
+		start = time.monotonic()
+		try:
+			yield
+		finally:
+			self._leave(time.monotonic() - start)
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				"active": self.active,
+				"waiting": len(self._waiters),
+				"maxActive": self.max_active,
+				"maxQueued": self.max_queued,
+				"meanHoldMs": round((self._hold or 0.0) * 1000, 1),
+				**self.counts,
+			}
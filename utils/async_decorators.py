@@ -0,0 +1,57 @@
+import hmac
+from functools import wraps
+from quart import request, g
+from utils.errors import AuthError, ForbiddenError
+from utils.token_cache import token_cache
+from utils.tracing import tracer
+from utils.lazy_import import lazy_import
+from config import Config
+
+# Imported on the first verified token, not at start-up
+fb_auth = lazy_import("firebase_admin.auth")
+
+
+def auth_required(fn):
+	"""Quart counterpart of :func:`utils.decorators.auth_required`."""
+
+	@wraps(fn)
+	async def wrapper(*args, **kwargs):
+		header = request.headers.get("Authorization", "")
+		if not header.startswith("Bearer "):
+			# Allow demo token format
+			if Config.DEMO_MODE and header.startswith("Demo "):
+				g.user_id = header.split(" ", 1)[1].strip()
+				return await fn(*args, **kwargs)
+			raise AuthError("Missing or invalid Authorization header")
+		token = header.split(" ", 1)[1].strip()
+		try:
+			with tracer.span("auth.verify_token"):
+				decoded = await token_cache.verify_async(token, fb_auth.verify_id_token)
+			g.user_id = decoded.get("uid")
+			if not g.user_id:
+				raise AuthError("Invalid token")
+		except AuthError:
+			raise
+		except ImportError:
+			# fb_auth is imported here, on the first verify; without the SDK no token can be checked
+			raise AuthError("Auth not available")
+		except Exception:
+			raise AuthError("Unauthorized")
+		return await fn(*args, **kwargs)
+
+	return wrapper
+
+
+def scheduler_required(fn):
+	"""Quart counterpart of :func:`utils.decorators.scheduler_required`."""
+
+	@wraps(fn)
+	async def wrapper(*args, **kwargs):
+		if not Config.STREAK_JOB_SECRET:
+			raise ForbiddenError("Scheduler endpoints are disabled")
+		secret = request.headers.get("X-Scheduler-Secret", "")
+		if not hmac.compare_digest(secret.encode(), Config.STREAK_JOB_SECRET.encode()):
+			raise AuthError("Missing or invalid scheduler secret")
+		return await fn(*args, **kwargs)
+
+	return wrapper
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from quart import request
+from utils.errors import APIError
+
+
+async def get_json(required: list[str] | None = None) -> dict:
+	data = await request.get_json(silent=True) or {}
+	if required:
+		missing = [k for k in required if k not in data]
+		if missing:
+			raise APIError(f"Missing fields: {', '.join(missing)}", 400)
+	return data
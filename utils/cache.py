@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+_MISSING = object()
+
+
+class TTLCache:
+	"""Small thread-safe LRU whose entries expire ``ttl`` seconds after being set."""
+
+	def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+		self.max_entries = max_entries
+		self.ttl = ttl
+		self._lock = threading.RLock()
+		self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key: Hashable, default: Any = None) -> Any:
+		with self._lock:
+			entry = self._entries.get(key, _MISSING)
+			if entry is _MISSING or entry[0] <= time.monotonic():
+				if entry is not _MISSING:
+					self._drop(key)
+				self.misses += 1
+				return default
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return entry[1]
+
+	def set(self, key: Hashable, value: Any) -> None:
+		if self.ttl <= 0 or self.max_entries <= 0:
+			return
+		with self._lock:
+			self._entries[key] = (time.monotonic() + self.ttl, value)
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_entries:
+				self._drop(next(iter(self._entries)))
+
+	def invalidate(self, key: Hashable) -> None:
+		with self._lock:
+			self._drop(key)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+
+	def stats(self) -> dict:
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				"size": len(self._entries),
+				"hits": self.hits,
+				"misses": self.misses,
+				"hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+			}
+
+	def _drop(self, key: Hashable) -> None:
+		self._entries.pop(key, None)
+
+
+class TaggedTTLCache(TTLCache):
+	"""TTLCache whose entries can also be dropped by any tag stored with them."""
+
+	def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+		super().__init__(max_entries=max_entries, ttl=ttl)
+		self._keys_by_tag: dict[Hashable, set] = {}
+		self._tags_by_key: dict[Hashable, tuple] = {}
+
+	def set(self, key: Hashable, value: Any, tags: tuple | list = ()) -> None:
+		if self.ttl <= 0 or self.max_entries <= 0:
+			return
+		with self._lock:
+			self._drop(key)
+			self._tags_by_key[key] = tuple(tags)
+			for tag in tags:
+				self._keys_by_tag.setdefault(tag, set()).add(key)
+		super().set(key, value)
+
+	def invalidate_tag(self, tag: Hashable) -> None:
+		with self._lock:
+			for key in list(self._keys_by_tag.get(tag, ())):
+				self._drop(key)
+
+	def clear(self) -> None:
+		with self._lock:
+			super().clear()
+			self._keys_by_tag.clear()
+			self._tags_by_key.clear()
+
+	def _drop(self, key: Hashable) -> None:
+		self._entries.pop(key, None)
+		for tag in self._tags_by_key.pop(key, ()):
+			keys = self._keys_by_tag.get(tag)
+			if keys is not None:
+				keys.discard(key)
+				if not keys:
+					del self._keys_by_tag[tag]
+
+
+class VersionedTTLCache(TTLCache):
+	"""TTLCache that will not store a value read before the key's last invalidation.
+
+	Take ``token(key)`` before reading the source and pass it to ``set``; if a
+	write invalidated the key while the read was in flight, the possibly stale
+	value is dropped instead of cached. Generations are striped, so a write to
+	another key in the same stripe at worst costs one skipped fill.
+	"""
+
+	def __init__(self, max_entries: int = 1024, ttl: float = 30.0, stripes: int = 256):
+		super().__init__(max_entries=max_entries, ttl=ttl)
+		self._generations = [0] * stripes
+
+	def _stripe(self, key: Hashable) -> int:
+		return hash(key) % len(self._generations)
+
+	def token(self, key: Hashable) -> int:
+		with self._lock:
+			return self._generations[self._stripe(key)]
+
+	def set(self, key: Hashable, value: Any, token: int | None = None) -> None:
+		with self._lock:
+			if token is not None and token != self._generations[self._stripe(key)]:
+				return
+			super().set(key, value)
+
+	def invalidate(self, key: Hashable) -> None:
+		with self._lock:
+			self._generations[self._stripe(key)] += 1
+			super().invalidate(key)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._generations = [generation + 1 for generation in self._generations]
+			super().clear()
@@ -0,0 +1,50 @@
+import click
+from flask import Flask
+
+from services.firebase_service import firebase_service
+from services.scoring_service import ScoringRules, scoring_service
+
+
+def register_commands(app: Flask) -> None:
+
+	@app.cli.command("reconcile-aggregates")
+	@click.option("--uid", default=None, help="Reconcile a single user instead of everyone.")
+	@click.option("--page-size", default=200, show_default=True, help="Users read per page.")
+	def reconcile_aggregates(uid: str | None, page_size: int) -> None:
+		"""Backfill per-user quiz aggregates and leaderboard names."""
+		if uid:
+			click.echo(firebase_service.reconcile_user_aggregates(uid))
+			return
+		count = firebase_service.reconcile_all_aggregates(page_size=page_size)
+		click.echo(f"Reconciled {count} users")
+
+	@app.cli.command("reset-streaks")
+	@click.option("--page-size", default=None, type=int, help="Users read per page.")
+	@click.option("--shards", default=None, type=int, help="Time slices processed in parallel.")
+	def reset_streaks(page_size: int | None, shards: int | None) -> None:
+		"""Reset streaks of users who missed yesterday; resumes an interrupted run."""
+		summary = firebase_service.daily_streak_check(page_size=page_size, shards=shards)
+		click.echo(summary)
+
+	@app.cli.command("prune-leaderboards")
+	def prune_leaderboards() -> None:
+		"""Delete daily/weekly leaderboard buckets past retention."""
+		click.echo(firebase_service.prune_leaderboards())
+
+	@app.cli.command("rescore")
+	@click.option("--dry-run", is_flag=True, help="Report the differences without writing.")
+	@click.option("--page-size", default=None, type=int, help="Progress items read per page.")
+	@click.option("--base-points", default=None, type=int, help="Preview with base_points_per_correct overridden (--dry-run only).")
+	@click.option("--multiplier", default=None, type=float, help="Preview with difficulty_multiplier overridden (--dry-run only).")
+	def rescore(dry_run: bool, page_size: int | None, base_points: int | None, multiplier: float | None) -> None:
+		"""Recompute historical points, user totals and leaderboards under the scoring rules."""
+		# Submits keep scoring with the live rules, so writing history under other
+		# rules would leave the two inconsistent; overrides only preview
+		if (base_points is not None or multiplier is not None) and not dry_run:
+			raise click.UsageError("--base-points and --multiplier need --dry-run; re-score for real after changing ScoringRules")
+		live = scoring_service.rules
+		rules = ScoringRules(
+			base_points_per_correct=live.base_points_per_correct if base_points is None else base_points,
+			difficulty_multiplier=live.difficulty_multiplier if multiplier is None else multiplier,
+		)
+		click.echo(firebase_service.rescore_all(rules, page_size=page_size, dry_run=dry_run))
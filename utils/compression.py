@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import gzip
+
+from config import Config
+
+try:
+	import brotli
+except ImportError:  # pragma: no cover - gzip only
+	brotli = None
+
+
+# Text bodies worth compressing; streamed responses (SSE, NDJSON export) are left alone
+COMPRESSIBLE = frozenset({"application/json", "text/html", "text/plain", "text/css", "application/javascript"})
+
+
+def supported_encodings() -> list[str]:
+	# Preferred first: brotli is smaller for JSON at a similar CPU cost
+	return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+	if encoding == "br":
+		return brotli.compress(data, quality=Config.COMPRESS_BROTLI_QUALITY)
+	return gzip.compress(data, compresslevel=Config.COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(request, response) -> str | None:
+	"""The encoding to apply to ``response``, or None to send it as-is."""
+	if response.status_code < 200 or response.status_code in (204, 206, 304):
+		return None
+	if response.mimetype not in COMPRESSIBLE or "Content-Encoding" in response.headers:
+		return None
+	length = response.content_length
+	if length is not None and length < Config.COMPRESS_MIN_BYTES:
+		return None
+	return request.accept_encodings.best_match(supported_encodings())
+
+
+def _finish(response, body: bytes, encoding: str) -> None:
+	response.set_data(body)
+	response.headers["Content-Encoding"] = encoding
+	response.vary.add("Accept-Encoding")
+	etag, weak = response.get_etag()
+	if etag and not weak:
+		# Another representation of the same content; If-None-Match compares weakly
+		response.set_etag(etag, weak=True)
+
+
+def register_compression(app) -> None:
+	"""gzip/brotli for buffered text responses above ``COMPRESS_MIN_BYTES``, per Accept-Encoding."""
+	from flask import request
+
+	@app.after_request
+	def compress_response(response):
+		if response.direct_passthrough or response.is_streamed:
+			return response
+		encoding = choose_encoding(request, response)
+		if encoding is None:
+			return response
+		data = response.get_data()
+		if len(data) < Config.COMPRESS_MIN_BYTES:
+			return response
+		_finish(response, compress(data, encoding), encoding)
+		return response
+
+
+def register_compression_async(app) -> None:
+	"""``register_compression`` for the Quart app."""
+	from quart import request
+	from quart.wrappers.response import DataBody
+
+	@app.after_request
+	async def compress_response(response):
+		if not isinstance(response.response, DataBody):
+			return response
+		encoding = choose_encoding(request, response)
+		if encoding is None:
+			return response
+		data = await response.get_data()
+		if len(data) < Config.COMPRESS_MIN_BYTES:
+			return response
+		_finish(response, compress(data, encoding), encoding)
+		return response
@@ -1,12 +1,14 @@
+import hmac
 from functools import wraps
 from flask import request, g
-from utils.errors import AuthError
+from utils.errors import AuthError, ForbiddenError
+from utils.token_cache import token_cache
+from utils.tracing import tracer
+from utils.lazy_import import lazy_import
 from config import Config
 
-try:
-	from firebase_admin import auth as fb_auth
-except Exception:  # firebase not initialized yet in tests
-	fb_auth = None
+# Imported on the first verified token, not at start-up
+fb_auth = lazy_import("firebase_admin.auth")
 
 
 def auth_required(fn):
@@ -21,17 +23,33 @@ def auth_required(fn):
 			raise AuthError("Missing or invalid Authorization header")
 		token = header.split(" ", 1)[1].strip()
 		try:
-			if fb_auth is None:
-				raise AuthError("Auth not available")
-			decoded = fb_auth.verify_id_token(token)
+			with tracer.span("auth.verify_token"):
+				decoded = token_cache.verify(token, fb_auth.verify_id_token)
 			g.user_id = decoded.get("uid")
 			if not g.user_id:
 				raise AuthError("Invalid token")
 		except AuthError:
 			raise
+		except ImportError:
+			# fb_auth is imported here, on the first verify; without the SDK no token can be checked
+			raise AuthError("Auth not available")
 		except Exception:
 			raise AuthError("Unauthorized")
 		return fn(*args, **kwargs)
 
 	return wrapper
 
+
+def scheduler_required(fn):
+	"""Only callers presenting ``Config.STREAK_JOB_SECRET`` (the job scheduler, metrics scraper and operators)."""
+
+	@wraps(fn)
+	def wrapper(*args, **kwargs):
+		if not Config.STREAK_JOB_SECRET:
+			raise ForbiddenError("Scheduler endpoints are disabled")
+		secret = request.headers.get("X-Scheduler-Secret", "")
+		if not hmac.compare_digest(secret.encode(), Config.STREAK_JOB_SECRET.encode()):
+			raise AuthError("Missing or invalid scheduler secret")
+		return fn(*args, **kwargs)
+
+	return wrapper
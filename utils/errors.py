@@ -1,6 +1,3 @@
-from flask import jsonify
-
-
 class APIError(Exception):
 
 	status_code = 400
@@ -28,22 +25,24 @@ class NotFoundError(APIError):
 
 
 def register_error_handlers(app):
+	# Plain dict bodies so the same handlers serve the Flask and Quart apps
 
 	@app.errorhandler(APIError)
 	def handle_api_error(err: APIError):
 		response = {"error": err.message}
-		return jsonify(response), err.status_code
+		# Admission rejections carry Retry-After
+		return response, err.status_code, getattr(err, "headers", None) or {}
 
 	@app.errorhandler(404)
 	def handle_404(_):
-		return jsonify({"error": "Not found"}), 404
+		return {"error": "Not found"}, 404
 
 	@app.errorhandler(405)
 	def handle_405(_):
-		return jsonify({"error": "Method not allowed"}), 405
+		return {"error": "Method not allowed"}, 405
 
 	@app.errorhandler(Exception)
 	def handle_unexpected(err: Exception):
 		# In production, avoid leaking internals
-		return jsonify({"error": "Internal server error"}), 500
+		return {"error": "Internal server error"}, 500
 
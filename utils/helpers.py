@@ -1,14 +1,31 @@
 from __future__ import annotations
 
+import re
 from datetime import datetime, timezone
 from flask import request
 from utils.errors import APIError
+from utils.json_provider import dumps_bytes
 
 
 def utc_now() -> datetime:
 	return datetime.now(timezone.utc)
 
 
+def field_key(value: str) -> str:
+	"""Reduce free text (e.g. a quiz subject) to a safe Firestore map key."""
+	return re.sub(r"[^a-z0-9]+", "_", str(value).lower()).strip("_") or "other"
+
+
+def sse_event(event: str, data) -> str:
+	"""Format one server-sent event, its data encoded like API responses."""
+	return f"event: {event}\ndata: {dumps_bytes(data).decode()}\n\n"
+
+
+def ndjson_line(data) -> str:
+	"""One newline-delimited JSON record, encoded like API responses."""
+	return dumps_bytes(data).decode() + "\n"
+
+
 def get_json(required: list[str] | None = None) -> dict:
 	data = request.get_json(silent=True) or {}
 	if required:
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import decimal
+import json
+import logging
+from datetime import date, datetime
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+	import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+	orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def _default(obj: Any) -> Any:
+	# orjson handles plain datetimes itself but not subclasses such as
+	# Firestore's DatetimeWithNanoseconds, which every stored timestamp is
+	if isinstance(obj, (datetime, date)):
+		return obj.isoformat()
+	if isinstance(obj, decimal.Decimal):
+		return str(obj)
+	if hasattr(obj, "__html__"):
+		return str(obj.__html__())
+	raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+	"""Compact UTF-8 JSON; datetimes as ISO 8601, like the response provider."""
+	if orjson is not None:
+		return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+	return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class OrjsonProvider(JSONProvider):
+	"""Response and request JSON through orjson, for Flask and Quart alike.
+
+	Several times faster than the stdlib encoder on our datetime-heavy
+	documents and writes bytes straight into the response. Datetimes go out
+	as ISO 8601 (the stdlib provider uses HTTP dates); keys keep insertion
+	order rather than being sorted.
+	"""
+
+	mimetype = "application/json"
+
+	def dumps(self, obj: Any, **kwargs: Any) -> str:
+		return dumps_bytes(obj).decode()
+
+	def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+		return orjson.loads(s)
+
+	def response(self, *args: Any, **kwargs: Any):
+		obj = self._prepare_response_obj(args, kwargs)
+		return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+PROVIDERS = {"orjson": OrjsonProvider, "default": DefaultJSONProvider}
+
+
+def install_json_provider(app, name: str) -> None:
+	"""Swap ``app.json`` for the named provider (``JSON_PROVIDER``)."""
+	provider = PROVIDERS.get(name)
+	if provider is None:
+		raise ValueError(f"Unknown JSON_PROVIDER {name!r}; expected one of {sorted(PROVIDERS)}")
+	if provider is OrjsonProvider and orjson is None:
+		logger.warning("orjson is not installed; using the standard JSON provider")
+		provider = DefaultJSONProvider
+	app.json = provider(app)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+
+
+class ArrayItemStream:
+	"""Incrementally pulls the objects of one JSON array out of streamed text.
+
+	Feed raw chunks as they arrive; each call returns the array elements that
+	became complete. Text before the ``"<key>": [`` opener (markdown fences,
+	chatter) is skipped, and braces inside strings are ignored.
+	"""
+
+	def __init__(self, key: str):
+		self._marker = json.dumps(key)
+		self._buf = ""
+		self._pos = 0
+		self._in_array = False
+		self._closed = False
+		self._depth = 0
+		self._start: int | None = None
+		self._in_string = False
+		self._escape = False
+
+	@property
+	def closed(self) -> bool:
+		"""True once the array's closing bracket has been seen."""
+		return self._closed
+
+	def feed(self, chunk: str) -> list:
+		self._buf += chunk
+		items = []
+		if not self._in_array and not self._open_array():
+			return items
+		buf = self._buf
+		pos = self._pos
+		while pos < len(buf) and not self._closed:
+			ch = buf[pos]
+			if self._in_string:
+				if self._escape:
+					self._escape = False
+				elif ch == "\\":
+					self._escape = True
+				elif ch == '"':
+					self._in_string = False
+			elif ch == '"':
+				self._in_string = True
+			elif ch in "{[":
+				if self._depth == 0:
+					self._start = pos
+				self._depth += 1
+			elif ch in "}]":
+				if self._depth == 0:
+					self._closed = True  # the array itself ended
+				else:
+					self._depth -= 1
+					if self._depth == 0:
+						items.append(json.loads(buf[self._start:pos + 1]))
+						self._start = None
+			pos += 1
+		# Drop consumed text so long streams stay O(n)
+		keep = self._start if self._start is not None else pos
+		self._buf = buf[keep:]
+		self._pos = pos - keep
+		if self._start is not None:
+			self._start = 0
+		return items
+
+	def _open_array(self) -> bool:
+		idx = self._buf.find(self._marker)
+		if idx == -1:
+			# The marker may straddle the next chunk
+			self._buf = self._buf[-len(self._marker):]
+			return False
+		bracket = self._buf.find("[", idx + len(self._marker))
+		if bracket == -1:
+			return False
+		self._buf = self._buf[bracket + 1:]
+		self._pos = 0
+		self._in_array = True
+		return True
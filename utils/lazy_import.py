@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import importlib
+import threading
+from types import ModuleType
+
+
+class LazyModule:
+	"""Stands in for a module and imports it on first attribute access.
+
+	Heavy SDKs (firebase_admin, google.generativeai, httpx) cost hundreds of
+	milliseconds to import; holding them behind this proxy keeps that off
+	process start-up and moves it to first use, or to ``/ready`` warm-up.
+	Assigning an attribute on the owning module (as tests and benchmarks do
+	with fakes) replaces the proxy as usual.
+	"""
+
+	def __init__(self, name: str):
+		self.__dict__["_name"] = name
+		self.__dict__["_module"] = None
+		self.__dict__["_lock"] = threading.Lock()
+
+	def _load(self) -> ModuleType:
+		module = self.__dict__["_module"]
+		if module is None:
+			with self.__dict__["_lock"]:
+				module = self.__dict__["_module"]
+				if module is None:
+					module = self.__dict__["_module"] = importlib.import_module(self.__dict__["_name"])
+		return module
+
+	def __getattr__(self, attr: str):
+		return getattr(self._load(), attr)
+
+	def __repr__(self) -> str:
+		state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+		return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+	return LazyModule(name)
+
+
+def load(*modules) -> None:
+	"""Import lazily held modules now (no-op for real modules and fakes)."""
+	for module in modules:
+		if isinstance(module, LazyModule):
+			module._load()
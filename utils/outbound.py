@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+from config import Config
+from utils.errors import APIError
+from utils.lazy_import import lazy_import
+
+
+# Imported with the first outbound call; httpx only ever by the ASGI app
+requests = lazy_import("requests")
+httpx = lazy_import("httpx")
+
+
+# Statuses worth another attempt: throttling and transient server failures
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(APIError):
+
+	status_code = 503
+
+
+class UpstreamStatusError(Exception):
+	"""A retryable HTTP status, raised so it is retried and counted like a failure."""
+
+	def __init__(self, response):
+		super().__init__(f"upstream returned {response.status_code}")
+		self.response = response
+
+
+class CircuitBreaker:
+	"""Closed -> open after ``threshold`` consecutive failures.
+
+	While open every call fails fast; after ``reset_seconds`` a single probe is
+	let through (half-open) and its outcome closes or re-opens the circuit. A
+	probe that never reports back (an abandoned stream) is replaced by another
+	after the same interval.
+	"""
+
+	CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+	def __init__(self, threshold: int = 5, reset_seconds: float = 30.0):
+		self.threshold = max(1, threshold)
+		self.reset_seconds = reset_seconds
+		self._lock = threading.Lock()
+		self.state = self.CLOSED
+		self.failures = 0
+		self.opened_at = 0.0
+		self.opens = 0
+
+	def allow(self) -> bool:
+		with self._lock:
+			if self.state == self.CLOSED:
+				return True
+			if time.monotonic() - self.opened_at >= self.reset_seconds:
+				self.state = self.HALF_OPEN
+				self.opened_at = time.monotonic()
+				return True
+			return False
+
+	def record_success(self) -> None:
+		with self._lock:
+			self.state = self.CLOSED
+			self.failures = 0
+
+	def record_failure(self) -> None:
+		with self._lock:
+			self.failures += 1
+			if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+				if self.state != self.OPEN:
+					self.opens += 1
+				self.state = self.OPEN
+				self.opened_at = time.monotonic()
+
+
+class Upstream:
+	"""Retry, deadline and breaker policy for one remote dependency.
+
+	``fn`` receives the seconds left in the call's deadline and must not block
+	longer than that. Failures for which ``retryable`` is true are retried with
+	full-jitter exponential backoff while the deadline allows and count against
+	the breaker; anything else (a 4xx, a validation error) propagates at once.
+	"""
+
+	def __init__(
+		self,
+		name: str,
+		deadline: float,
+		attempts: int = 3,
+		backoff_base: float = 0.1,
+		backoff_cap: float = 2.0,
+		retryable: Callable[[BaseException], bool] | None = None,
+		breaker: CircuitBreaker | None = None,
+	):
+		self.name = name
+		self.deadline = deadline
+		self.attempts = max(1, attempts)
+		self.backoff_base = backoff_base
+		self.backoff_cap = backoff_cap
+		self.retryable = retryable or (lambda exc: True)
+		self.breaker = breaker or CircuitBreaker(Config.BREAKER_FAILURE_THRESHOLD, Config.BREAKER_RESET_SECONDS)
+		self._lock = threading.Lock()
+		self.counts = {"calls": 0, "failures": 0, "retries": 0, "shortCircuited": 0}
+
+	def _count(self, key: str) -> None:
+		with self._lock:
+			self.counts[key] += 1
+
+	def _backoff(self, attempt: int) -> float:
+		return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+	def admit(self) -> None:
+		"""Fail fast while the circuit is open; used directly by streaming calls."""
+		if not self.breaker.allow():
+			self._count("shortCircuited")
+			raise CircuitOpenError(f"{self.name} is temporarily unavailable", 503)
+		self._count("calls")
+
+	def record(self, ok: bool) -> None:
+		if ok:
+			self.breaker.record_success()
+		else:
+			self._count("failures")
+			self.breaker.record_failure()
+
+	def _next_delay(self, attempt: int, exc: BaseException, expires: float) -> float | None:
+		# None when the failure is final: not retryable, out of attempts or out of time
+		if not self.retryable(exc) or attempt + 1 >= self.attempts:
+			return None
+		delay = self._backoff(attempt)
+		if time.monotonic() + delay >= expires:
+			return None
+		self._count("retries")
+		return delay
+
+	def call(self, fn: Callable[[float], Any]) -> Any:
+		self.admit()
+		expires = time.monotonic() + self.deadline
+		for attempt in range(self.attempts):
+			try:
+				result = fn(max(0.001, expires - time.monotonic()))
+			except Exception as exc:
+				delay = self._next_delay(attempt, exc, expires)
+				if delay is None:
+					self.record(not self.retryable(exc))
+					raise
+				time.sleep(delay)
+			else:
+				self.record(True)
+				return result
+
+	async def call_async(self, fn: Callable[[float], Awaitable[Any]]) -> Any:
+		self.admit()
+		expires = time.monotonic() + self.deadline
+		for attempt in range(self.attempts):
+			remaining = max(0.001, expires - time.monotonic())
+			try:
+				result = await asyncio.wait_for(fn(remaining), remaining)
+			except Exception as exc:
+				delay = self._next_delay(attempt, exc, expires)
+				if delay is None:
+					self.record(not self.retryable(exc))
+					raise
+				await asyncio.sleep(delay)
+			else:
+				self.record(True)
+				return result
+
+	def stats(self) -> dict:
+		with self._lock:
+			counts = dict(self.counts)
+		return {"state": self.breaker.state, "consecutiveFailures": self.breaker.failures, "opens": self.breaker.opens, **counts}
+
+
+def upstream_errors() -> tuple[type[BaseException], ...]:
+	"""What a caller catches to turn an exhausted upstream into its own error."""
+	return (UpstreamStatusError, requests.RequestException, httpx.HTTPError, asyncio.TimeoutError)
+
+
+def _http_retryable(exc: BaseException) -> bool:
+	return isinstance(exc, (
+		UpstreamStatusError,
+		requests.ConnectionError,
+		requests.Timeout,
+		httpx.TransportError,
+		asyncio.TimeoutError,
+	))
+
+
+class OutboundHTTP:
+	"""Process-wide HTTP clients: one keep-alive pool per host, shared by all callers.
+
+	The sync side is a ``requests.Session`` and the ASGI app uses an
+	``httpx.AsyncClient`` (closed on shutdown); both are created on first use.
+	Every request goes through the named upstream's retry/breaker policy.
+	"""
+
+	def __init__(self):
+		self._session: requests.Session | None = None
+		self._adapter = None
+		self._async: httpx.AsyncClient | None = None
+		self._lock = threading.Lock()
+		self.upstreams: dict[str, Upstream] = {}
+
+	@property
+	def session(self) -> requests.Session:
+		if self._session is None:
+			with self._lock:
+				if self._session is None:
+					from requests.adapters import HTTPAdapter
+					session = requests.Session()
+					adapter = HTTPAdapter(
+						pool_connections=Config.HTTP_POOL_HOSTS,
+						pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+						max_retries=0,
+					)
+					session.mount("https://", adapter)
+					session.mount("http://", adapter)
+					self._adapter = adapter
+					self._session = session
+		return self._session
+
+	def upstream(self, name: str, deadline: float | None = None, retryable: Callable[[BaseException], bool] | None = None) -> Upstream:
+		with self._lock:
+			upstream = self.upstreams.get(name)
+			if upstream is None:
+				upstream = self.upstreams[name] = Upstream(
+					name,
+					deadline=deadline or Config.OUTBOUND_DEADLINE_SECONDS,
+					attempts=Config.OUTBOUND_ATTEMPTS,
+					backoff_base=Config.OUTBOUND_BACKOFF_BASE_SECONDS,
+					retryable=retryable or _http_retryable,
+				)
+			return upstream
+
+	@staticmethod
+	def _checked(resp):
+		if resp.status_code in RETRY_STATUSES:
+			raise UpstreamStatusError(resp)
+		return resp
+
+	def request(self, upstream: str, method: str, url: str, **kwargs) -> requests.Response:
+		"""Send with retries; a retryable status that persists raises ``UpstreamStatusError``."""
+		return self.upstream(upstream).call(
+			lambda timeout: self._checked(self.session.request(method, url, timeout=timeout, **kwargs))
+		)
+
+	def async_client(self) -> httpx.AsyncClient:
+		if self._async is None:
+			self._async = httpx.AsyncClient(limits=httpx.Limits(
+				max_connections=Config.HTTP_POOL_HOSTS * Config.HTTP_POOL_MAXSIZE,
+				max_keepalive_connections=Config.HTTP_POOL_MAXSIZE,
+				keepalive_expiry=Config.HTTP_KEEPALIVE_SECONDS,
+			))
+		return self._async
+
+	async def request_async(self, upstream: str, method: str, url: str, **kwargs) -> httpx.Response:
+		client = self.async_client()
+
+		async def send(timeout: float):
+			return self._checked(await client.request(method, url, timeout=timeout, **kwargs))
+
+		return await self.upstream(upstream).call_async(send)
+
+	async def aclose(self) -> None:
+		if self._async is not None:
+			await self._async.aclose()
+			self._async = None
+
+	def pool_stats(self) -> dict:
+		pools = {}
+		if self._adapter is None:
+			return pools
+		manager = self._adapter.poolmanager
+		for key in list(manager.pools.keys()):
+			pool = manager.pools.get(key)
+			if pool is None:
+				continue
+			pools[f"{pool.scheme}://{pool.host}"] = {
+				"connectionsOpened": pool.num_connections,
+				"requests": pool.num_requests,
+			}
+		return pools
+
+	def stats(self) -> dict:
+		with self._lock:
+			upstreams = dict(self.upstreams)
+		return {
+			"upstreams": {name: u.stats() for name, u in upstreams.items()},
+			"pools": self.pool_stats(),
+		}
+
+	def render(self) -> str:
+		"""Prometheus gauges/counters for ``/metrics``."""
+		stats = self.stats()
+		states = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+		lines = [
+			"# HELP webnova_upstream_breaker_state Circuit state (0 closed, 1 half-open, 2 open).",
+			"# TYPE webnova_upstream_breaker_state gauge",
+		]
+		lines += [f'webnova_upstream_breaker_state{{upstream="{n}"}} {states[s["state"]]}' for n, s in stats["upstreams"].items()]
+		for key, metric in (("calls", "calls"), ("failures", "failures"), ("retries", "retries"), ("shortCircuited", "short_circuited")):
+			lines += [f"# TYPE webnova_upstream_{metric}_total counter"]
+			lines += [f'webnova_upstream_{metric}_total{{upstream="{n}"}} {s[key]}' for n, s in stats["upstreams"].items()]
+		lines += ["# TYPE webnova_http_pool_requests_total counter"]
+		lines += [f'webnova_http_pool_requests_total{{host="{h}"}} {p["requests"]}' for h, p in stats["pools"].items()]
+		lines += ["# TYPE webnova_http_pool_connections_opened_total counter"]
+		lines += [f'webnova_http_pool_connections_opened_total{{host="{h}"}} {p["connectionsOpened"]}' for h, p in stats["pools"].items()]
+		return "\n".join(lines) + "\n"
+
+
+outbound = OutboundHTTP()
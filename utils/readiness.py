@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+	"""Named warm-up steps behind a ``/ready`` probe.
+
+	Each probe runs the steps that have not succeeded yet, in order; one that
+	fails is retried by the next probe, and the instance reports ready once
+	every step has passed. Steps pay the deferred costs of a cold process
+	(SDK imports, client and channel setup, certificate fetches) so the first
+	routed request does not. Concurrent probes wait for the one in progress.
+	"""
+
+	def __init__(self, steps: dict[str, Callable[[], Any]]):
+		self.steps = steps
+		self._lock = threading.Lock()
+		self._async_lock: asyncio.Lock | None = None
+		self._results: dict[str, dict] = {}
+
+	@property
+	def ready(self) -> bool:
+		return all(self._results.get(name, {}).get("ok") for name in self.steps)
+
+	def _pending(self) -> list[tuple[str, Callable[[], Any]]]:
+		return [(name, step) for name, step in self.steps.items() if not self._results.get(name, {}).get("ok")]
+
+	def _record(self, name: str, start: float, exc: Exception | None) -> None:
+		ms = round((time.perf_counter() - start) * 1000, 1)
+		if exc is None:
+			self._results[name] = {"ok": True, "ms": ms}
+			return
+		logger.warning("Warm-up step %s failed: %s", name, exc)
+		self._results[name] = {"ok": False, "ms": ms, "error": str(exc) or type(exc).__name__}
+
+	def check(self) -> tuple[bool, dict]:
+		with self._lock:
+			for name, step in self._pending():
+				start = time.perf_counter()
+				try:
+					step()
+				except Exception as exc:
+					self._record(name, start, exc)
+				else:
+					self._record(name, start, None)
+			return self.ready, dict(self._results)
+
+	async def check_async(self) -> tuple[bool, dict]:
+		"""``check`` for the ASGI app: coroutine steps are awaited, others run on a thread."""
+		if self._async_lock is None:
+			self._async_lock = asyncio.Lock()
+		async with self._async_lock:
+			for name, step in self._pending():
+				start = time.perf_counter()
+				try:
+					if inspect.iscoroutinefunction(step):
+						await step()
+					else:
+						await asyncio.to_thread(step)
+				except Exception as exc:
+					self._record(name, start, exc)
+				else:
+					self._record(name, start, None)
+			return self.ready, dict(self._results)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import contextvars
+from typing import Any, Hashable
+
+
+# Documents read by the current request; None outside one (CLI jobs, background threads)
+_memo: contextvars.ContextVar[dict | None] = contextvars.ContextVar("request_memo", default=None)
+
+
+def start() -> None:
+	_memo.set({})
+
+
+def finish() -> None:
+	_memo.set(None)
+
+
+def get(key: Hashable, default: Any = None) -> Any:
+	memo = _memo.get()
+	return default if memo is None else memo.get(key, default)
+
+
+def put(key: Hashable, value: Any) -> None:
+	memo = _memo.get()
+	if memo is not None:
+		memo[key] = value
+
+
+def invalidate(key: Hashable) -> None:
+	memo = _memo.get()
+	if memo is not None:
+		memo.pop(key, None)
+
+
+def register_request_memo(app) -> None:
+	"""Flask hooks: a fresh memo per request, dropped when the request ends.
+
+	Threads are reused across requests, so the memo must not outlive one.
+	"""
+
+	@app.before_request
+	def _open_memo() -> None:
+		start()
+
+	@app.teardown_request
+	def _close_memo(_exc) -> None:
+		finish()
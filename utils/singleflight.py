@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import threading
+from functools import wraps
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+
+	__slots__ = ("done", "result", "error", "waiters")
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.result: Any = None
+		self.error: BaseException | None = None
+		self.waiters = 0
+
+
+class SingleFlight:
+	"""Collapses concurrent calls with the same key into one execution.
+
+	The first caller runs the function; callers arriving while it is in flight
+	wait and receive a deep copy of its result (or its exception). The copy
+	source is snapshotted before the first caller gets the result back, so
+	nothing it does to that object reaches the others.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._calls: dict[Hashable, _Call] = {}
+		self.executed = 0
+		self.coalesced = 0
+
+	def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+		with self._lock:
+			call = self._calls.get(key)
+			if call is not None:
+				call.waiters += 1
+				self.coalesced += 1
+				leader = False
+			else:
+				call = self._calls[key] = _Call()
+				self.executed += 1
+				leader = True
+		if not leader:
+			call.done.wait()
+			if call.error is not None:
+				raise call.error
+			return copy.deepcopy(call.result)
+		result = None
+		try:
+			result = fn(*args, **kwargs)
+			return result
+		except BaseException as e:
+			call.error = e
+			raise
+		finally:
+			with self._lock:
+				self._calls.pop(key, None)
+			# No one can join once the call is popped, so the count is final
+			if call.waiters and call.error is None:
+				call.result = copy.deepcopy(result)
+			call.done.set()
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				"executed": self.executed,
+				"coalesced": self.coalesced,
+				"inFlight": len(self._calls),
+			}
+
+
+class _AsyncCall:
+
+	__slots__ = ("task", "result", "waiters")
+
+	def __init__(self, task: asyncio.Task):
+		self.task = task
+		self.result: Any = None
+		self.waiters = 0
+
+
+class AsyncSingleFlight:
+	"""Event-loop counterpart of :class:`SingleFlight` for coroutine functions.
+
+	Waiters share the leader's task, so a cancelled waiter never cancels the
+	underlying call. Their copies come from a snapshot taken as the task
+	completes, before the leader resumes with the result.
+	"""
+
+	def __init__(self):
+		self._calls: dict[Hashable, _AsyncCall] = {}
+		self.executed = 0
+		self.coalesced = 0
+
+	async def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+		call = self._calls.get(key)
+		if call is not None:
+			self.coalesced += 1
+			call.waiters += 1
+			await asyncio.shield(call.task)
+			return copy.deepcopy(call.result)
+		call = self._calls[key] = _AsyncCall(asyncio.ensure_future(fn(*args, **kwargs)))
+		# Registered first, so it runs before any awaiter is woken
+		call.task.add_done_callback(lambda done: self._settle(key, call))
+		self.executed += 1
+		return await asyncio.shield(call.task)
+
+	def _settle(self, key: Hashable, call: _AsyncCall) -> None:
+		if self._calls.get(key) is call:
+			del self._calls[key]
+		if call.waiters and not call.task.cancelled() and call.task.exception() is None:
+			call.result = copy.deepcopy(call.task.result())
+
+	def stats(self) -> dict:
+		return {
+			"executed": self.executed,
+			"coalesced": self.coalesced,
+			"inFlight": len(self._calls),
+		}
+
+
+class Generations:
+	"""Write counters per scope, striped over a fixed number of slots.
+
+	Coalescing keys carry their scope's counter, so a read that starts after a
+	write is invalidated never joins one that began before it. Scopes sharing
+	a slot only coalesce a little less.
+	"""
+
+	def __init__(self, slots: int = 4096):
+		self._lock = threading.Lock()
+		self._counts = [0] * slots
+
+	def get(self, scope: Hashable) -> int:
+		return self._counts[hash(scope) % len(self._counts)]
+
+	def bump(self, scope: Hashable) -> None:
+		with self._lock:
+			self._counts[hash(scope) % len(self._counts)] += 1
+
+
+singleflight = SingleFlight()
+async_singleflight = AsyncSingleFlight()
+# Bumped by FirebaseService._invalidate_users for each user it drops
+generations = Generations()
+
+
+def _key(fn: Callable[..., Any], args: tuple, kwargs: dict) -> Hashable:
+	# The first argument (a user, quiz or board id) is the scope writes invalidate
+	scope = args[0] if args else None
+	return (fn.__qualname__, args, tuple(sorted(kwargs.items())), generations.get(scope))
+
+
+def coalesced(fn: Callable[..., Any]) -> Callable[..., Any]:
+	"""Method decorator keyed on the method name, its (hashable) arguments and the first one's generation."""
+
+	@wraps(fn)
+	def wrapper(self, *args, **kwargs):
+		return singleflight.do(_key(fn, args, kwargs), fn, self, *args, **kwargs)
+
+	return wrapper
+
+
+def async_coalesced(fn: Callable[..., Any]) -> Callable[..., Any]:
+	"""Like :func:`coalesced`, for ``async def`` methods."""
+
+	@wraps(fn)
+	async def wrapper(self, *args, **kwargs):
+		return await async_singleflight.do(_key(fn, args, kwargs), fn, self, *args, **kwargs)
+
+	return wrapper
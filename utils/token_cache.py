@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from config import Config
+
+
+class TokenCache:
+	"""Bounded LRU of verified ID-token claims.
+
+	Entries are keyed by a SHA-256 of the raw token and never outlive the
+	token's own ``exp`` claim.
+	"""
+
+	def __init__(self, max_entries: int = 10000, max_ttl: int = 300):
+		self.max_entries = max_entries
+		self.max_ttl = max_ttl
+		self._lock = threading.Lock()
+		self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+		self._keys_by_uid: dict[str, set[str]] = {}
+		self.hits = 0
+		self.misses = 0
+
+	@staticmethod
+	def _key(token: str) -> str:
+		return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+	def get(self, token: str) -> dict | None:
+		key = self._key(token)
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self.misses += 1
+				return None
+			expires_at, claims = entry
+			if expires_at <= time.time():
+				self._drop(key)
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return claims
+
+	def put(self, token: str, claims: dict) -> None:
+		if self.max_entries <= 0:
+			return
+		expires_at = time.time() + self.max_ttl
+		exp = claims.get("exp")
+		if exp is not None:
+			expires_at = min(expires_at, float(exp))
+		if expires_at <= time.time():
+			return
+		key = self._key(token)
+		uid = claims.get("uid")
+		with self._lock:
+			self._drop(key)
+			self._entries[key] = (expires_at, claims)
+			if uid:
+				self._keys_by_uid.setdefault(uid, set()).add(key)
+			while len(self._entries) > self.max_entries:
+				self._drop(next(iter(self._entries)))
+
+	def verify(self, token: str, verifier: Callable[[str], dict]) -> dict:
+		claims = self.get(token)
+		if claims is None:
+			claims = verifier(token)
+			self.put(token, claims)
+		return claims
+
+	async def verify_async(self, token: str, verifier: Callable[[str], dict]) -> dict:
+		# Signature checks (and the occasional cert fetch) stay off the event loop
+		claims = self.get(token)
+		if claims is None:
+			claims = await asyncio.to_thread(verifier, token)
+			self.put(token, claims)
+		return claims
+
+	def invalidate_uid(self, uid: str) -> None:
+		with self._lock:
+			for key in list(self._keys_by_uid.get(uid, ())):
+				self._drop(key)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self._keys_by_uid.clear()
+
+	def stats(self) -> dict:
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				"size": len(self._entries),
+				"hits": self.hits,
+				"misses": self.misses,
+				"hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+			}
+
+	def _drop(self, key: str) -> None:
+		entry = self._entries.pop(key, None)
+		if entry is None:
+			return
+		uid = entry[1].get("uid")
+		keys = self._keys_by_uid.get(uid)
+		if keys is not None:
+			keys.discard(key)
+			if not keys:
+				del self._keys_by_uid[uid]
+
+
+token_cache = TokenCache(
+	max_entries=Config.TOKEN_CACHE_MAX_ENTRIES,
+	max_ttl=Config.TOKEN_CACHE_MAX_TTL_SECONDS,
+)
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import contextvars
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable
+
+from config import Config
+
+
+# Upper bounds (seconds) shared by every latency histogram
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_request_spans: contextvars.ContextVar[list | None] = contextvars.ContextVar("request_spans", default=None)
+
+
+class Histogram:
+	"""Cumulative Prometheus-style histogram, one series per label set."""
+
+	def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets: tuple[float, ...] = BUCKETS):
+		self.name = name
+		self.help_text = help_text
+		self.label_names = label_names
+		self.buckets = buckets
+		self._lock = threading.Lock()
+		self._series: dict[tuple, list] = {}
+
+	def observe(self, labels: tuple, value: float) -> None:
+		with self._lock:
+			series = self._series.get(labels)
+			if series is None:
+				series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+			counts = series[0]
+			for i, bound in enumerate(self.buckets):
+				if value <= bound:
+					counts[i] += 1
+					break
+			series[1] += value
+			series[2] += 1
+
+	def render(self) -> list[str]:
+		lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+		with self._lock:
+			for labels, (counts, total, count) in sorted(self._series.items()):
+				base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+				prefix = base + "," if base else ""
+				cumulative = 0
+				for bound, n in zip(self.buckets, counts):
+					cumulative += n
+					lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+				lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+				lines.append(f"{self.name}_sum{{{base}}} {total}")
+				lines.append(f"{self.name}_count{{{base}}} {count}")
+		return lines
+
+
+def _escape(value: Any) -> str:
+	return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Tracer:
+	"""Records a span per backend call.
+
+	Spans feed a process-wide histogram and, while a request is active, the
+	request's own list, from which the ``Server-Timing`` header is built.
+	"""
+
+	def __init__(self):
+		self.calls = Histogram("webnova_backend_call_seconds", "Duration of traced backend calls.", ("call",))
+		self.requests = Histogram("webnova_http_request_seconds", "Duration of HTTP requests.", ("method", "route", "status"))
+
+	def record(self, name: str, seconds: float) -> None:
+		self.calls.observe((name,), seconds)
+		spans = _request_spans.get()
+		if spans is not None:
+			spans.append((name, seconds))
+
+	@contextmanager
+	def span(self, name: str):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.record(name, time.perf_counter() - start)
+
+	def start_request(self) -> None:
+		_request_spans.set([])
+
+	def finish_request(self, method: str, route: str, status: int, seconds: float) -> str:
+		"""Close the current request and return its ``Server-Timing`` value."""
+		spans = _request_spans.get() or []
+		_request_spans.set(None)
+		self.requests.observe((method, route, str(status)), seconds)
+		totals: dict[str, list] = {}
+		for name, duration in spans:
+			entry = totals.setdefault(name, [0.0, 0])
+			entry[0] += duration
+			entry[1] += 1
+		parts = [f'{name};dur={d * 1000:.1f};desc="x{n}"' for name, (d, n) in totals.items()]
+		parts.append(f"total;dur={seconds * 1000:.1f}")
+		return ", ".join(parts)
+
+	def render(self) -> str:
+		return "\n".join(self.calls.render() + self.requests.render()) + "\n"
+
+
+tracer = Tracer()
+
+
+class _TimedIterator:
+	"""Wraps a lazily consumed RPC result; the span ends when it is exhausted."""
+
+	def __init__(self, inner, name: str, start: float):
+		self._inner = inner
+		self._name = name
+		self._start = start
+		self._done = False
+
+	def _finish(self) -> None:
+		if not self._done:
+			self._done = True
+			tracer.record(self._name, time.perf_counter() - self._start)
+
+	def __iter__(self):
+		return self
+
+	def __next__(self):
+		try:
+			return next(self._inner)
+		except BaseException:
+			self._finish()
+			raise
+
+	def __aiter__(self):
+		return self
+
+	async def __anext__(self):
+		try:
+			return await self._inner.__anext__()
+		except BaseException:
+			self._finish()
+			raise
+
+	def __getattr__(self, item):
+		return getattr(self._inner, item)
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+	"""Decorator recording a span around sync, async and streaming callables."""
+
+	def decorate(fn: Callable) -> Callable:
+		if inspect.iscoroutinefunction(fn):
+			@wraps(fn)
+			async def async_wrapper(*args, **kwargs):
+				with tracer.span(name):
+					return await fn(*args, **kwargs)
+			return async_wrapper
+
+		@wraps(fn)
+		def wrapper(*args, **kwargs):
+			start = time.perf_counter()
+			try:
+				result = fn(*args, **kwargs)
+			except BaseException:
+				tracer.record(name, time.perf_counter() - start)
+				raise
+			if hasattr(result, "__next__") or hasattr(result, "__anext__"):
+				return _TimedIterator(result, name, start)
+			tracer.record(name, time.perf_counter() - start)
+			return result
+
+		return wrapper
+
+	return decorate
+
+
+def instrument(cls: type, methods: dict[str, str]) -> None:
+	"""Trace ``cls.<method>`` as ``<span name>`` in place; safe to call twice."""
+	if not Config.TRACING_ENABLED:
+		return
+	for method, name in methods.items():
+		fn = cls.__dict__.get(method)
+		if fn is None or getattr(fn, "__traced__", False):
+			continue
+		wrapper = traced(name)(fn)
+		wrapper.__traced__ = True
+		setattr(cls, method, wrapper)
+
+
+def trace_methods(prefix: str) -> Callable[[type], type]:
+	"""Class decorator tracing every public method as ``<prefix>.<method>``."""
+
+	def decorate(cls: type) -> type:
+		instrument(cls, {
+			name: f"{prefix}.{name}"
+			for name, fn in vars(cls).items()
+			if not name.startswith("_") and inspect.isfunction(fn)
+		})
+		return cls
+
+	return decorate
+
+
+def instrument_firestore() -> None:
+	"""Trace each Firestore RPC of the sync and async clients.
+
+	``Query.get`` and ``CollectionReference.get`` delegate to ``stream``, so only
+	``stream`` is wrapped to avoid counting a query twice.
+	"""
+	from google.cloud.firestore_v1 import async_batch, async_client, async_document, async_query
+	from google.cloud.firestore_v1 import batch, client, document, query
+
+	for doc_cls in (document.DocumentReference, async_document.AsyncDocumentReference):
+		instrument(doc_cls, {m: f"firestore.{m}" for m in ("get", "set", "update", "create", "delete")})
+	for batch_cls in (batch.WriteBatch, async_batch.AsyncWriteBatch):
+		instrument(batch_cls, {"commit": "firestore.commit"})
+	for query_cls in (query.Query, async_query.AsyncQuery):
+		instrument(query_cls, {"stream": "firestore.query"})
+	for client_cls in (client.Client, async_client.AsyncClient):
+		instrument(client_cls, {"get_all": "firestore.get_all"})
+
+
+def instrument_gemini() -> None:
+	import google.generativeai as genai
+
+	instrument(genai.GenerativeModel, {
+		"generate_content": "gemini.generate_content",
+		"generate_content_async": "gemini.generate_content",
+	})
+
+
+def register_tracing(app) -> None:
+	"""Flask hooks: open a span list per request, emit ``Server-Timing`` at the end."""
+	from flask import g, request
+
+	@app.before_request
+	def _start_trace() -> None:
+		g.trace_started = time.perf_counter()
+		tracer.start_request()
+
+	@app.after_request
+	def _finish_trace(response):
+		started = g.pop("trace_started", None)
+		if started is None:
+			return response
+		route = request.url_rule.rule if request.url_rule else "unmatched"
+		timing = tracer.finish_request(request.method, route, response.status_code, time.perf_counter() - started)
+		if Config.SERVER_TIMING_ENABLED:
+			response.headers["Server-Timing"] = timing
+		return response